@@ -6,15 +6,18 @@ from matplotlib import pyplot as plt
 from matplotlib.animation import FuncAnimation
 from matplotlib.artist import Artist
 
-from garden_eye.api.database import Annotation, VideoFile, init_database
-from garden_eye.helpers import WILDLIFE_COCO_LABELS, is_target_coco_annotation
+from garden_eye.api.database import get_generation, init_database
+from garden_eye.api.stats import STATS_CACHE, LibraryStats
+from garden_eye.helpers import WILDLIFE_COCO_LABELS
 
 
 def run() -> None:
     """Create animated transition between annotation and video distributions."""
     init_database()
-    video_dist = get_video_distribution()
-    annotation_dist = get_annotation_distribution()
+    # The same cached statistics served by /api/stats
+    stats = STATS_CACHE.get(get_generation())
+    video_dist = get_video_distribution(stats)
+    annotation_dist = get_annotation_distribution(stats)
 
     # Set up dark theme styling to match frontend
     plt.style.use("dark_background")
@@ -93,50 +96,23 @@ def run() -> None:
     plt.show()
 
 
-def get_video_distribution() -> dict[str, int]:
+def get_video_distribution(stats: LibraryStats) -> dict[str, int]:
     """
     Count videos by detected content categories.
 
     Counts the number of videos that contain:
-    1. Any wildlife annotation in WILDLIFE_COCO_LABELS ("Wildlife") - the number of "Person" annotations.
-    2. Only a "person" annotation ("Person").
-    3. No wildlife annotations ("None").
+    1. Any wildlife annotation in WILDLIFE_COCO_LABELS other than "person" ("Wildlife").
+    2. Only "person" annotations ("Person").
+    3. No target annotations ("Other").
     """
-    # Count total videos
-    total_count = VideoFile.select().count()
-
-    # Count videos with target annotations (wildlife/people from WILDLIFE_COCO_LABELS)
-    wildlife = (
-        VideoFile.select()
-        .join(Annotation)
-        .where(Annotation.name.in_(list(WILDLIFE_COCO_LABELS.values())))
-        .distinct()
-        .count()
-    )
-
-    # Count videos with only "person" annotations
-    # First get videos that have person annotations
-    videos_with_person = VideoFile.select().join(Annotation).where(Annotation.name == "person").distinct()
-
-    # Then filter to only those that have ONLY person annotations
-    person_only_count = 0
-    for video in videos_with_person:
-        unique_annotations = Annotation.select(Annotation.name).where(Annotation.video_file == video).distinct()
-        annotation_names = [ann.name for ann in unique_annotations if is_target_coco_annotation(ann.name)]
-        if annotation_names == ["person"]:
-            person_only_count += 1
-
-    wildlife -= person_only_count
-    none_count = total_count - wildlife - person_only_count
-
     return {
-        "Other": none_count,
-        "Person": person_only_count,
-        "Wildlife": wildlife,
+        "Other": stats.empty_videos,
+        "Person": stats.person_only_videos,
+        "Wildlife": stats.wildlife_videos,
     }
 
 
-def get_annotation_distribution() -> dict[str, int]:
+def get_annotation_distribution(stats: LibraryStats) -> dict[str, int]:
     """
     Count annotations by category.
 
@@ -145,16 +121,11 @@ def get_annotation_distribution() -> dict[str, int]:
     2. Person annotations ("Person").
     3. Other annotations not in WILDLIFE_COCO_LABELS ("Other").
     """
-    # Count person annotations
-    person_count = Annotation.select().where(Annotation.name == "person").count()
-
-    # Count wildlife annotations (all target annotations except person)
-    wildlife_labels = [label for label in WILDLIFE_COCO_LABELS.values() if label != "person"]
-    wildlife_count = Annotation.select().where(Annotation.name.in_(wildlife_labels)).count()
-
-    # Count other annotations (not in WILDLIFE_COCO_LABELS)
-    all_wildlife_labels = list(WILDLIFE_COCO_LABELS.values())
-    other_count = Annotation.select().where(Annotation.name.not_in(all_wildlife_labels)).count()
+    counts = {class_stats.name: class_stats.box_count for class_stats in stats.classes}
+    wildlife_labels = set(WILDLIFE_COCO_LABELS.values()) - {"person"}
+    person_count = counts.pop("person", 0)
+    wildlife_count = sum(count for name, count in counts.items() if name in wildlife_labels)
+    other_count = sum(counts.values()) - wildlife_count
 
     return {
         "Other": other_count,
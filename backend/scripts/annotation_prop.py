@@ -3,18 +3,17 @@
 import numpy as np
 from matplotlib import pyplot as plt
 
-from garden_eye.api.database import VideoFile, init_database
+from garden_eye.api.database import get_generation, init_database
+from garden_eye.api.stats import STATS_CACHE
 
 
 def run() -> None:
     """Generate horizontal histogram of wildlife proportion distribution across videos."""
     init_database()
 
-    # Get all videos with wildlife proportions
-    videos = VideoFile.select().where(VideoFile.wildlife_prop.is_null(False))
-    proportions = [video.wildlife_prop for video in videos if video.wildlife_prop > 0]
-
-    if not proportions:
+    # Videos with any wildlife per wildlife proportion bin, the same cached statistics served by /api/stats
+    counts = STATS_CACHE.get(get_generation()).wildlife_prop_histogram
+    if not any(counts):
         print("No videos with wildlife proportions found in database")
         return
 
@@ -26,9 +25,11 @@ def run() -> None:
     fig.patch.set_facecolor("#0b0c10")
     ax.set_facecolor("#0b0c10")
 
-    # Create horizontal histogram
-    bins = np.linspace(0, 1, 21).tolist()  # 20 bins from 0 to 1
-    n, bins, patches = ax.hist(proportions, bins=bins, orientation="horizontal", edgecolor="#e6e6e6", alpha=0.8)
+    # Create horizontal histogram from the precomputed bin counts
+    bins = np.linspace(0, 1, len(counts) + 1).tolist()
+    n, bins, patches = ax.hist(
+        bins[:-1], bins=bins, weights=counts, orientation="horizontal", edgecolor="#e6e6e6", alpha=0.8
+    )
 
     # Color bars based on proportion value - gradient from grey to green
     for i, patch in enumerate(patches):  # type: ignore[arg-type]
@@ -0,0 +1,90 @@
+"""Compare inference throughput of per-video batches against batches packed across videos."""
+
+import argparse
+import time
+from collections.abc import Callable
+from typing import Any
+
+from ingest_data import decode_task, infer_batch
+
+from garden_eye.api.database import VideoFile, init_database
+from garden_eye.frames import FrameChunk, decode_chunks
+from garden_eye.log import get_logger
+from garden_eye.pipeline import InferenceBatcher
+
+logger = get_logger(__name__)
+
+# Inference over a list of frames, returning one result per frame
+InferFn = Callable[[list[Any]], list[Any]]
+
+
+def per_video(chunks: list[FrameChunk], infer: InferFn, batch_size: int) -> InferenceBatcher[FrameChunk, Any, Any]:
+    """
+    Run inference the way annotate() does, flushing each video's final partial batch.
+
+    Args:
+        chunks: Decoded chunks of every video, each video's chunks in order
+        infer: Inference function
+        batch_size: Frames per batch
+
+    Returns:
+        The batcher used, for its batch statistics
+    """
+    batcher: InferenceBatcher[FrameChunk, Any, Any] = InferenceBatcher(infer, batch_size)
+    for chunk in chunks:
+        batcher.add(chunk, list(chunk.frames))
+        if chunk.last:
+            batcher.flush()
+    return batcher
+
+
+def cross_video(chunks: list[FrameChunk], infer: InferFn, batch_size: int) -> InferenceBatcher[FrameChunk, Any, Any]:
+    """
+    Run inference the way run_pipeline() does, packing frames of consecutive videos into shared batches.
+
+    Args:
+        chunks: Decoded chunks of every video, each video's chunks in order
+        infer: Inference function
+        batch_size: Frames per batch
+
+    Returns:
+        The batcher used, for its batch statistics
+    """
+    batcher: InferenceBatcher[FrameChunk, Any, Any] = InferenceBatcher(infer, batch_size)
+    for chunk in chunks:
+        batcher.add(chunk, list(chunk.frames))
+    batcher.flush()
+    return batcher
+
+
+def run() -> None:
+    """Decode a sample of videos once, then time inference over them with both batching strategies."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--videos", type=int, default=10, help="Videos to sample; their decoded frames are held in memory"
+    )
+    parser.add_argument("--batch-frames", type=int, default=64, help="Frames per inference batch")
+    args = parser.parse_args()
+
+    init_database()
+    video_files = list(VideoFile.select().order_by(VideoFile.path).limit(args.videos))
+    # Decoding happens up front so only inference is timed
+    chunks = [chunk for vf in video_files for chunk in decode_chunks(decode_task(vf))]
+    frames = sum(len(chunk.frames) for chunk in chunks)
+    logger.info(f"Decoded {frames} frames from {len(video_files)} videos")
+    # Warm up the model so neither strategy pays its start-up cost
+    infer_batch([chunks[0].frames[0]] if frames else [])
+
+    strategies = {"per-video": per_video, "cross-video": cross_video}
+    for name, strategy in strategies.items():
+        start = time.perf_counter()
+        batcher = strategy(chunks, infer_batch, args.batch_frames)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"{name:>11}: {frames / elapsed:.1f} frames/s, {batcher.batches} batches, "
+            f"{batcher.mean_fill:.0%} full on average"
+        )
+
+
+if __name__ == "__main__":
+    run()
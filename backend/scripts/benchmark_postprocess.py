@@ -0,0 +1,127 @@
+"""Compare per-box detection post-processing and ORM inserts against the vectorised path, on a synthetic clip."""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import torch
+from ingest_data import extract_detections
+from peewee import chunked
+from ultralytics.engine.results import Boxes
+
+from garden_eye.api.database import Annotation, VideoFile, init_database, insert_annotation_rows
+from garden_eye.detections import DetectionArrays
+from garden_eye.log import get_logger
+
+logger = get_logger(__name__)
+
+# A few COCO classes, enough to label the synthetic boxes
+NAMES = {0: "person", 14: "bird", 15: "cat", 16: "dog", 56: "chair"}
+
+
+def synthetic_results(frames: int, boxes_per_frame: int) -> list[Any]:
+    """
+    Build stand-ins for ultralytics Results with many boxes on every frame.
+
+    Args:
+        frames: Number of frames in the clip
+        boxes_per_frame: Detections on each frame
+
+    Returns:
+        One object per frame with real ultralytics `boxes` and `names`
+    """
+    generator = torch.Generator().manual_seed(0)
+    class_ids = torch.tensor(list(NAMES), dtype=torch.float32)
+    results = []
+    for _ in range(frames):
+        xy = torch.rand(boxes_per_frame, 2, generator=generator) * 1200
+        data = torch.cat(
+            [
+                xy,
+                xy + 40,
+                torch.rand(boxes_per_frame, 1, generator=generator),
+                class_ids[torch.randint(len(NAMES), (boxes_per_frame, 1), generator=generator)],
+            ],
+            dim=1,
+        )
+        results.append(SimpleNamespace(boxes=Boxes(data, orig_shape=(720, 1280)), names=NAMES))
+    return results
+
+
+def legacy_store(video_id: int, results: list[Any]) -> None:
+    """
+    Post-process and insert detections the way ingestion did before: per-box copies and per-row dicts.
+
+    Args:
+        video_id: VideoFile to attach annotations to
+        results: Per-frame results
+    """
+    rows = []
+    for frame_idx, result in enumerate(results):
+        for box in result.boxes:
+            class_id = int(box.cls[0].cpu().numpy())
+            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+            rows.append(
+                {
+                    "video_file": video_id,
+                    "frame_idx": frame_idx,
+                    "name": result.names[class_id],
+                    "class_id": class_id,
+                    "confidence": float(box.conf[0].cpu().numpy()),
+                    "x1": float(x1),
+                    "y1": float(y1),
+                    "x2": float(x2),
+                    "y2": float(y2),
+                }
+            )
+    for batch in chunked(rows, 50):
+        Annotation.insert_many(batch).execute()
+
+
+def vectorised_store(video_id: int, results: list[Any]) -> None:
+    """
+    Post-process and insert detections with whole-frame tensor copies and executemany inserts.
+
+    Args:
+        video_id: VideoFile to attach annotations to
+        results: Per-frame results
+    """
+    detections = DetectionArrays.concatenate(
+        extract_detections(result, frame_idx) for frame_idx, result in enumerate(results)
+    )
+    insert_annotation_rows(video_id, detections)
+
+
+def run() -> None:
+    """Time both post-processing paths on the same synthetic clip and log the speedup."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=900, help="Frames in the synthetic clip")
+    parser.add_argument("--boxes", type=int, default=30, help="Detections per frame")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per implementation, the best is reported")
+    args = parser.parse_args()
+
+    results = synthetic_results(args.frames, args.boxes)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = init_database(Path(tmp_dir) / "benchmark.db")
+        video = VideoFile.create(path=Path(tmp_dir) / "synthetic.MP4", size=0, modified=0.0)
+        timings = {}
+        for name, store in {"legacy": legacy_store, "vectorised": vectorised_store}.items():
+            best = float("inf")
+            for _ in range(args.repeats):
+                Annotation.delete().execute()
+                start = time.perf_counter()
+                with db.atomic():
+                    store(video.get_id(), results)
+                best = min(best, time.perf_counter() - start)
+                assert Annotation.select().count() == args.frames * args.boxes
+            timings[name] = best
+            logger.info(f"{name:>10}: {args.frames * args.boxes / best:,.0f} detections/s")
+        logger.info(f"Speedup: {timings['legacy'] / timings['vectorised']:.1f}x")
+        db.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,104 @@
+"""Compare video streaming throughput of the legacy generator against the memory-mapped FileRangeResponse."""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Message
+
+from garden_eye.api.range_stream import CHUNK_SIZE, FileRangeResponse
+from garden_eye.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def legacy_response(path: Path, chunk_size: int) -> Response:
+    """
+    Build a response the way range_stream did before FileRangeResponse: a sync generator of read() chunks.
+
+    Args:
+        path: File to send
+        chunk_size: Bytes per read
+
+    Returns:
+        StreamingResponse over the whole file
+    """
+
+    def file_iterator() -> Iterator[bytes]:
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    return StreamingResponse(file_iterator(), media_type="video/mp4")
+
+
+async def drain(make_response: Callable[[], Response], concurrency: int, chunk_size: int) -> int:
+    """
+    Send responses to several concurrent fake clients that copy each body chunk out, as a socket write would.
+
+    Args:
+        make_response: Builds a fresh response for each client
+        concurrency: Number of simultaneous clients
+        chunk_size: Largest body chunk that will be sent
+
+    Returns:
+        Total body bytes received across all clients
+    """
+    received = 0
+    never = asyncio.Event()
+    scratch = memoryview(bytearray(chunk_size))
+
+    async def receive() -> Message:
+        await never.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        nonlocal received
+        body = message.get("body", b"")
+        scratch[: len(body)] = body
+        received += len(body)
+
+    scope = {"type": "http", "method": "GET", "asgi": {"spec_version": "2.4"}, "extensions": {}}
+    await asyncio.gather(*(make_response()(scope, receive, send) for _ in range(concurrency)))
+    return received
+
+
+def run() -> None:
+    """Benchmark both streaming implementations and log throughput."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", type=Path, help="Video to stream; a random temporary file is used if omitted")
+    parser.add_argument("--size-mib", type=int, default=256, help="Size of the temporary file")
+    parser.add_argument("--chunk-kib", type=int, default=CHUNK_SIZE // 1024, help="Chunk size for both paths")
+    parser.add_argument("--concurrency", type=int, default=8, help="Simultaneous clients")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per implementation, the best is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = args.path
+        if path is None:
+            path = Path(tmp_dir) / "benchmark.mp4"
+            path.write_bytes(os.urandom(args.size_mib * 1024 * 1024))
+        file_size = path.stat().st_size
+        chunk_size = args.chunk_kib * 1024
+        factories = {
+            "generator": lambda: legacy_response(path, chunk_size),
+            "mmap": lambda: FileRangeResponse(path, 0, file_size - 1, chunk_size=chunk_size),
+        }
+        for name, factory in factories.items():
+            best = float("inf")
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                received = asyncio.run(drain(factory, args.concurrency, chunk_size))
+                best = min(best, time.perf_counter() - start)
+                assert received == file_size * args.concurrency
+            throughput = file_size * args.concurrency / best / 1024**2
+            logger.info(f"{name:>9}: {throughput:,.0f} MB/s ({args.concurrency} clients, {args.chunk_kib} KiB chunks)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,24 @@
+"""Rebuild every thumbnail sprite sheet from the thumbnails on disk."""
+
+from tqdm import tqdm
+
+from garden_eye.api.database import VideoFile, bump_generation, init_database
+from garden_eye.api.sprites import build_sprite_page, list_sprite_pages, sprite_page
+from garden_eye.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def run() -> None:
+    """Build the sprite page of every video, and remove pages that no longer hold any thumbnail."""
+    init_database()
+    video_ids = [video_id for (video_id,) in VideoFile.select(VideoFile.id).tuples()]
+    pages = sorted({sprite_page(video_id) for video_id in video_ids} | set(list_sprite_pages()))
+    logger.info(f"Building {len(pages)} thumbnail sprite pages")
+    for page in tqdm(pages, desc="Building sprites"):
+        build_sprite_page(page)
+    bump_generation()
+
+
+if __name__ == "__main__":
+    run()
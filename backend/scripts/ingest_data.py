@@ -1,130 +1,514 @@
 """Data ingestion pipeline for video processing and annotation."""
 
+import argparse
+import functools
 import logging
 import os
 import shutil
 import subprocess
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
 
+import numpy as np
+import numpy.typing as npt
 import torch
-from peewee import chunked
+from PIL import Image
 from tqdm import tqdm
 from ultralytics import YOLO
 
-from garden_eye import RAW_DIR, WEIGHTS_DIR
-from garden_eye.api.database import Annotation, VideoFile, get_thumbnail_path, init_database
-from garden_eye.helpers import is_night_video, is_target_coco_annotation
+from garden_eye import CONFIG, WEIGHTS_DIR
+from garden_eye.api.database import VideoFile, bump_generation, get_thumbnail_path, init_database
+from garden_eye.api.sprites import TILE_HEIGHT, TILE_WIDTH, build_sprite_pages
+from garden_eye.detections import DetectionArrays
+from garden_eye.frames import DecodeTask, FrameChunk, decode_chunks
+from garden_eye.helpers import is_night_frame, is_night_video, is_target_coco_annotation
+from garden_eye.jobs import (
+    advance,
+    backfill_jobs,
+    fail_job,
+    finish_run,
+    get_stages,
+    has_reached,
+    record_annotation,
+    select_incomplete,
+    start_run,
+)
 from garden_eye.log import get_logger
+from garden_eye.pipeline import InferenceBatcher, ProcessStage, ThreadStage, ThroughputMeter
+from garden_eye.probe import probe_library
+from garden_eye.scanner import scan_library
 
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 MODEL_NAME = "yolo11m.pt"
-MODEL = YOLO(WEIGHTS_DIR / MODEL_NAME)
 
 
 logger = get_logger(__name__)
 
 
-def run() -> None:
-    """Execute the full data ingestion pipeline."""
+@functools.cache
+def get_model() -> YOLO:
+    """Load the detection model on first use, so decode worker processes never load it."""
+    # Keep ultralytics' per-call warnings out of the progress output
+    logging.getLogger("ultralytics").setLevel(logging.ERROR)
+    return YOLO(WEIGHTS_DIR / MODEL_NAME)
+
+
+@dataclass
+class FrameCounts:
+    """Running frame totals for one video, from which its wildlife proportion is computed."""
+
+    frames: int = 0  # Number of sampled frames, including those held by the motion gate
+    wildlife_frames: int = 0  # Number of those frames with a target wildlife detection
+
+    def add(self, frame: DetectionArrays) -> None:
+        """
+        Count one sampled frame.
+
+        Args:
+            frame: The frame's detections
+        """
+        self.frames += 1
+        if any(is_target_coco_annotation(name) for name in frame.names.values()):
+            self.wildlife_frames += 1
+
+    @property
+    def wildlife_prop(self) -> float:
+        """Proportion of sampled frames containing wildlife."""
+        return self.wildlife_frames / self.frames if self.frames else 0.0
+
+
+@dataclass
+class ChunkAnnotator:
+    """Runs detection over one video's frame chunks in order, filling in frames held by the motion gate."""
+
+    counts: FrameCounts = field(default_factory=FrameCounts)
+    # Detections on the last frame the model ran on
+    previous: DetectionArrays = field(default_factory=DetectionArrays.empty)
+    thumbnail: npt.NDArray[np.uint8] | None = None  # Latest thumbnail frame captured by the decoder
+
+    def annotate(self, chunk: FrameChunk, results: Iterable[Any]) -> DetectionArrays:
+        """
+        Turn the model's results for a chunk into detections.
+
+        Args:
+            chunk: Next chunk of the video
+            results: One ultralytics Results object per frame in `chunk.frames`
+
+        Returns:
+            The chunk's detections, where held frames repeat those of the last frame detection ran on
+        """
+        if chunk.thumbnail is not None:
+            self.thumbnail = chunk.thumbnail
+        results = iter(results)
+        frames = []
+        for frame_idx, held in zip(chunk.frame_idx.tolist(), chunk.held.tolist(), strict=True):
+            if held:
+                frame = self.previous.at_frame(frame_idx)
+            else:
+                frame = self.previous = extract_detections(next(results), frame_idx, chunk.scale)
+            self.counts.add(frame)
+            frames.append(frame)
+        return DetectionArrays.concatenate(frames)
+
+
+@dataclass(frozen=True)
+class AnnotationResult:
+    """Detections for a fully processed video, ready to be written to the database."""
+
+    video_file: VideoFile
+    detections: list[DetectionArrays]  # Consecutive windows of the video's detections
+    counts: FrameCounts
+
+
+@dataclass(frozen=True)
+class FailedVideo:
+    """A video whose ingestion failed, to be recorded so later runs skip it."""
+
+    video_file: VideoFile
+    error: str
+
+
+@dataclass(frozen=True)
+class ThumbnailResult:
+    """Outcome of generating and classifying a video's thumbnail."""
+
+    video_file: VideoFile
+    created: bool  # Whether a new thumbnail was written
+    is_night: bool
+    classified: bool  # Whether is_night was read from the thumbnail, which only fails if there is no thumbnail
+
+
+def run(sequential: bool = False, full: bool = False, watch: bool = False) -> None:
+    """
+    Execute the full data ingestion pipeline.
+
+    Args:
+        sequential: Process one video at a time instead of running the pipelined stages
+        full: On the first pass, list every directory and check every video's thumbnail, not just queued videos
+        watch: Keep running, rescanning the library every `ingest.watch_interval_s` seconds
+    """
     # Setup database
     init_database()
-    # Load files into database
-    add_files()
-    # Annotate and create thumbnails for all files
-    for vf in tqdm(VideoFile.select().order_by(VideoFile.path), desc="Ingesting files"):
-        annotate(vf)
-        create_thumbnail(vf)
+    while True:
+        try:
+            ingest(sequential, full)
+        except Exception:
+            if not watch:
+                raise
+            # Videos that failed on their own are already recorded, so whatever went wrong is retried on the next scan
+            logger.exception("Ingestion failed, retrying at the next scan")
+        if not watch:
+            return
+        full = False
+        time.sleep(CONFIG.ingest.watch_interval_s)
 
 
-def add_files() -> None:
-    """Discover and add new video files from data directory to database."""
-    logger.info("Adding files...")
-    data = []
-    for path in RAW_DIR.glob("**/*.MP4"):
-        st = path.stat()
-        data.append({"path": path, "size": st.st_size, "modified": st.st_mtime})
-    result = VideoFile.insert_many(data).on_conflict_ignore().execute()
-    logger.info(f"Added {result} new video files to database")
+def ingest(sequential: bool = False, full: bool = False) -> None:
+    """
+    Scan the library for changes, then run the outstanding stages of every video that needs them.
 
+    Each video's stages are committed as they complete, so an interrupted run resumes from the last committed stage
+    of each video rather than starting again.
 
-def annotate(video_file: VideoFile) -> None:
+    Args:
+        sequential: Process one video at a time instead of running the pipelined stages
+        full: List every directory and check every video's thumbnail, not just queued videos
+    """
+    # Sync the database with the files on disk
+    scan = scan_library(full=full)
+    logger.info(f"Scanned library: {scan}")
+    if backfilled := backfill_jobs():
+        logger.info(f"Recorded ingestion state for {backfilled} previously ingested videos")
+    # Stream metadata comes from container headers, so it is cheap enough to read for every video that lacks it
+    if probed := probe_library():
+        logger.info(f"Read stream metadata of {probed} videos")
+    ingest_run = start_run()
+    video_files = list(VideoFile.select().order_by(VideoFile.path) if full else select_incomplete())
+    stages = get_stages(vf.id for vf in video_files)
+    new_thumbnails: list[int] = []
+    status = "failed"
+    try:
+        if sequential:
+            ingest_sequential(video_files, stages, new_thumbnails)
+        elif video_files:
+            try:
+                run_pipeline(video_files, stages, new_thumbnails)
+            except Exception:
+                # Videos that fail on their own are skipped inside the pipeline, so this is a failure of a shared
+                # stage, e.g. inference or a decode worker that died; the videos still outstanding are retried one at
+                # a time, so any video behind it is found and skipped
+                logger.exception("Ingestion pipeline failed, retrying remaining videos one at a time")
+                remaining = list(select_incomplete())
+                ingest_sequential(remaining, get_stages(vf.id for vf in remaining), new_thumbnails)
+        status = "completed"
+    except KeyboardInterrupt:
+        status = "interrupted"
+        raise
+    finally:
+        # Pack new thumbnails into the sprite sheets used by the video grid, and drop those of removed videos and of
+        # changed videos, whose old thumbnail the scan deleted, even if a new one couldn't be made; this also runs
+        # after an interruption, as neither the thumbnails made so far nor the scan's changes are seen again
+        if stale_tiles := new_thumbnails + scan.changed + scan.removed:
+            pages = build_sprite_pages(stale_tiles)
+            bump_generation()
+            logger.info(f"Rebuilt {len(pages)} thumbnail sprite pages")
+        finish_run(ingest_run, status)
+
+
+def ingest_sequential(video_files: list[Any], stages: dict[int, str], new_thumbnails: list[int]) -> None:
+    """
+    Annotate and thumbnail videos one at a time, recording the failure of any video that can't be ingested.
+
+    Args:
+        video_files: VideoFile instances to ingest; those already annotated only have their thumbnail checked
+        stages: Last completed ingestion stage of each video
+        new_thumbnails: Appended with the id of each video given a new thumbnail
+    """
+    for vf in tqdm(video_files, desc="Ingesting files"):
+        try:
+            frame = annotate(vf) if not has_reached(stages[vf.id], "annotated") else None
+            if create_thumbnail(vf, frame):
+                new_thumbnails.append(vf.id)
+        except Exception as e:
+            logger.exception(f"Failed to ingest {vf.path}, skipping it until the file changes")
+            fail_job(vf.id, repr(e))
+
+
+def run_pipeline(video_files: list[Any], stages: dict[int, str], new_thumbnails: list[int]) -> None:
+    """
+    Annotate and thumbnail videos with overlapping stages connected by bounded queues.
+
+    Worker processes decode and downscale frames, this process runs inference on their chunks so the model is
+    never waiting on decoding, thumbnail threads save the thumbnail frames the decoders captured, and a single
+    writer thread performs every database write. Each video is decoded once. Frames from consecutive chunks,
+    including those of different videos, are packed into full inference batches, so short clips don't each end
+    with a mostly empty batch. Stage parallelism is set by the `ingest` section of config.yaml. A video that fails
+    to decode, thumbnail or write is recorded as failed and skipped, while the others carry on.
+
+    Args:
+        video_files: VideoFile instances to ingest; those already annotated only have their thumbnail checked
+        stages: Last completed ingestion stage of each video
+        new_thumbnails: Appended with the id of each video given a new thumbnail, as soon as it is recorded, so it
+            is complete even if the run is interrupted
+    """
+    settings = CONFIG.ingest
+    pending = {vf.id: vf for vf in video_files if not has_reached(stages[vf.id], "annotated")}
+    tasks = [decode_task(vf) for vf in pending.values()]
+    # A clip that fails to decode is skipped, rather than failing the stage for every other video
+    decoder: ProcessStage[DecodeTask, FrameChunk | FailedVideo] = ProcessStage(
+        decode_chunks,
+        workers=settings.decode_workers,
+        queue_size=settings.queue_chunks,
+        on_error=lambda task, error: FailedVideo(pending[task.video_id], error),
+    )
+    meter = ThroughputMeter("Inference", interval_s=settings.log_interval_s)
+    batcher: InferenceBatcher[FrameChunk, Any, Any] = InferenceBatcher(infer_batch, settings.batch_frames)
+
+    def write(result: AnnotationResult | ThumbnailResult | FailedVideo) -> None:
+        if isinstance(result, FailedVideo):
+            fail_job(result.video_file.get_id(), result.error)
+            return
+        try:
+            if isinstance(result, AnnotationResult):
+                write_annotations(result)
+            elif apply_thumbnail(result):
+                new_thumbnails.append(result.video_file.get_id())
+        except Exception as e:
+            # A single video's write failing shouldn't stop the writer for every other video
+            logger.exception(f"Failed to record {result.video_file.path}, skipping it until the file changes")
+            fail_job(result.video_file.get_id(), repr(e))
+
+    with ThreadStage(write, name="db-writer") as writer:
+
+        def thumbnail(item: tuple[VideoFile, npt.NDArray[np.uint8] | None]) -> None:
+            result: ThumbnailResult | FailedVideo
+            try:
+                result = render_thumbnail(*item)
+            except Exception as e:
+                # e.g. ffmpeg failing on a corrupt clip, which shouldn't stop the other videos
+                logger.exception(f"Failed to create thumbnail for {item[0].path}, skipping it until the file changes")
+                result = FailedVideo(item[0], repr(e))
+            writer.put(result)
+
+        with ThreadStage(thumbnail, workers=settings.thumbnail_workers, name="thumbnail") as thumbnailer:
+            # Each chunk's detections are kept as compact arrays, not per-box tuples, until the video is complete
+            windows: dict[int, list[DetectionArrays]] = defaultdict(list)
+            annotators: dict[int, ChunkAnnotator] = defaultdict(ChunkAnnotator)
+            failed: set[int] = set()
+
+            def collect(chunk: FrameChunk, results: list[Any]) -> None:
+                if chunk.video_id in failed:
+                    return
+                windows[chunk.video_id].append(annotators[chunk.video_id].annotate(chunk, results))
+                # Throughput is measured in video frames, so sampling shows up as a speed-up
+                meter.add(chunk.end_frame - chunk.start_frame)
+                if chunk.last:
+                    vf = pending[chunk.video_id]
+                    annotator = annotators.pop(chunk.video_id)
+                    writer.put(AnnotationResult(vf, windows.pop(chunk.video_id), annotator.counts))
+                    thumbnailer.put((vf, annotator.thumbnail))
+
+            for item in tqdm(decoder.run(tasks), desc="Annotating chunks"):
+                if isinstance(item, FailedVideo):
+                    video_id = item.video_file.get_id()
+                    logger.error(
+                        f"Failed to decode {item.video_file.path}, skipping it until the file changes:\n{item.error}"
+                    )
+                    # Chunks decoded before the failure are dropped, including those still waiting in the batcher
+                    failed.add(video_id)
+                    windows.pop(video_id, None)
+                    annotators.pop(video_id, None)
+                    writer.put(item)
+                    continue
+                for done, results in batcher.add(item, list(item.frames)):
+                    collect(done, results)
+            for done, results in batcher.flush():
+                collect(done, results)
+            for vf in video_files:
+                if vf.id not in pending:
+                    thumbnailer.put((vf, None))
+    if pending:
+        logger.info(meter.summary())
+        logger.info(f"Ran {batcher.batches} inference batches, {batcher.mean_fill:.0%} full on average")
+
+
+def decode_task(video_file: VideoFile) -> DecodeTask:
+    """
+    Describe how to decode a video for annotation, using the `ingest` section of config.yaml.
+
+    Args:
+        video_file: VideoFile instance to decode
+
+    Returns:
+        DecodeTask for the video
+    """
+    settings = CONFIG.ingest
+    return DecodeTask(
+        video_file.get_id(),
+        video_file.path,  # type: ignore[arg-type]
+        settings.batch_frames,
+        settings.max_decode_width,
+        frame_stride=settings.frame_stride,
+        motion_threshold=settings.motion_threshold,
+        thumbnail_size=(TILE_WIDTH, TILE_HEIGHT),
+    )
+
+
+def infer(source: Any, **kwargs: Any) -> Iterator[Any]:
+    """
+    Run the detection model.
+
+    Args:
+        source: Video path or list of BGR frames
+        kwargs: Extra arguments for the model call
+
+    Returns:
+        Iterator over one ultralytics Results object per frame
+    """
+    yield from get_model()(source, verbose=False, device=DEVICE, **kwargs)
+
+
+def infer_batch(frames: list[Any]) -> list[Any]:
+    """
+    Run the detection model on a batch of frames.
+
+    Args:
+        frames: BGR frames, possibly from different videos
+
+    Returns:
+        One ultralytics Results object per frame
+    """
+    return list(infer(frames)) if frames else []
+
+
+def extract_detections(result: Any, frame_idx: int, scale: tuple[float, float] = (1.0, 1.0)) -> DetectionArrays:
+    """
+    Convert one frame's detection results into detection arrays.
+
+    Args:
+        result: ultralytics Results for the frame
+        frame_idx: Index of the frame in its video
+        scale: Multipliers mapping box x and y coordinates back to source video pixels
+
+    Returns:
+        The frame's detections in source video pixel coordinates
+    """
+    boxes = result.boxes
+    if boxes is None or not len(boxes):
+        return DetectionArrays.empty()
+    # One device-to-host copy per tensor for the whole frame, rather than three per box
+    class_id = boxes.cls.cpu().numpy().astype(np.int32)
+    scale_x, scale_y = scale
+    return DetectionArrays(
+        frame_idx=np.full(len(class_id), frame_idx, dtype=np.int32),
+        class_id=class_id,
+        confidence=boxes.conf.cpu().numpy().astype(np.float64),
+        boxes=boxes.xyxy.cpu().numpy().astype(np.float64) * np.array([scale_x, scale_y, scale_x, scale_y]),
+        names={class_id: result.names[class_id] for class_id in np.unique(class_id).tolist()},
+    )
+
+
+def annotate(video_file: VideoFile) -> npt.NDArray[np.uint8] | None:
     """
     Run YOLO object detection on video and store annotations.
 
     Args:
         video_file: VideoFile instance to process
+
+    Returns:
+        Thumbnail frame captured while decoding the video, or None if it was already annotated
     """
     # Skip if already annotated exists
     if video_file.annotated:
-        return
-    # Process video and collect annotations
-    annotations_data = []
-    # Use batch processing with optimized parameters for higher GPU utilization rather than `stream=True`
-    logging.disable(logging.WARNING)
-    results = MODEL(
-        str(video_file.path),
-        stream=False,
-        batch=64,
-        verbose=False,
-        workers=4,
-        device=DEVICE,
-    )
-    logging.disable(logging.NOTSET)
-
-    wildlife_frames = set()
-    for frame_idx, result in enumerate(results):
-        # Process detection results
-        if result.boxes is not None and len(result.boxes) > 0:
-            for box in result.boxes:
-                class_id = int(box.cls[0].cpu().numpy())
-                name = MODEL.names[class_id]
-                # Extract bounding box coordinates
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                confidence = float(box.conf[0].cpu().numpy())
-                # Add frame to set that contains wildlife
-                if is_target_coco_annotation(name):
-                    wildlife_frames.add(frame_idx)
-                # Collect
-                annotations_data.append(
-                    {
-                        "video_file": video_file.id,
-                        "frame_idx": frame_idx,
-                        "name": name,
-                        "class_id": class_id,
-                        "confidence": confidence,
-                        "x1": float(x1),
-                        "y1": float(y1),
-                        "x2": float(x2),
-                        "y2": float(y2),
-                    }
-                )
-    # Bulk insert annotations into database
-    if annotations_data:
-        with Annotation._meta.database.atomic():  # type: ignore[attr-defined]
-            for batch in chunked(annotations_data, 50):  # pick size based on column count
-                Annotation.insert_many(batch).execute()
-    # Add proportion of annotations that are wildlife matches
-    video_file.wildlife_prop = len(wildlife_frames) / len(results)  # type: ignore[assignment]
-    # Mark video as annotated (even if no detections were found)
-    video_file.annotated = True  # type: ignore[assignment]
-    video_file.save()
-
-
-def create_thumbnail(video_file: VideoFile, seconds: int = 1) -> None:
+        return None
+    annotator = ChunkAnnotator()
+    # Inference runs outside any transaction, so other writers aren't locked out for the whole clip; the compact
+    # windows are then written in one short transaction, so an interruption leaves no partial annotations behind
+    windows = list(stream_detections(video_file, annotator))
+    record_annotation(video_file, windows, annotator.counts.wildlife_prop)
+    return annotator.thumbnail
+
+
+def stream_detections(video_file: VideoFile, annotator: ChunkAnnotator) -> Iterator[DetectionArrays]:
+    """
+    Run detection over a video one decoded chunk at a time, so decoded frames don't accumulate over a long clip.
+
+    Frames are sampled as configured by `ingest.frame_stride` and `ingest.motion_threshold`, and each chunk's
+    frames are released once its detections have been extracted. Only the compact detection arrays are kept.
+
+    Args:
+        video_file: VideoFile instance to process
+        annotator: Fresh ChunkAnnotator, which collects the video's frame totals and thumbnail
+
+    Returns:
+        Iterator over the video's detections, one chunk at a time
+    """
+    for chunk in decode_chunks(decode_task(video_file)):
+        yield annotator.annotate(chunk, infer_batch(list(chunk.frames)))
+
+
+def write_annotations(result: AnnotationResult) -> None:
+    """
+    Store a video's detections and mark it annotated, in a single transaction.
+
+    Args:
+        result: Detections for the video
+    """
+    record_annotation(result.video_file, result.detections, result.counts.wildlife_prop)
+
+
+def create_thumbnail(video_file: VideoFile, frame: npt.NDArray[np.uint8] | None = None, seconds: int = 1) -> bool:
     """
     Generate thumbnail image and classify day/night mode for video.
 
     Args:
         video_file: VideoFile instance to process
-        seconds: Timestamp in seconds to extract thumbnail frame
+        frame: Thumbnail-sized BGR frame captured while annotating, if the video was decoded
+        seconds: Timestamp in seconds to extract thumbnail frame, if no frame is given
+
+    Returns:
+        True if a new thumbnail was written
+    """
+    return apply_thumbnail(render_thumbnail(video_file, frame, seconds))
+
+
+def render_thumbnail(
+    video_file: VideoFile, frame: npt.NDArray[np.uint8] | None = None, seconds: int = 1
+) -> ThumbnailResult:
+    """
+    Generate thumbnail image if missing and classify day/night mode, without touching the database.
+
+    A frame captured while decoding the video for annotation is saved and classified directly. Otherwise, ffmpeg
+    extracts the frame and the saved image is classified.
+
+    Args:
+        video_file: VideoFile instance to process
+        frame: Thumbnail-sized BGR frame captured while annotating, if the video was decoded
+        seconds: Timestamp in seconds to extract thumbnail frame, if no frame is given
+
+    Returns:
+        ThumbnailResult describing the thumbnail
     """
     thumbnail_path = get_thumbnail_path(video_file)
     # Generate thumbnail if it doesn't already exist
-    if not thumbnail_path.exists():
+    created = not thumbnail_path.exists()
+    # Thumbnails are written to a temporary file first, so an interruption never leaves a partial image
+    partial_path = thumbnail_path.with_name(f"{thumbnail_path.stem}.partial{thumbnail_path.suffix}")
+    if frame is not None:
+        if created:
+            thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
+            Image.fromarray(np.ascontiguousarray(frame[..., ::-1])).save(partial_path, format="JPEG", quality=90)
+            os.replace(partial_path, thumbnail_path)
+        return ThumbnailResult(video_file, created=created, is_night=is_night_frame(frame), classified=True)
+    if created:
         # Find ffmpeg executable
         ffmpeg_path = shutil.which("ffmpeg")
         if not ffmpeg_path:
             logger.error("ffmpeg not found in PATH")
-            return
+            return ThumbnailResult(video_file, created=False, is_night=bool(video_file.is_night), classified=False)
         # Create thumbnail with ffmpeg
         command = [
             ffmpeg_path,
@@ -137,14 +521,45 @@ def create_thumbnail(video_file: VideoFile, seconds: int = 1) -> None:
             "-q:v",
             "2",  # High quality
             "-s",
-            "280x157",  # Resize to card dimensions
-            os.fspath(thumbnail_path),
+            f"{TILE_WIDTH}x{TILE_HEIGHT}",  # Resize to card dimensions
+            "-y",  # Overwrite a partial file left by an earlier interruption
+            os.fspath(partial_path),
         ]
         subprocess.run(command, capture_output=True, text=True, check=True)
+        os.replace(partial_path, thumbnail_path)
     # Update whether this is a night video or not (requires thumbnail)
-    video_file.is_night = is_night_video(thumbnail_path)  # type: ignore[assignment]
-    video_file.save()
+    return ThumbnailResult(video_file, created=created, is_night=is_night_video(thumbnail_path), classified=True)
+
+
+def apply_thumbnail(result: ThumbnailResult) -> bool:
+    """
+    Record a thumbnail's day/night classification and advance the video's ingestion job.
+
+    Args:
+        result: Outcome of render_thumbnail
+
+    Returns:
+        True if a new thumbnail was written
+    """
+    video_file = result.video_file
+    night_changed = result.is_night != video_file.is_night
+    with VideoFile._meta.database.atomic():  # type: ignore[attr-defined]
+        if night_changed:
+            video_file.is_night = result.is_night  # type: ignore[assignment]
+            video_file.save(only=[VideoFile.is_night])
+        if result.classified:
+            advance(video_file.get_id(), "thumbnailed")
+            advance(video_file.get_id(), "classified")
+    # A new generation also tells the API server to re-check its cached copy of this thumbnail
+    if result.created or night_changed:
+        bump_generation()
+    return result.created
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Ingest videos from the data directory")
+    parser.add_argument("--sequential", action="store_true", help="Process one video at a time, without pipelining")
+    parser.add_argument("--full", action="store_true", help="Check every file and thumbnail, ignoring the scan cache")
+    parser.add_argument("--watch", action="store_true", help="Keep running, ingesting new footage as it arrives")
+    args = parser.parse_args()
+    run(sequential=args.sequential, full=args.full, watch=args.watch)
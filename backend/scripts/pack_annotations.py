@@ -0,0 +1,45 @@
+"""Migrate annotations stored one row per box into packed per-video blobs."""
+
+from peewee import fn
+from tqdm import tqdm
+
+from garden_eye.api.database import (
+    Annotation,
+    VideoFile,
+    bump_generation,
+    init_database,
+    store_detections,
+)
+from garden_eye.detections import DetectionArrays
+from garden_eye.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def run() -> None:
+    """Convert every video's annotation rows into a PackedAnnotation blob, then reclaim the freed space."""
+    db = init_database()
+    video_ids = [video_id for (video_id,) in Annotation.select(fn.DISTINCT(Annotation.video_file)).tuples()]
+    logger.info(f"Packing annotations for {len(video_ids)} videos")
+    for video_id in tqdm(video_ids, desc="Packing annotations"):
+        video_file = VideoFile.get_by_id(video_id)
+        query = Annotation.select(
+            Annotation.frame_idx,
+            Annotation.class_id,
+            Annotation.name,
+            Annotation.confidence,
+            Annotation.x1,
+            Annotation.y1,
+            Annotation.x2,
+            Annotation.y2,
+        ).where(Annotation.video_file == video_file)
+        # Replaces the rows with the blob in a single transaction, so an interrupted run can simply be restarted
+        store_detections(video_file, DetectionArrays.from_rows(query.tuples()), storage="packed")
+    if video_ids:
+        bump_generation()
+        logger.info("Vacuuming database")
+        db.execute_sql("VACUUM")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,31 @@
+"""Regenerate the detection summary, activity timelines and sighting index from the stored annotations."""
+
+from garden_eye.api.database import (
+    DetectionSummary,
+    Sighting,
+    bump_generation,
+    init_database,
+    rebuild_activity_timelines,
+    rebuild_detection_summary,
+    rebuild_sightings,
+)
+from garden_eye.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def run() -> None:
+    """Recompute everything derived from every video's detections, e.g. after editing annotations by hand."""
+    init_database()
+    rebuild_detection_summary()
+    rebuild_activity_timelines()
+    rebuild_sightings()
+    bump_generation()
+    logger.info(
+        f"Rebuilt {DetectionSummary.select().count()} detection summary rows, the activity timelines and "
+        f"{Sighting.select().count()} sightings"
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,192 @@
+"""Conditional requests and compression for catalogue API responses."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from garden_eye.api.database import get_generation
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+# Path prefixes whose responses depend only on the URL and the catalogue generation
+CACHEABLE_PREFIXES = ("/api/videos", "/api/annotations/", "/api/sprites", "/api/stats")
+MIN_COMPRESS_SIZE = 1024  # Smaller bodies aren't worth the CPU or the extra header bytes
+
+
+def make_etag(generation: int, url: str, encoding: str | None) -> str:
+    """
+    Build a strong ETag for a JSON response.
+
+    Args:
+        generation: Catalogue generation the response was built from
+        url: Request path and query string, which select the representation
+        encoding: Content-Encoding of the response body, or None if uncompressed
+
+    Returns:
+        Quoted ETag header value
+    """
+    digest = hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
+    tag = f"g{generation}-{digest}"
+    # Strong validators must differ between differently encoded bodies
+    if encoding is not None:
+        tag += f"-{encoding}"
+    return f'"{tag}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Check whether an If-None-Match header matches an ETag.
+
+    Args:
+        if_none_match: If-None-Match request header value
+        etag: Current ETag of the resource
+
+    Returns:
+        True if the client's cached copy is still current
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """
+    Pick the best supported content coding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Accept-Encoding request header value
+
+    Returns:
+        "br", "gzip" or None for an uncompressed body
+    """
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a response body with the given content coding.
+
+    Args:
+        body: Uncompressed body
+        encoding: "br" or "gzip"
+
+    Returns:
+        Compressed body
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=5)  # type: ignore[no-any-return, union-attr]
+    return gzip.compress(body, compresslevel=6)
+
+
+class ConditionalJSONMiddleware:
+    """
+    Serve catalogue responses with generation-based ETags, 304 revalidation and JSON compression.
+
+    A matching If-None-Match is answered before the endpoint runs, so unchanged data is never re-queried or
+    re-serialised. Implemented as plain ASGI so that other routes, notably video streaming, pass through untouched
+    and keep access to server extensions such as zero-copy file sending.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Wrap an ASGI application.
+
+        Args:
+            app: Next application in the middleware chain
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle one ASGI connection."""
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith(CACHEABLE_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        # A database query, so it is kept off the event loop
+        generation = await run_in_threadpool(get_generation)
+        url = f"{scope['path']}?{scope['query_string'].decode('latin-1')}"
+        encoding = choose_encoding(request_headers.get("accept-encoding"))
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+        # Small bodies are sent uncompressed, so the client may hold the identity ETag even if it accepts compression
+        if_none_match = request_headers.get("if-none-match")
+        for candidate in dict.fromkeys([encoding, None]):
+            etag = make_etag(generation, url, candidate)
+            if etag_matches(if_none_match, etag):
+                await Response(status_code=304, headers={**headers, "ETag": etag})(scope, receive, send)
+                return
+
+        start_message: Message = {}
+        body = bytearray()
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal encoding, start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                response_headers = MutableHeaders(raw=list(message["headers"]))
+                # Errors and redirects are forwarded as they are
+                if message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+                # Files such as sprite sheets are already compressed, so they are sent unbuffered, which keeps
+                # extensions such as pathsend working, with only the validators added
+                elif not response_headers.get("content-type", "").startswith("application/json"):
+                    passthrough = True
+                    response_headers.update({**headers, "ETag": make_etag(generation, url, None)})
+                    await send({**message, "headers": response_headers.raw})
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+            body.extend(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            content = bytes(body)
+            response_headers = MutableHeaders(raw=list(start_message["headers"]))
+            if encoding is not None and len(content) >= MIN_COMPRESS_SIZE:
+                content = await run_in_threadpool(compress, content, encoding)
+                headers["Content-Encoding"] = encoding
+            else:
+                encoding = None
+            headers["ETag"] = make_etag(generation, url, encoding)
+
+            response_headers.update(headers)
+            response_headers["Content-Length"] = str(len(content))
+            await send({**start_message, "headers": response_headers.raw})
+            await send({"type": "http.response.body", "body": content})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,26 +1,49 @@
 """Database models and operations for GardenEye."""
 
+import heapq
+import itertools
 import os
+import sqlite3
+from collections import Counter
+from collections.abc import Collection, Iterable
+from dataclasses import asdict
 from pathlib import Path
+from typing import Any
 
+import numpy as np
 from peewee import (
+    SQL,
     AutoField,
+    BlobField,
     BooleanField,
     CharField,
     FloatField,
     ForeignKeyField,
     IntegerField,
     Model,
+    ModelSelect,
     SqliteDatabase,
+    chunked,
     fn,
 )
+from playhouse.migrate import SqliteMigrator, migrate
 
-from garden_eye import DATABASE_PATH, THUMBNAIL_DIR
-from garden_eye.helpers import is_target_coco_annotation
+from garden_eye import CONFIG, DATABASE_PATH, THUMBNAIL_DIR
+from garden_eye.config import DatabaseConfig
+from garden_eye.detections import DetectionArrays
+from garden_eye.helpers import WILDLIFE_COCO_LABELS
 from garden_eye.log import get_logger
+from garden_eye.sightings import SIGHTING_MAX_GAP, find_sightings
+from garden_eye.timeline import ActivityHistogram
+from garden_eye.tracking import Track, expand_tracks, track_detections
 
 logger = get_logger(__name__)
 
+# Object class names the API serves, for use in SQL filters
+TARGET_NAMES = list(WILDLIFE_COCO_LABELS.values())
+# Cap on bound variables per INSERT, SQLite's default limit since 3.32; larger statements are no faster
+MAX_INSERT_VARIABLES = 32766
+
 
 class PathField(CharField):
     """Custom Peewee field for storing pathlib.Path objects as strings."""
@@ -44,6 +67,15 @@ class VideoFile(Model):
     annotated = BooleanField(default=False)  # Whether annotations have been processed
     is_night = BooleanField(default=False)  # Whether this video is a night-time (black-and-white) recording
     wildlife_prop = FloatField(default=0)  # The proportion of frames that contain a wildlife annotation
+    # Detection ran on every Nth frame, see IngestConfig.frame_stride; the SQL default covers rows inserted by raw SQL
+    frame_stride = IntegerField(default=1, constraints=[SQL("DEFAULT 1")])
+    # Stream metadata read from the container header at ingest, see garden_eye.probe; null until probed
+    fps = FloatField(null=True)  # Average frame rate
+    frame_count = IntegerField(null=True)
+    duration = FloatField(null=True)  # Length in seconds
+    codec = CharField(null=True)  # ffprobe codec name, e.g. "h264"
+    width = IntegerField(null=True)  # Frame size in pixels
+    height = IntegerField(null=True)
 
 
 class Annotation(Model):
@@ -60,30 +92,200 @@ class Annotation(Model):
     y2 = FloatField()
 
 
-def init_database(db_path: Path = DATABASE_PATH) -> SqliteDatabase:
+class PackedAnnotation(Model):
+    """Database model for all of a video's annotations stored as one compressed, array-backed blob."""
+
+    video_file = ForeignKeyField(VideoFile, backref="packed_annotations", unique=True)
+    data = BlobField()  # DetectionArrays.to_blob() of every detection in the video
+
+
+class AnnotationTrack(Model):
+    """Database model for one object followed across a video's frames, stored as keyframes interpolated on read."""
+
+    video_file = ForeignKeyField(VideoFile, backref="tracks")
+    name = CharField()  # Object class name (e.g., "fox")
+    class_id = IntegerField()  # Numeric class ID
+    start_frame = IntegerField()  # First frame the object was detected on
+    end_frame = IntegerField()  # Last frame the object was detected on (inclusive)
+    peak_confidence = FloatField()
+    keyframes = BlobField()  # Track.to_blob() of the keyframes its boxes are interpolated from
+
+
+class DetectionSummary(Model):
+    """Database model for precomputed per-video, per-class detection statistics."""
+
+    video_file = ForeignKeyField(VideoFile, backref="detection_summaries")
+    name = CharField()  # Object class name (e.g., "dog")
+    box_count = IntegerField()  # Number of annotations of this class in the video
+    frame_count = IntegerField(default=0)  # Number of frames with at least one annotation of this class
+    max_confidence = FloatField(default=0.0)
+    mean_confidence = FloatField(default=0.0)
+    first_frame = IntegerField(default=0)  # Index of the first frame the class appears on
+    last_frame = IntegerField(default=0)  # Index of the last frame the class appears on
+    max_instances = IntegerField(default=0)  # Most annotations of this class on a single frame
+    track_count = IntegerField(null=True)  # Distinct tracked objects of this class, null unless stored as tracks
+
+
+class ActivityTimeline(Model):
+    """Database model for a video's precomputed activity histogram, drawn along the player's scrubber bar."""
+
+    video_file = ForeignKeyField(VideoFile, backref="activity_timelines", unique=True)
+    data = BlobField()  # ActivityHistogram.to_blob() of the video's target detections
+
+
+class Sighting(Model):
+    """Database model for the inverted sighting index: runs of frames in which a target class was detected."""
+
+    name = CharField()  # Object class name (e.g., "fox")
+    video_file = ForeignKeyField(VideoFile, backref="sightings")
+    start_frame = IntegerField()  # First frame with a detection
+    end_frame = IntegerField()  # Last frame with a detection (inclusive)
+    peak_confidence = FloatField()  # Highest confidence of any detection in the run
+
+
+class ScannedDirectory(Model):
+    """Database model for the directory listing cache used by the incremental library scanner."""
+
+    path = PathField(unique=True)  # Path
+    # Directory modification time when it was last listed, in nanoseconds, or null to list it again on the next scan
+    mtime_ns = IntegerField(null=True)
+
+
+class IngestRun(Model):
+    """Database model for one invocation of the ingestion script."""
+
+    id = AutoField()
+    started = FloatField()  # Unix time the run started
+    finished = FloatField(null=True)  # Unix time the run ended, null while running or if it was killed
+    status = CharField(default="running")  # "running", "completed", "interrupted" or "failed"
+    queued = IntegerField(default=0)  # Number of videos with unfinished stages when the run started
+    completed = IntegerField(default=0)  # Number of those videos that finished every stage during the run
+
+
+class IngestJob(Model):
+    """Database model for the ingestion progress of a single video."""
+
+    video_file = ForeignKeyField(VideoFile, backref="ingest_jobs", unique=True)
+    stage = CharField(default="scanned")  # Last completed stage, one of garden_eye.jobs.STAGES
+    updated = FloatField()  # Unix time the stage was reached
+    # Why the video's last attempt failed; failed jobs are skipped until the file changes or a full run retries them
+    error = CharField(null=True)
+
+
+class CatalogueVersion(Model):
+    """Database model for the single-row catalogue generation counter, bumped whenever ingestion changes data."""
+
+    id = AutoField()
+    generation = IntegerField(default=0)
+
+
+def init_database(db_path: Path = DATABASE_PATH, db_config: DatabaseConfig = CONFIG.database) -> SqliteDatabase:
     """
     Initialize and configure the SQLite database.
 
+    Connections are thread-local: each thread (e.g. a FastAPI threadpool worker) lazily opens its own connection on
+    first use and keeps it for reuse, and the pragmas are applied to every connection as it is opened.
+
     Args:
         db_path: Path to SQLite database file
+        db_config: Journal, cache and locking settings
 
     Returns:
         Configured and connected SqliteDatabase instance
     """
     logger.info(f"Initialising database with {db_path=}")
-    db = SqliteDatabase(db_path)
+    db = SqliteDatabase(
+        os.fspath(db_path),
+        pragmas={
+            "journal_mode": db_config.journal_mode,
+            "synchronous": db_config.synchronous,
+            "cache_size": -db_config.cache_size_mib * 1024,  # Negative values are in KiB
+            "mmap_size": db_config.mmap_size_mib * 1024 * 1024,
+            "temp_store": "memory",
+        },
+        timeout=db_config.busy_timeout_s,
+        thread_safe=True,
+        autoconnect=True,
+    )
     db.connect()
     # Add tables
-    db.bind([VideoFile, Annotation])
-    db.create_tables([VideoFile, Annotation])
+    models = [
+        VideoFile,
+        Annotation,
+        PackedAnnotation,
+        AnnotationTrack,
+        DetectionSummary,
+        ActivityTimeline,
+        Sighting,
+        ScannedDirectory,
+        IngestRun,
+        IngestJob,
+        CatalogueVersion,
+    ]
+    db.bind(models)
+    db.create_tables(models)
+    altered = add_missing_columns(db, [VideoFile, DetectionSummary, IngestJob])
+    CatalogueVersion.insert(id=1).on_conflict_ignore().execute()
     # Add indexes for better query performance
     db.execute_sql("CREATE INDEX IF NOT EXISTS idx_annotation_video_frame ON annotation (video_file_id, frame_idx)")
     db.execute_sql("CREATE INDEX IF NOT EXISTS idx_annotation_video_name ON annotation (video_file_id, name)")
     db.execute_sql("CREATE INDEX IF NOT EXISTS idx_annotation_confidence ON annotation (confidence)")
+    db.execute_sql(
+        "CREATE INDEX IF NOT EXISTS idx_annotationtrack_video_start ON annotationtrack (video_file_id, start_frame)"
+    )
+    db.execute_sql("CREATE INDEX IF NOT EXISTS idx_videofile_modified ON videofile (modified, id)")
+    db.execute_sql("CREATE INDEX IF NOT EXISTS idx_videofile_wildlife_prop ON videofile (wildlife_prop, id)")
+    db.execute_sql("CREATE INDEX IF NOT EXISTS idx_videofile_is_night ON videofile (is_night, modified)")
+    db.execute_sql(
+        "CREATE INDEX IF NOT EXISTS idx_detectionsummary_video_count "
+        "ON detectionsummary (video_file_id, box_count DESC)"
+    )
+    # Serves class lookups in sighting searches, already ranked by confidence
+    db.execute_sql("CREATE INDEX IF NOT EXISTS idx_sighting_name_confidence ON sighting (name, peak_confidence DESC)")
+    db.execute_sql("CREATE INDEX IF NOT EXISTS idx_sighting_video ON sighting (video_file_id)")
+    # Backfill summaries for databases annotated before the summary table, or some of its statistics, existed
+    has_annotations = (
+        Annotation.select().exists() or PackedAnnotation.select().exists() or AnnotationTrack.select().exists()
+    )
+    stale = not DetectionSummary.select().exists() or DetectionSummary in altered
+    if stale and has_annotations:
+        logger.info("Building detection summary from existing annotations")
+        rebuild_detection_summary()
+    if has_annotations and not ActivityTimeline.select().exists():
+        logger.info("Building activity timelines from existing annotations")
+        rebuild_activity_timelines()
+    if has_annotations and not Sighting.select().exists():
+        logger.info("Building sighting index from existing annotations")
+        rebuild_sightings()
     logger.info(f"Loaded database with {len(VideoFile)} files")
     return db
 
 
+def add_missing_columns(db: SqliteDatabase, models: Iterable[type[Model]]) -> list[type[Model]]:
+    """
+    Add columns for model fields that an existing table lacks, e.g. in a database created by an older version.
+
+    Args:
+        db: Connected database
+        models: Models whose tables may be missing columns; new fields must have a default or be nullable
+
+    Returns:
+        Models whose tables had columns added
+    """
+    migrator = SqliteMigrator(db)
+    altered = []
+    for model in models:
+        meta = model._meta  # type: ignore[attr-defined]
+        table = meta.table_name
+        existing = {column.name for column in db.get_columns(table)}
+        missing = [field for field in meta.sorted_fields if field.column_name not in existing]
+        if missing:
+            logger.info(f"Adding columns {[field.column_name for field in missing]} to {table}")
+            migrate(*(migrator.add_column(table, field.column_name, field) for field in missing))
+            altered.append(model)
+    return altered
+
+
 def get_video_objects(video_file: VideoFile, filter_person: bool = False) -> list[str]:
     """
     Get unique detected objects in a video, ordered by frequency.
@@ -95,27 +297,560 @@ def get_video_objects(video_file: VideoFile, filter_person: bool = False) -> lis
     Returns:
         List of object names ordered by detection frequency
     """
-    # Use SQL aggregation to count annotations by object name and sort by frequency
-    objs = (
-        Annotation.select(Annotation.name, fn.COUNT().alias("count"))
-        .where(Annotation.video_file == video_file)
-        .group_by(Annotation.name)
-        .order_by(fn.COUNT().desc())
-    )
-    obj_names = [obj.name for obj in objs if is_target_coco_annotation(obj.name)]
+    obj_names = get_objects_by_video([video_file.get_id()]).get(video_file.get_id(), [])
     if filter_person and obj_names == ["person"]:
         return []
     return obj_names
 
 
-def get_thumbnail_path(video_file: VideoFile) -> Path:
+def select_target_annotations(video_file: VideoFile, min_confidence: float | None = None) -> ModelSelect:
+    """
+    Build a query for a video's target annotations, filtered entirely in SQL.
+
+    Selects (frame_idx, class_id, name, confidence, x1, y1, x2, y2) so rows can be fetched with `.tuples()` without
+    constructing model instances. The video and label filters are served by the (video_file_id, name) index.
+
+    Args:
+        video_file: VideoFile instance to query
+        min_confidence: Optional minimum detection confidence (inclusive)
+
+    Returns:
+        Annotation query restricted to target labels and the confidence threshold
+    """
+    query = Annotation.select(
+        Annotation.frame_idx,
+        Annotation.class_id,
+        Annotation.name,
+        Annotation.confidence,
+        Annotation.x1,
+        Annotation.y1,
+        Annotation.x2,
+        Annotation.y2,
+    ).where((Annotation.video_file == video_file) & Annotation.name.in_(TARGET_NAMES))
+    if min_confidence is not None:
+        query = query.where(Annotation.confidence >= min_confidence)
+    return query
+
+
+def store_detections(
+    video_file: VideoFile,
+    detections: DetectionArrays | Iterable[DetectionArrays],
+    storage: str = CONFIG.annotation_storage,
+) -> None:
+    """
+    Replace a video's stored annotations.
+
+    Detections may be given as consecutive windows, e.g. one per decoded chunk, so callers can collect a clip's
+    compact detection arrays while inference runs and write them all here afterwards. Memory therefore grows with
+    the number of boxes in the clip, but not with its frames, which are released as each window is produced.
+
+    Args:
+        video_file: VideoFile instance the detections belong to
+        detections: Every detection in the video, including non-target classes, whole or as consecutive windows
+        storage: "rows" to insert one Annotation per box, "packed" to store a single PackedAnnotation blob, "tracks"
+            to link boxes across frames and store one AnnotationTrack per object
+    """
+    windows = [detections] if isinstance(detections, DetectionArrays) else detections
+    with Annotation._meta.database.atomic():  # type: ignore[attr-defined]
+        Annotation.delete().where(Annotation.video_file == video_file).execute()
+        PackedAnnotation.delete().where(PackedAnnotation.video_file == video_file).execute()
+        AnnotationTrack.delete().where(AnnotationTrack.video_file == video_file).execute()
+        if storage == "packed":
+            # A blob needs every detection, but the compact arrays are far smaller than the frames they came from
+            PackedAnnotation.create(video_file=video_file, data=DetectionArrays.concatenate(windows).to_blob())
+            return
+        if storage == "tracks":
+            # Sampled frames are frame_stride apart, so tracks must bridge at least that gap
+            max_gap = max(CONFIG.ingest.track_max_gap, video_file.frame_stride)  # type: ignore[call-overload]
+            tracks = track_detections(DetectionArrays.concatenate(windows), max_gap=max_gap)
+            insert_tracks(video_file.get_id(), tracks)
+            return
+        for window in windows:
+            insert_annotation_rows(video_file.get_id(), window)
+
+
+def insert_annotation_rows(video_id: int, detections: DetectionArrays) -> None:
+    """
+    Bulk insert detections as Annotation rows, bypassing the ORM's per-row processing.
+
+    Parameters for every row are laid out with NumPy in one flat list, and sent with `executemany` over a multi-row
+    INSERT holding as many rows as SQLite's variable limit allows.
+
+    Args:
+        video_id: Id of the VideoFile the detections belong to
+        detections: Detections to insert
+    """
+    if not len(detections):
+        return
+    fields = [
+        Annotation.video_file,
+        Annotation.frame_idx,
+        Annotation.name,
+        Annotation.class_id,
+        Annotation.confidence,
+        Annotation.x1,
+        Annotation.y1,
+        Annotation.x2,
+        Annotation.y2,
+    ]
+    names = np.empty(len(detections), dtype=object)
+    for class_id, name in detections.names.items():
+        names[detections.class_id == class_id] = name
+    # Columns are converted with tolist() so the driver receives Python ints and floats, not NumPy scalars
+    params = np.empty((len(detections), len(fields)), dtype=object)
+    params[:, 0] = video_id
+    params[:, 1] = detections.frame_idx.tolist()
+    params[:, 2] = names
+    params[:, 3] = detections.class_id.tolist()
+    params[:, 4] = detections.confidence.tolist()
+    params[:, 5:] = detections.boxes.tolist()
+    cursor = Annotation._meta.database.cursor()  # type: ignore[attr-defined]
+    limit = min(cursor.connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER), MAX_INSERT_VARIABLES)
+    rows_per_statement = max(limit // len(fields), 1)
+
+    def statement(rows: int) -> str:
+        # peewee renders the multi-row INSERT; the placeholder values it is given are discarded
+        sql, _ = Annotation.insert_many([[None] * len(fields)] * rows, fields=fields).sql()
+        return str(sql)
+
+    full = len(params) // rows_per_statement * rows_per_statement
+    if full:
+        batches = params[:full].reshape(-1, rows_per_statement * len(fields)).tolist()
+        cursor.executemany(statement(rows_per_statement), batches)
+    if full < len(params):
+        cursor.execute(statement(len(params) - full), params[full:].ravel().tolist())
+
+
+def insert_tracks(video_id: int, tracks: Iterable[Track]) -> None:
+    """
+    Insert tracks as AnnotationTrack rows.
+
+    Args:
+        video_id: Id of the VideoFile the tracks belong to
+        tracks: Tracks to insert
+    """
+    rows = [
+        {
+            "video_file": video_id,
+            "name": track.name,
+            "class_id": track.class_id,
+            "start_frame": track.start_frame,
+            "end_frame": track.end_frame,
+            "peak_confidence": track.peak_confidence,
+            "keyframes": track.to_blob(),
+        }
+        for track in tracks
+    ]
+    for batch in chunked(rows, 100):
+        AnnotationTrack.insert_many(batch).execute()
+
+
+def load_tracks(video_file: VideoFile | int, names: Collection[str] | None = None) -> list[Track]:
+    """
+    Load a video's tracks.
+
+    Args:
+        video_file: VideoFile instance or id to load
+        names: Optional object class names to keep
+
+    Returns:
+        Tracks ordered by start frame
+    """
+    query = AnnotationTrack.select().where(AnnotationTrack.video_file == video_file)
+    if names is not None:
+        query = query.where(AnnotationTrack.name.in_(names))
+    return [
+        Track.from_blob(row.class_id, row.name, row.keyframes, row.peak_confidence)
+        for row in query.order_by(AnnotationTrack.start_frame, AnnotationTrack.end_frame)
+    ]
+
+
+def delete_detections(video_ids: Iterable[int]) -> None:
+    """
+    Remove every stored detection of the given videos, and the summaries, timelines and sightings built from them.
+
+    Args:
+        video_ids: Ids of the videos to clear
+    """
+    with Annotation._meta.database.atomic():  # type: ignore[attr-defined]
+        for batch in chunked(video_ids, 500):
+            Annotation.delete().where(Annotation.video_file.in_(batch)).execute()
+            PackedAnnotation.delete().where(PackedAnnotation.video_file.in_(batch)).execute()
+            AnnotationTrack.delete().where(AnnotationTrack.video_file.in_(batch)).execute()
+            DetectionSummary.delete().where(DetectionSummary.video_file.in_(batch)).execute()
+            ActivityTimeline.delete().where(ActivityTimeline.video_file.in_(batch)).execute()
+            Sighting.delete().where(Sighting.video_file.in_(batch)).execute()
+
+
+def load_target_detections(video_file: VideoFile, min_confidence: float | None = None) -> DetectionArrays:
+    """
+    Load a video's target annotations from whichever storage mode holds them.
+
+    Args:
+        video_file: VideoFile instance to load
+        min_confidence: Optional minimum detection confidence (inclusive)
+
+    Returns:
+        Target detections sorted by frame index
+    """
+    packed = PackedAnnotation.get_or_none(PackedAnnotation.video_file == video_file)
+    if packed is not None:
+        return DetectionArrays.from_blob(packed.data).select(TARGET_NAMES, min_confidence)
+    tracks = load_tracks(video_file, TARGET_NAMES)
+    if tracks:
+        detections = expand_tracks(tracks, video_file.frame_stride)  # type: ignore[arg-type]
+        return detections.select(min_confidence=min_confidence)
+    return DetectionArrays.from_rows(select_target_annotations(video_file, min_confidence).tuples())
+
+
+def get_generation() -> int:
+    """
+    Get the current catalogue generation.
+
+    Returns:
+        Counter that changes whenever ingestion modifies videos or annotations
+    """
+    return CatalogueVersion.select(CatalogueVersion.generation).where(CatalogueVersion.id == 1).scalar() or 0
+
+
+def bump_generation() -> None:
+    """Increment the catalogue generation, invalidating anything cached against the previous one."""
+    CatalogueVersion.update(generation=CatalogueVersion.generation + 1).where(CatalogueVersion.id == 1).execute()
+
+
+def get_objects_by_video(video_ids: Iterable[int] | None = None) -> dict[int, list[str]]:
+    """
+    Get the target objects detected in each video, ordered by frequency, in a single query.
+
+    Reads from the precomputed detection summary, so the cost scales with the number of videos rather than the
+    number of annotations.
+
+    Args:
+        video_ids: Optional video ids to restrict the lookup to; all videos are included if None
+
+    Returns:
+        Mapping of video id to object names ordered by detection frequency; videos without detections are omitted
+    """
+    query = (
+        DetectionSummary.select(DetectionSummary.video_file, DetectionSummary.name)
+        .where(DetectionSummary.name.in_(TARGET_NAMES))
+        .order_by(DetectionSummary.video_file, DetectionSummary.box_count.desc(), DetectionSummary.name)
+    )
+    if video_ids is not None:
+        query = query.where(DetectionSummary.video_file.in_(list(video_ids)))
+    objects: dict[int, list[str]] = {}
+    for video_id, name in query.tuples():
+        objects.setdefault(video_id, []).append(name)
+    return objects
+
+
+def select_object_summaries(video_file: VideoFile | int) -> ModelSelect:
+    """
+    Build a query for a video's target object statistics, most frequent first.
+
+    Args:
+        video_file: VideoFile instance or video id
+
+    Returns:
+        DetectionSummary query with one row per target class detected in the video
+    """
+    return (
+        DetectionSummary.select()
+        .where((DetectionSummary.video_file == video_file) & DetectionSummary.name.in_(TARGET_NAMES))
+        .order_by(DetectionSummary.box_count.desc(), DetectionSummary.name)
+    )
+
+
+def filter_videos(
+    min_modified: float | None = None,
+    max_modified: float | None = None,
+    is_night: bool | None = None,
+    hide_empty: bool = False,
+    exclude_person: bool = False,
+    object_name: str | None = None,
+) -> ModelSelect:
+    """
+    Build a query over videos matching the catalogue filters.
+
+    Object based filters are resolved against the detection summary, so they never touch the annotation table.
+
+    Args:
+        min_modified: Earliest modification time to include (inclusive)
+        max_modified: Latest modification time to include (inclusive)
+        is_night: Only include night (True) or day (False) videos; both if None
+        hide_empty: Whether to exclude videos with no target object detections
+        exclude_person: Whether to exclude videos containing a "person" detection
+        object_name: Only include videos containing this object class
+
+    Returns:
+        Unordered VideoFile query with the filters applied
+    """
+    query = VideoFile.select()
+    if min_modified is not None:
+        query = query.where(VideoFile.modified >= min_modified)
+    if max_modified is not None:
+        query = query.where(VideoFile.modified <= max_modified)
+    if is_night is not None:
+        query = query.where(VideoFile.is_night == is_night)
+
+    def contains(*names: str) -> ModelSelect:
+        return DetectionSummary.select().where(
+            (DetectionSummary.video_file == VideoFile.id) & DetectionSummary.name.in_(list(names))
+        )
+
+    if hide_empty:
+        query = query.where(fn.EXISTS(contains(*TARGET_NAMES)))
+    if exclude_person:
+        query = query.where(~fn.EXISTS(contains("person")))
+    if object_name is not None:
+        query = query.where(fn.EXISTS(contains(object_name)))
+    return query
+
+
+# Statistics columns of the detection summary, in the order the summary queries select them
+SUMMARY_FIELDS = [
+    DetectionSummary.video_file,
+    DetectionSummary.name,
+    DetectionSummary.box_count,
+    DetectionSummary.frame_count,
+    DetectionSummary.max_confidence,
+    DetectionSummary.mean_confidence,
+    DetectionSummary.first_frame,
+    DetectionSummary.last_frame,
+    DetectionSummary.max_instances,
+]
+
+
+def _summary_source_query(video_file: VideoFile | None = None) -> ModelSelect:
+    """Build the aggregation of raw annotations that the detection summary is derived from, for one or all videos."""
+    # Annotations are first grouped by frame, so the outer query can count frames and find the busiest one
+    per_frame = Annotation.select(
+        Annotation.video_file,
+        Annotation.name,
+        Annotation.frame_idx,
+        fn.COUNT().alias("boxes"),
+        fn.MAX(Annotation.confidence).alias("max_confidence"),
+        fn.SUM(Annotation.confidence).alias("total_confidence"),
+    ).group_by(Annotation.video_file, Annotation.name, Annotation.frame_idx)
+    if video_file is not None:
+        per_frame = per_frame.where(Annotation.video_file == video_file)
+    frames = per_frame.alias("frames")
+    return (
+        Annotation.select(
+            frames.c.video_file_id,
+            frames.c.name,
+            fn.SUM(frames.c.boxes),
+            fn.COUNT(),
+            fn.MAX(frames.c.max_confidence),
+            fn.SUM(frames.c.total_confidence) / fn.SUM(frames.c.boxes),
+            fn.MIN(frames.c.frame_idx),
+            fn.MAX(frames.c.frame_idx),
+            fn.MAX(frames.c.boxes),
+        )
+        .from_(frames)
+        .group_by(frames.c.video_file_id, frames.c.name)
+    )
+
+
+def _packed_summary_rows(video_id: int, detections: DetectionArrays) -> list[dict[str, int | float | str]]:
+    """Build detection summary rows for packed detections."""
+    rows: list[dict[str, int | float | str]] = []
+    for class_id in np.unique(detections.class_id).tolist():
+        mask = detections.class_id == class_id
+        frames, instances = np.unique(detections.frame_idx[mask], return_counts=True)
+        confidence = detections.confidence[mask]
+        rows.append(
+            {
+                "video_file": video_id,
+                "name": detections.names[class_id],
+                "box_count": int(mask.sum()),
+                "frame_count": len(frames),
+                "max_confidence": float(confidence.max()),
+                "mean_confidence": float(confidence.mean()),
+                "first_frame": int(frames[0]),
+                "last_frame": int(frames[-1]),
+                "max_instances": int(instances.max()),
+            }
+        )
+    return rows
+
+
+def _track_summary_rows(video_file: VideoFile) -> list[dict[str, int | float | str]]:
+    """Build detection summary rows for a tracked video, from its interpolated boxes plus a count of its tracks."""
+    tracks = load_tracks(video_file)
+    rows = _packed_summary_rows(video_file.get_id(), expand_tracks(tracks, video_file.frame_stride))  # type: ignore[arg-type]
+    track_counts = Counter(track.name for track in tracks)
+    for row in rows:
+        row["track_count"] = track_counts[str(row["name"])]
+    return rows
+
+
+def refresh_detection_summary(video_file: VideoFile) -> None:
+    """
+    Recompute the detection summary rows for a single video from its annotations.
+
+    Args:
+        video_file: VideoFile instance whose summary should be refreshed
+    """
+    with DetectionSummary._meta.database.atomic():  # type: ignore[attr-defined]
+        DetectionSummary.delete().where(DetectionSummary.video_file == video_file).execute()
+        packed = PackedAnnotation.get_or_none(PackedAnnotation.video_file == video_file)
+        if packed is not None:
+            rows = _packed_summary_rows(packed.video_file_id, DetectionArrays.from_blob(packed.data))
+            if rows:
+                DetectionSummary.insert_many(rows).execute()
+            return
+        if AnnotationTrack.select().where(AnnotationTrack.video_file == video_file).exists():
+            for batch in chunked(_track_summary_rows(video_file), 100):
+                DetectionSummary.insert_many(batch).execute()
+            return
+        DetectionSummary.insert_from(_summary_source_query(video_file), SUMMARY_FIELDS).execute()
+
+
+def rebuild_detection_summary() -> None:
+    """Regenerate the detection summary for every video from the annotation table, packed annotations and tracks."""
+    with DetectionSummary._meta.database.atomic():  # type: ignore[attr-defined]
+        DetectionSummary.delete().execute()
+        DetectionSummary.insert_from(_summary_source_query(), SUMMARY_FIELDS).execute()
+        for packed in PackedAnnotation.select():
+            rows = _packed_summary_rows(packed.video_file_id, DetectionArrays.from_blob(packed.data))
+            for batch in chunked(rows, 100):
+                DetectionSummary.insert_many(batch).execute()
+        tracked = VideoFile.select().where(VideoFile.id.in_(AnnotationTrack.select(AnnotationTrack.video_file)))
+        for video_file in tracked:
+            for batch in chunked(_track_summary_rows(video_file), 100):
+                DetectionSummary.insert_many(batch).execute()
+
+
+def refresh_activity_timeline(video_file: VideoFile) -> None:
+    """
+    Recompute a video's activity timeline from its target annotations.
+
+    Args:
+        video_file: VideoFile instance whose timeline should be refreshed
+    """
+    histogram = ActivityHistogram.from_detections(
+        load_target_detections(video_file),
+        video_file.frame_count,  # type: ignore[arg-type]
+    )
+    ActivityTimeline.insert(video_file=video_file, data=histogram.to_blob()).on_conflict_replace().execute()
+
+
+def rebuild_activity_timelines() -> None:
+    """Regenerate the activity timeline of every annotated video."""
+    with ActivityTimeline._meta.database.atomic():  # type: ignore[attr-defined]
+        ActivityTimeline.delete().execute()
+        for video_file in VideoFile.select().where(VideoFile.annotated):
+            refresh_activity_timeline(video_file)
+
+
+def load_activity_timeline(video_file: VideoFile) -> ActivityHistogram:
+    """
+    Load a video's activity timeline.
+
+    Args:
+        video_file: VideoFile instance to load
+
+    Returns:
+        The stored ActivityHistogram, or one with no classes if the video hasn't been annotated
+    """
+    timeline = ActivityTimeline.get_or_none(ActivityTimeline.video_file == video_file)
+    if timeline is None:
+        return ActivityHistogram.from_detections(DetectionArrays.empty(), video_file.frame_count)  # type: ignore[arg-type]
+    return ActivityHistogram.from_blob(timeline.data)
+
+
+def refresh_sightings(video_file: VideoFile) -> None:
+    """
+    Replace a video's entries in the sighting index with runs of its target detections.
+
+    Args:
+        video_file: VideoFile instance whose sightings should be refreshed
+    """
+    # Sampled frames are frame_stride apart, so runs must bridge at least that gap
+    max_gap = max(SIGHTING_MAX_GAP, video_file.frame_stride)  # type: ignore[call-overload]
+    rows = [
+        {"video_file": video_file.get_id(), **asdict(segment)}
+        for segment in find_sightings(load_target_detections(video_file), max_gap)
+    ]
+    with Sighting._meta.database.atomic():  # type: ignore[attr-defined]
+        Sighting.delete().where(Sighting.video_file == video_file).execute()
+        for batch in chunked(rows, 100):
+            Sighting.insert_many(batch).execute()
+
+
+def rebuild_sightings() -> None:
+    """Regenerate the sighting index for every annotated video."""
+    with Sighting._meta.database.atomic():  # type: ignore[attr-defined]
+        Sighting.delete().execute()
+        for video_file in VideoFile.select().where(VideoFile.annotated):
+            refresh_sightings(video_file)
+
+
+def search_sightings(
+    names: Collection[str],
+    min_confidence: float = 0.0,
+    min_modified: float | None = None,
+    max_modified: float | None = None,
+    limit: int = 100,
+) -> list[Any]:
+    """
+    Find sightings of any of the given classes, most confident first.
+
+    Each class is looked up separately, walking the (name, peak_confidence) index in confidence order and stopping
+    after `limit` matches, and the per-class results are merged. The cost therefore depends on the number of
+    results rather than the number of detections or sightings, where a single query over every class would have to
+    sort all of their matches.
+
+    Args:
+        names: Object classes to find
+        min_confidence: Minimum peak confidence of a sighting (inclusive)
+        min_modified: Earliest video modification time to include (inclusive)
+        max_modified: Latest video modification time to include (inclusive)
+        limit: Maximum number of sightings to return
+
+    Returns:
+        Sighting instances with their `video_file` already loaded, ordered by decreasing peak confidence
+    """
+    per_class = []
+    for name in sorted(set(names)):
+        query = (
+            Sighting.select(Sighting, VideoFile)
+            .join(VideoFile)
+            .where((Sighting.name == name) & (Sighting.peak_confidence >= min_confidence))
+        )
+        if min_modified is not None:
+            query = query.where(VideoFile.modified >= min_modified)
+        if max_modified is not None:
+            query = query.where(VideoFile.modified <= max_modified)
+        per_class.append(list(query.order_by(Sighting.peak_confidence.desc()).limit(limit)))
+    merged = heapq.merge(*per_class, key=lambda sighting: -sighting.peak_confidence)
+    return list(itertools.islice(merged, limit))
+
+
+def get_thumbnail_path(video_file: VideoFile | int) -> Path:
     """
     Get the thumbnail file path for a video.
 
     Args:
-        video_file: VideoFile instance
+        video_file: VideoFile instance or video id; the path depends only on the id, so no query is needed
 
     Returns:
         Path to the video's thumbnail image
     """
-    return THUMBNAIL_DIR / f"{video_file.id}.jpg"
+    video_id = video_file if isinstance(video_file, int) else video_file.id
+    return THUMBNAIL_DIR / f"{video_id}.jpg"
+
+
+def get_sprite_path(page: int, suffix: str = ".jpg") -> Path:
+    """
+    Get the file path of a thumbnail sprite sheet page or its offset map.
+
+    Args:
+        page: Sprite page number
+        suffix: ".jpg" for the sheet image or ".json" for its offset map
+
+    Returns:
+        Path to the sprite file
+    """
+    return THUMBNAIL_DIR / "sprites" / f"{page}{suffix}"
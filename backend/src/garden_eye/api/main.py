@@ -4,25 +4,43 @@ from __future__ import annotations
 
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
-from typing import Any
+from typing import Annotated, Any, Literal
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
+from peewee import fn
 from pydantic import BaseModel
 from starlette.responses import Response
 
 from garden_eye import STATIC_ROOT
+from garden_eye.api.caching import ConditionalJSONMiddleware, etag_matches
 from garden_eye.api.database import (
-    Annotation,
     VideoFile,
-    get_thumbnail_path,
-    get_video_objects,
+    filter_videos,
+    get_generation,
+    get_objects_by_video,
+    get_sprite_path,
     init_database,
+    load_activity_timeline,
+    load_target_detections,
+    search_sightings,
+    select_object_summaries,
 )
+from garden_eye.api.pagination import VideoSort, paginate
 from garden_eye.api.range_stream import range_file_response
-from garden_eye.helpers import is_target_coco_annotation
+from garden_eye.api.sprites import (
+    SPRITE_COLUMNS,
+    SPRITE_ROWS,
+    TILE_HEIGHT,
+    TILE_WIDTH,
+    list_sprite_pages,
+    load_sprite_map,
+)
+from garden_eye.api.stats import STATS_CACHE
+from garden_eye.api.thumbnails import THUMBNAIL_CACHE
+from garden_eye.detections import DetectionArrays
 from garden_eye.log import get_logger
 
 # Configure uvicorn loggers
@@ -49,6 +67,106 @@ class VideoOut(BaseModel):
     objects: list[str] = []
     thumbnail_url: str
     is_night: bool = False
+    frame_stride: int = 1  # Detections exist for every Nth frame only
+    # Stream metadata, None for videos not yet probed
+    fps: float | None = None
+    frame_count: int | None = None
+    duration: float | None = None  # Length in seconds
+    codec: str | None = None
+    width: int | None = None
+    height: int | None = None
+
+
+class SpriteLayoutOut(BaseModel):
+    """Thumbnail sprite sheet layout response model."""
+
+    tile_width: int
+    tile_height: int
+    columns: int
+    rows: int
+    pages: list[int]  # Pages that have been built; page p holds video ids [p * columns * rows, (p + 1) * ...)
+
+
+class SpriteMapOut(BaseModel):
+    """Thumbnail sprite sheet offset map response model."""
+
+    page: int
+    url: str
+    tiles: dict[int, tuple[int, int]]  # Video id to (x, y) offset of its tile
+
+
+class VideoPage(BaseModel):
+    """Page of video file metadata response model."""
+
+    items: list[VideoOut]
+    next_cursor: str | None = None  # Pass back as `cursor` to fetch the next page; None on the last page
+    total: int  # Number of videos matching the filters across all pages
+
+
+class VideoBoundsOut(BaseModel):
+    """Catalogue-wide video modification time bounds response model."""
+
+    count: int
+    min_modified: float | None = None
+    max_modified: float | None = None
+
+
+class ObjectSummaryOut(BaseModel):
+    """Per-class detection statistics of a video response model."""
+
+    name: str
+    box_count: int
+    frame_count: int  # Frames with at least one detection of this class
+    max_confidence: float
+    mean_confidence: float
+    first_frame: int
+    last_frame: int
+    max_instances: int  # Most detections of this class on a single frame
+    track_count: int | None  # Distinct objects of this class tracked through the video, if stored as tracks
+
+
+class TimelineOut(BaseModel):
+    """Per-video activity histogram response model, for drawing detections along the scrubber bar."""
+
+    frame_count: int  # Frames in the video, divided evenly between the bins
+    bins: int
+    names: list[str]  # Object class of each row of counts, most detected first
+    counts: list[list[int]]  # Detections of each class in each time bin
+
+
+class SightingOut(BaseModel):
+    """Sighting index search result response model: a run of frames in which a class was detected."""
+
+    vid: int
+    video_name: str
+    modified: float | None = None
+    name: str
+    start_frame: int
+    end_frame: int  # Inclusive
+    peak_confidence: float
+    # Times of the start and end frames in seconds, None for videos without a recorded frame rate
+    start_s: float | None = None
+    end_s: float | None = None
+
+
+class ClassStatsOut(BaseModel):
+    """Library-wide detections of one object class response model."""
+
+    name: str
+    box_count: int
+    video_count: int  # Videos with at least one detection of this class
+
+
+class StatsOut(BaseModel):
+    """Library-wide statistics response model."""
+
+    generation: int  # Catalogue generation the statistics were computed at
+    video_count: int
+    wildlife_videos: int  # Videos with at least one non-person target detection
+    person_only_videos: int  # Videos whose only target detections are people
+    empty_videos: int  # Videos without target detections
+    classes: list[ClassStatsOut]  # Every detected class, including non-targets, most detections first
+    wildlife_prop_histogram: list[int]  # Videos with any wildlife per equal-width bin of wildlife_prop over (0, 1]
 
 
 class AnnotationOut(BaseModel):
@@ -64,9 +182,23 @@ class AnnotationOut(BaseModel):
     y2: float
 
 
+class AnnotationColumnsOut(BaseModel):
+    """Struct-of-arrays object detection annotations response model, grouped by frame."""
+
+    names: dict[int, str]  # Class id to object class name
+    frame_offsets: list[int]  # Annotations for frame f are at indices [frame_offsets[f], frame_offsets[f + 1])
+    class_id: list[int]
+    confidence: list[float]
+    boxes: list[float]  # Flattened x1, y1, x2, y2 per annotation
+
+
 # Setup garden_eye
 app = FastAPI(title="GardenEye", version="0.1.0", lifespan=lifespan)
 
+# ETag revalidation and compression for catalogue JSON; added first so it runs inside CORS, which then also covers its
+# 304 responses
+app.add_middleware(ConditionalJSONMiddleware)
+
 # CORS for local dev: allow everything on localhost
 app.add_middleware(
     CORSMiddleware,
@@ -90,71 +222,244 @@ def index() -> FileResponse:
 
 
 @app.get("/api/videos")
-def list_videos() -> list[VideoOut]:
-    """List all video files with metadata from the database."""
-    items: list[VideoOut] = []
-    # Query the DB and order by path for stable output
-    for vf in VideoFile.select().order_by(VideoFile.path.asc()):
-        items.append(
-            VideoOut(
-                vid=vf.id,
-                name=vf.path.name,
-                size=int(vf.size),
-                modified=vf.modified,
-                wildlife_prop=vf.wildlife_prop,
-                objects=get_video_objects(vf),
-                thumbnail_url=f"/api/thumbnail/{vf.id}",
-                is_night=vf.is_night,
+def list_videos(
+    sort: VideoSort = "oldest",
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 100,
+    min_modified: float | None = None,
+    max_modified: float | None = None,
+    time: Literal["day", "night"] | None = None,
+    hide_empty: bool = False,
+    exclude_person: bool = False,
+    object_name: Annotated[str | None, Query(alias="object")] = None,
+) -> VideoPage:
+    """List a page of video files matching the given filters, with metadata from the database."""
+    query = filter_videos(
+        min_modified=min_modified,
+        max_modified=max_modified,
+        is_night=None if time is None else time == "night",
+        hide_empty=hide_empty,
+        exclude_person=exclude_person,
+        object_name=object_name,
+    )
+    videos, next_cursor = paginate(query, sort, cursor, limit)
+    # Fetch the page's object lists up front rather than querying per video
+    objects = get_objects_by_video(vf.id for vf in videos)
+    items = [
+        VideoOut(
+            vid=vf.id,
+            name=vf.path.name,
+            size=int(vf.size),
+            modified=vf.modified,
+            wildlife_prop=vf.wildlife_prop,
+            objects=objects.get(vf.id, []),
+            thumbnail_url=f"/api/thumbnail/{vf.id}",
+            is_night=vf.is_night,
+            frame_stride=vf.frame_stride,
+            fps=vf.fps,
+            frame_count=vf.frame_count,
+            duration=vf.duration,
+            codec=vf.codec,
+            width=vf.width,
+            height=vf.height,
+        )
+        for vf in videos
+    ]
+    return VideoPage(items=items, next_cursor=next_cursor, total=query.count())
+
+
+@app.get("/api/videos/bounds")
+def get_video_bounds() -> VideoBoundsOut:
+    """Get the number of videos and the range of their modification times, e.g. for the date range filter."""
+    count, min_modified, max_modified = VideoFile.select(
+        fn.COUNT(VideoFile.id), fn.MIN(VideoFile.modified), fn.MAX(VideoFile.modified)
+    ).scalar(as_tuple=True)
+    return VideoBoundsOut(count=count, min_modified=min_modified, max_modified=max_modified)
+
+
+@app.get("/api/videos/{vid}/objects")
+def get_video_object_summaries(vid: int) -> list[ObjectSummaryOut]:
+    """Get statistics of each target object class detected in a video, most frequent first."""
+    video = VideoFile.get_or_none(VideoFile.id == vid)
+    if video is None:
+        raise HTTPException(404, detail="Video not found")
+    return [
+        ObjectSummaryOut(
+            name=row.name,
+            box_count=row.box_count,
+            frame_count=row.frame_count,
+            max_confidence=row.max_confidence,
+            mean_confidence=row.mean_confidence,
+            first_frame=row.first_frame,
+            last_frame=row.last_frame,
+            max_instances=row.max_instances,
+            track_count=row.track_count,
+        )
+        for row in select_object_summaries(video)
+    ]
+
+
+@app.get("/api/videos/{vid}/timeline")
+def get_video_timeline(vid: int) -> TimelineOut:
+    """Get a video's target detections per class in a fixed number of time bins."""
+    video = VideoFile.get_or_none(VideoFile.id == vid)
+    if video is None:
+        raise HTTPException(404, detail="Video not found")
+    histogram = load_activity_timeline(video)
+    return TimelineOut(
+        frame_count=histogram.frame_count,
+        bins=histogram.bins,
+        names=histogram.names,
+        counts=histogram.counts.tolist(),
+    )
+
+
+# Optional confidence threshold shared by the annotation endpoints
+MinConfidence = Annotated[float | None, Query(ge=0.0, le=1.0)]
+
+
+@app.get("/api/sightings")
+def get_sightings(
+    name: Annotated[list[str], Query(min_length=1)],
+    min_confidence: Annotated[float, Query(ge=0.0, le=1.0)] = 0.0,
+    min_modified: float | None = None,
+    max_modified: float | None = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+) -> list[SightingOut]:
+    """Search the whole library for sightings of any of the given classes, most confident first."""
+    query = search_sightings(name, min_confidence, min_modified, max_modified, limit)
+    results = []
+    for sighting in query:
+        video = sighting.video_file
+        fps = video.fps
+        results.append(
+            SightingOut(
+                vid=video.id,
+                video_name=video.path.name,
+                modified=video.modified,
+                name=sighting.name,
+                start_frame=sighting.start_frame,
+                end_frame=sighting.end_frame,
+                peak_confidence=sighting.peak_confidence,
+                start_s=sighting.start_frame / fps if fps else None,
+                end_s=sighting.end_frame / fps if fps else None,
             )
         )
-    return items
+    return results
+
+
+@app.get("/api/stats")
+def get_stats() -> StatsOut:
+    """Get library-wide statistics: detections per class, videos by content and the wildlife proportion histogram."""
+    stats = STATS_CACHE.get(get_generation())
+    return StatsOut(
+        generation=stats.generation,
+        video_count=stats.video_count,
+        wildlife_videos=stats.wildlife_videos,
+        person_only_videos=stats.person_only_videos,
+        empty_videos=stats.empty_videos,
+        classes=[ClassStatsOut(name=c.name, box_count=c.box_count, video_count=c.video_count) for c in stats.classes],
+        wildlife_prop_histogram=stats.wildlife_prop_histogram,
+    )
 
 
 @app.get("/api/annotations/{vid}")
-def get_annotations(vid: int) -> list[AnnotationOut]:
+def get_annotations(vid: int, min_confidence: MinConfidence = None) -> list[AnnotationOut]:
     """Retrieve object detection annotations for a specific video."""
-    video_file = VideoFile.get_by_id(vid)
-    annotations = []
-    for annotation in Annotation.select().where(Annotation.video_file == video_file):
-        if not is_target_coco_annotation(annotation.name):
-            continue
-        annotations.append(
-            AnnotationOut(
-                frame_idx=annotation.frame_idx,
-                name=annotation.name,
-                class_id=annotation.class_id,
-                confidence=annotation.confidence,
-                x1=annotation.x1,
-                y1=annotation.y1,
-                x2=annotation.x2,
-                y2=annotation.y2,
-            )
+    detections = _load_detections(vid, min_confidence)
+    return [
+        AnnotationOut(
+            frame_idx=frame_idx,
+            name=detections.names[class_id],
+            class_id=class_id,
+            confidence=confidence,
+            x1=x1,
+            y1=y1,
+            x2=x2,
+            y2=y2,
+        )
+        for frame_idx, class_id, confidence, (x1, y1, x2, y2) in zip(
+            detections.frame_idx.tolist(),
+            detections.class_id.tolist(),
+            detections.confidence.tolist(),
+            detections.boxes.tolist(),
+            strict=True,
         )
-    return annotations
+    ]
 
 
-@app.get("/api/thumbnail/{vid}")
-async def get_thumbnail(vid: int) -> FileResponse:
-    """Serve thumbnail image for video."""
-    vf = VideoFile.get_by_id(vid)
+def _load_detections(vid: int, min_confidence: float | None) -> DetectionArrays:
+    """Load a video's target annotations as arrays, whichever storage mode holds them."""
+    return load_target_detections(VideoFile.get_by_id(vid), min_confidence)
+
+
+@app.get("/api/annotations/{vid}/columns")
+def get_annotation_columns(vid: int, min_confidence: MinConfidence = None) -> AnnotationColumnsOut:
+    """Retrieve object detection annotations for a video as frame-indexed columns."""
+    detections = _load_detections(vid, min_confidence)
+    return AnnotationColumnsOut(
+        names=detections.names,
+        frame_offsets=detections.frame_offsets().tolist(),
+        class_id=detections.class_id.tolist(),
+        confidence=detections.confidence.tolist(),
+        boxes=detections.boxes.ravel().tolist(),
+    )
+
+
+@app.get("/api/annotations/{vid}/packed")
+def get_annotations_packed(vid: int, min_confidence: MinConfidence = None) -> Response:
+    """Retrieve object detection annotations for a video in the packed binary format (see garden_eye.detections)."""
+    return Response(_load_detections(vid, min_confidence).to_wire(), media_type="application/octet-stream")
 
-    # Check if thumbnail exists
-    thumbnail_path = get_thumbnail_path(vf)
-    if not thumbnail_path.exists():
+
+@app.get("/api/thumbnail/{vid}")
+def get_thumbnail(vid: int, request: Request) -> Response:
+    """Serve thumbnail image for video from the in-memory cache, or 304 if the client's copy is current."""
+    thumbnail = THUMBNAIL_CACHE.get(vid)
+    if thumbnail is None:
         raise HTTPException(404, detail="Thumbnail not found")
 
-    return FileResponse(
-        thumbnail_path,
-        media_type="image/jpeg",
-        headers={
-            "Cache-Control": "public, max-age=86400",  # Cache for 24 hours
-            "ETag": f'"{thumbnail_path.stat().st_mtime}"',
-        },
+    headers = {
+        "Cache-Control": "public, max-age=86400",  # Cache for 24 hours
+        "ETag": thumbnail.etag,
+    }
+    if etag_matches(request.headers.get("if-none-match"), thumbnail.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(thumbnail.content, media_type="image/jpeg", headers=headers)
+
+
+@app.get("/api/sprites")
+def get_sprite_layout() -> SpriteLayoutOut:
+    """Describe the thumbnail sprite sheet grid and which pages exist."""
+    return SpriteLayoutOut(
+        tile_width=TILE_WIDTH,
+        tile_height=TILE_HEIGHT,
+        columns=SPRITE_COLUMNS,
+        rows=SPRITE_ROWS,
+        pages=list_sprite_pages(),
     )
 
 
+@app.get("/api/sprites/{page}/map")
+def get_sprite_map(page: int) -> SpriteMapOut:
+    """Get the tile offsets of every thumbnail on a sprite page."""
+    tiles = load_sprite_map(page)
+    if tiles is None:
+        raise HTTPException(404, detail="Sprite page not found")
+    return SpriteMapOut(page=page, url=f"/api/sprites/{page}", tiles=tiles)
+
+
+@app.get("/api/sprites/{page}")
+def get_sprite(page: int) -> FileResponse:
+    """Serve a thumbnail sprite sheet page."""
+    sprite_path = get_sprite_path(page)
+    if not sprite_path.exists():
+        raise HTTPException(404, detail="Sprite page not found")
+    return FileResponse(sprite_path, media_type="image/jpeg")
+
+
 @app.get("/stream")
-async def stream(request: Request, vid: int) -> Response:
-    """Stream a media file with Range support."""
+def stream(request: Request, vid: int) -> Response:
+    """Stream a media file with conditional and Range request support."""
     vf = VideoFile.get_by_id(vid)
-    return range_file_response(vf.path, request)
+    return range_file_response(vf.path, request, size=vf.size, modified=vf.modified)
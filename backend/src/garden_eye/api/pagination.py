@@ -0,0 +1,94 @@
+"""Cursor-based pagination for the video catalogue."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any, Literal
+
+from fastapi import HTTPException
+from peewee import Field, ModelSelect, Tuple
+
+from garden_eye.api.database import VideoFile
+
+VideoSort = Literal["oldest", "latest", "most_activity", "least_activity"]
+
+# Sort key column and whether it is descending; ties are always broken by id in the same direction
+SORT_ORDERS: dict[str, tuple[Field, bool]] = {
+    "oldest": (VideoFile.modified, False),
+    "latest": (VideoFile.modified, True),
+    "most_activity": (VideoFile.wildlife_prop, True),
+    "least_activity": (VideoFile.wildlife_prop, False),
+}
+
+
+def encode_cursor(sort: VideoSort, value: float, vid: int) -> str:
+    """
+    Encode the position after a video as an opaque, URL-safe cursor.
+
+    Args:
+        sort: Sort order the cursor belongs to
+        value: Sort key value of the last video on the page
+        vid: Id of the last video on the page
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps([sort, value, vid], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: VideoSort) -> tuple[float, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string from a previous page
+        sort: Sort order of the current request, which must match the cursor's
+
+    Returns:
+        Tuple of (sort key value, video id) of the last video on the previous page
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, vid = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+    if cursor_sort != sort or not isinstance(value, int | float) or not isinstance(vid, int):
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    return float(value), vid
+
+
+def paginate(query: ModelSelect, sort: VideoSort, cursor: str | None, limit: int) -> tuple[list[Any], str | None]:
+    """
+    Fetch one page of a video query using keyset pagination.
+
+    Seeks directly to the cursor position using the (sort key, id) indexes, so every page costs the same regardless
+    of how deep into the catalogue it is.
+
+    Args:
+        query: Filtered VideoFile query
+        sort: Sort order to page through
+        cursor: Cursor returned with the previous page, or None for the first page
+        limit: Maximum number of videos per page
+
+    Returns:
+        Tuple of (VideoFile instances on this page, cursor for the next page or None if this is the last page)
+    """
+    field, descending = SORT_ORDERS[sort]
+    if cursor is not None:
+        value, vid = decode_cursor(cursor, sort)
+        position = Tuple(field, VideoFile.id)
+        query = query.where(position < (value, vid) if descending else position > (value, vid))
+    if descending:
+        query = query.order_by(field.desc(), VideoFile.id.desc())
+    else:
+        query = query.order_by(field.asc(), VideoFile.id.asc())
+    # Fetch one extra row to find out whether there is another page
+    videos = list(query.limit(limit + 1))
+    if len(videos) <= limit:
+        return videos, None
+    videos = videos[:limit]
+    last = videos[-1]
+    return videos, encode_cursor(sort, getattr(last, field.name), last.id)
@@ -3,111 +3,466 @@
 from __future__ import annotations
 
 import os
-from collections.abc import Iterator
+import secrets
+from collections.abc import Mapping
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
+from typing import Any
 
 from fastapi import HTTPException, Request
-from starlette.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
 
-CHUNK_SIZE = 1024 * 1024  # 1MB
+from garden_eye import CONFIG
+from garden_eye.api.caching import etag_matches
+from garden_eye.log import get_logger
 
+logger = get_logger(__name__)
 
-def _parse_range(range_header: str, file_size: int) -> tuple[int, int]:
+CHUNK_SIZE = CONFIG.stream_chunk_size_kib * 1024
+
+
+def make_validators(size: int, modified: float) -> tuple[str, str]:
+    """
+    Build the ETag and Last-Modified values for a video from its catalogue metadata.
+
+    Args:
+        size: File size in bytes
+        modified: Modification time in seconds
+
+    Returns:
+        Tuple of (ETag, Last-Modified) header values
+    """
+    return f'"{size:x}-{round(modified * 1_000_000):x}"', formatdate(modified, usegmt=True)
+
+
+def _parse_http_date(value: str) -> int | None:
+    """
+    Parse an HTTP date header into whole seconds since the epoch.
+
+    Args:
+        value: HTTP date, e.g. from If-Modified-Since
+
+    Returns:
+        Timestamp in seconds, or None if the date is malformed
+    """
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def _not_modified(request: Request, etag: str, modified: float) -> bool:
+    """
+    Evaluate If-None-Match, falling back to If-Modified-Since as RFC 7232 requires.
+
+    Args:
+        request: Incoming request
+        etag: Current ETag of the file
+        modified: Current modification time of the file
+
+    Returns:
+        True if a 304 should be sent
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and int(modified) <= since
+    return False
+
+
+def _if_range_matches(if_range: str, etag: str, modified: float) -> bool:
+    """
+    Check whether an If-Range validator still identifies the current file.
+
+    Args:
+        if_range: If-Range request header value, an ETag or an HTTP date
+        etag: Current ETag of the file
+        modified: Current modification time of the file
+
+    Returns:
+        True if the Range header should be honoured, False if the whole file should be sent
+    """
+    if_range = if_range.strip()
+    # If-Range uses strong comparison, so a weak ETag never matches
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag
+    return _parse_http_date(if_range) == int(modified)
+
+
+def _range_not_satisfiable(detail: str, file_size: int) -> HTTPException:
+    """Build a 416 error carrying the Content-Range header RFC 7233 requires."""
+    return HTTPException(status_code=416, detail=detail, headers={"Content-Range": f"bytes */{file_size}"})
+
+
+def _parse_ranges(range_header: str, file_size: int) -> list[tuple[int, int]]:
     """
-    Parse a Range header into (start, end) byte positions inclusive.
+    Parse a Range header into sorted, non-overlapping (start, end) byte positions inclusive.
 
-    Supports formats like 'bytes=START-' or 'bytes=START-END' or 'bytes=-SUFFIX'.
+    Supports a comma-separated list of 'bytes=START-', 'bytes=START-END' and 'bytes=-SUFFIX' ranges. Ranges that
+    start beyond the end of the file are dropped, and overlapping or adjacent ranges are coalesced.
 
     Args:
         range_header: HTTP Range header value
         file_size: Total file size in bytes
 
     Returns:
-        Tuple of (start, end) byte positions inclusive
+        List of (start, end) byte positions inclusive
     """
     try:
-        units, ranges = range_header.split("=", 1)
+        units, range_specs = range_header.split("=", 1)
     except ValueError as e:
-        raise HTTPException(status_code=416, detail="Invalid Range header") from e
+        raise _range_not_satisfiable("Invalid Range header", file_size) from e
 
     if units.strip() != "bytes":
-        raise HTTPException(status_code=416, detail="Only 'bytes' range supported")
+        raise _range_not_satisfiable("Only 'bytes' range supported", file_size)
 
-    first_range = ranges.split(",")[0].strip()
+    ranges = []
+    for range_spec in range_specs.split(","):
+        range_spec = range_spec.strip()
+        if range_spec.startswith("-"):
+            # Suffix range: last N bytes
+            suffix = int(range_spec[1:])
+            if suffix == 0:
+                raise _range_not_satisfiable("Invalid suffix length", file_size)
+            start = max(file_size - suffix, 0)
+            end = file_size - 1
+        else:
+            parts = range_spec.split("-")
+            if len(parts) != 2:
+                raise _range_not_satisfiable("Invalid range format", file_size)
+            start = int(parts[0]) if parts[0] else 0
+            end = int(parts[1]) if parts[1] else file_size - 1
 
-    if first_range.startswith("-"):
-        # Suffix range: last N bytes
-        suffix = int(first_range[1:])
-        if suffix == 0:
-            raise HTTPException(status_code=416, detail="Invalid suffix length")
-        start = max(file_size - suffix, 0)
-        end = file_size - 1
-    else:
-        parts = first_range.split("-")
-        if len(parts) != 2:
-            raise HTTPException(status_code=416, detail="Invalid range format")
-        start = int(parts[0]) if parts[0] else 0
-        end = int(parts[1]) if parts[1] else file_size - 1
+        if start >= file_size:
+            continue
+        if start > end or start < 0:
+            raise _range_not_satisfiable("Invalid range bounds", file_size)
+        ranges.append((start, min(end, file_size - 1)))
 
-    if start > end or start < 0:
-        raise HTTPException(status_code=416, detail="Invalid range bounds")
+    if not ranges:
+        raise _range_not_satisfiable("Range not satisfiable", file_size)
 
-    end = min(end, file_size - 1)
-    return start, end
+    # Coalesce so a client can't make the server send the same bytes many times over
+    ranges.sort()
+    coalesced = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = coalesced[-1]
+        if start <= last_end + 1:
+            coalesced[-1] = (last_start, max(last_end, end))
+        else:
+            coalesced.append((start, end))
+    return coalesced
 
 
-def range_file_response(file_path: Path, request: Request) -> Response:
+def _read_chunk(fd: int, offset: int, size: int, next_size: int) -> bytes:
     """
-    Create a streaming response supporting HTTP Range requests for video playback.
+    Read a chunk of a file and advise the kernel to start reading the chunk after it.
+
+    Args:
+        fd: Open file descriptor
+        offset: First byte to read
+        size: Bytes to read
+        next_size: Bytes of the following chunk to read ahead, or 0 for none
+
+    Returns:
+        The bytes read, fewer than size if the file ends first
+    """
+    chunk = os.pread(fd, size, offset)
+    if next_size and hasattr(os, "posix_fadvise"):
+        # Start reading the next chunk from disk while this one is written to the socket
+        os.posix_fadvise(fd, offset + size, next_size, os.POSIX_FADV_WILLNEED)
+    return chunk
+
+
+class FileRangeResponse(Response):
+    """
+    Send a byte range of a file without copying it through Python where possible.
+
+    In order of preference the body is sent with the ASGI `http.response.pathsend` extension (whole file only),
+    the `http.response.zerocopy` extension (sendfile), or as chunks read with `pread` in the threadpool. File reads
+    never block the event loop, and a file truncated while it is sent ends the response early instead of faulting.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        start: int,
+        end: int,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        media_type: str | None = None,
+        chunk_size: int = CHUNK_SIZE,
+        file_size: int | None = None,
+    ) -> None:
+        """
+        Create the response.
+
+        Args:
+            path: File to send
+            start: First byte to send
+            end: Last byte to send (inclusive); end < start sends an empty body
+            status_code: HTTP status code
+            headers: Response headers, which should include Content-Length
+            media_type: Content type of the file
+            chunk_size: Maximum bytes per body message when the server has no zero-copy support
+            file_size: Total file size in bytes; read from disk if None
+        """
+        self.path = path
+        self.start = start
+        self.end = end
+        self.chunk_size = chunk_size
+        self.file_size = os.path.getsize(path) if file_size is None else file_size
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    @property
+    def whole_file(self) -> bool:
+        """Whether the response covers the entire file."""
+        return self.start == 0 and self.end == self.file_size - 1
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Send the response over ASGI."""
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            await self._send_body(send, scope.get("extensions") or {})
+
+    async def _send_body(self, send: Send, extensions: Mapping[str, Any]) -> None:
+        """
+        Send the response body.
+
+        Args:
+            send: ASGI send callable
+            extensions: Extensions advertised by the server
+        """
+        if self.end < self.start:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.pathsend" in extensions and self.whole_file:
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+        else:
+            await self._send_range(send, extensions, self.start, self.end, more_body=False)
+
+    async def _send_range(
+        self, send: Send, extensions: Mapping[str, Any], start: int, end: int, more_body: bool
+    ) -> bool:
+        """
+        Send one byte range of the file, with sendfile if the server supports it or else as chunks read from disk.
+
+        Args:
+            send: ASGI send callable
+            extensions: Extensions advertised by the server
+            start: First byte to send
+            end: Last byte to send (inclusive)
+            more_body: Whether more of the body follows this range
+
+        Returns:
+            False if the file was truncated before the whole range was sent, leaving the response incomplete
+        """
+        if "http.response.zerocopy" in extensions:
+            f = await run_in_threadpool(open, self.path, "rb")
+            try:
+                await send(
+                    {
+                        "type": "http.response.zerocopy",
+                        "file": f,
+                        "offset": start,
+                        "count": end - start + 1,
+                        "more_body": more_body,
+                    }
+                )
+            finally:
+                f.close()
+            return True
+        return await self._send_chunks(send, start, end, more_body)
+
+    async def _send_chunks(self, send: Send, start: int, end: int, more_body: bool) -> bool:
+        """
+        Send a byte range as chunks read with `pread` in the threadpool.
+
+        Args:
+            send: ASGI send callable
+            start: First byte to send
+            end: Last byte to send (inclusive)
+            more_body: Whether more of the body follows this range
+
+        Returns:
+            False if the file was truncated before the whole range was sent, leaving the response incomplete
+        """
+        fd = await run_in_threadpool(os.open, self.path, os.O_RDONLY)
+        try:
+            position, stop = start, end + 1
+            while position < stop:
+                size = min(self.chunk_size, stop - position)
+                next_size = min(self.chunk_size, stop - position - size)
+                chunk = await run_in_threadpool(_read_chunk, fd, position, size, next_size)
+                if len(chunk) < size:
+                    # The file shrank while it was sent, e.g. a clip rewritten by ingestion; the server closes the
+                    # connection when the response ends short of its Content-Length
+                    logger.warning(f"{self.path} was truncated while it was sent; ending the response early")
+                    return False
+                position += size
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body or position < stop})
+            return True
+        finally:
+            os.close(fd)
+
+
+class MultipartRangeResponse(FileRangeResponse):
+    """Send several byte ranges of a file as a multipart/byteranges body."""
+
+    def __init__(
+        self,
+        path: Path,
+        ranges: list[tuple[int, int]],
+        file_size: int,
+        headers: Mapping[str, str] | None = None,
+        media_type: str | None = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> None:
+        """
+        Create the response.
+
+        Args:
+            path: File to send
+            ranges: Sorted, non-overlapping (start, end) byte positions inclusive
+            file_size: Total file size in bytes
+            headers: Response headers; Content-Length is computed here
+            media_type: Content type of the file, repeated in each part
+            chunk_size: Maximum bytes per body message when the server has no zero-copy support
+        """
+        self.ranges = ranges
+        self.boundary = secrets.token_hex(13)
+        # Each part is preceded by its own delimiter and headers, and the body ends with a closing delimiter
+        self.part_headers = [
+            (
+                ("\r\n" if i else "") + f"--{self.boundary}\r\n"
+                f"Content-Type: {media_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+            ).encode("latin-1")
+            for i, (start, end) in enumerate(ranges)
+        ]
+        self.closing = f"\r\n--{self.boundary}--\r\n".encode("latin-1")
+        content_length = (
+            sum(len(part) for part in self.part_headers)
+            + sum(end - start + 1 for start, end in ranges)
+            + len(self.closing)
+        )
+        super().__init__(
+            path,
+            ranges[0][0],
+            ranges[-1][1],
+            status_code=206,
+            headers={**(headers or {}), "Content-Length": str(content_length)},
+            media_type=f"multipart/byteranges; boundary={self.boundary}",
+            chunk_size=chunk_size,
+            file_size=file_size,
+        )
+
+    async def _send_body(self, send: Send, extensions: Mapping[str, Any]) -> None:
+        """
+        Send each range with its part headers, then the closing delimiter.
+
+        Args:
+            send: ASGI send callable
+            extensions: Extensions advertised by the server
+        """
+        for part_header, (start, end) in zip(self.part_headers, self.ranges, strict=True):
+            await send({"type": "http.response.body", "body": part_header, "more_body": True})
+            if not await self._send_range(send, extensions, start, end, more_body=True):
+                return
+        await send({"type": "http.response.body", "body": self.closing, "more_body": False})
+
+
+def range_file_response(
+    file_path: Path,
+    request: Request,
+    size: int | None = None,
+    modified: float | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Response:
+    """
+    Create a response supporting conditional and HTTP Range requests for video playback.
+
+    Validators are built from `size` and `modified` so they can come from the catalogue rather than a stat call.
+    A matching If-None-Match (or If-Modified-Since) gives a 304, a stale If-Range gives the whole file, and a Range
+    with several ranges gives a multipart/byteranges body.
+    The file is checked on disk, so call this from a sync endpoint, which FastAPI runs in the threadpool.
 
     Args:
         file_path: Path to video file
         request: FastAPI Request object
+        size: File size used for the validators; read from disk if None
+        modified: Modification time used for the validators; read from disk if None
+        chunk_size: Maximum bytes per body message when the server has no zero-copy support
 
     Returns:
-        StreamingResponse with appropriate status code and headers
+        Response with appropriate status code and headers
     """
     if not file_path.is_file():
         raise HTTPException(status_code=404, detail="File not found")
 
-    file_size = os.path.getsize(file_path)
-    range_header: str | None = request.headers.get("range") or request.headers.get("Range")
+    st = os.stat(file_path)
+    file_size = st.st_size
+    modified = st.st_mtime if modified is None else modified
+    etag, last_modified = make_validators(file_size if size is None else size, modified)
+    validators = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": "private, max-age=3600"}
 
-    def file_iterator(start: int, end: int) -> Iterator[bytes]:
-        with open(file_path, "rb") as f:
-            f.seek(start)
-            bytes_left = end - start + 1
-            while bytes_left > 0:
-                chunk = f.read(min(CHUNK_SIZE, bytes_left))
-                if not chunk:
-                    break
-                bytes_left -= len(chunk)
-                yield chunk
-
-    if range_header is not None:
-        start, end = _parse_range(range_header, file_size)
+    if _not_modified(request, etag, modified):
+        return Response(status_code=304, headers=validators)
+
+    range_header: str | None = request.headers.get("range") or request.headers.get("Range")
+    if_range = request.headers.get("if-range")
+    # A Range conditioned on an out-of-date If-Range is ignored and the whole file is sent instead
+    if range_header is not None and (if_range is None or _if_range_matches(if_range, etag, modified)):
+        ranges = _parse_ranges(range_header, file_size)
+        if len(ranges) > 1:
+            return MultipartRangeResponse(
+                file_path,
+                ranges,
+                file_size,
+                headers={"Accept-Ranges": "bytes", **validators},
+                media_type="video/mp4",
+                chunk_size=chunk_size,
+            )
+        start, end = ranges[0]
         content_length = end - start + 1
         headers = {
             "Content-Range": f"bytes {start}-{end}/{file_size}",
             "Accept-Ranges": "bytes",
             "Content-Length": str(content_length),
-            "Cache-Control": "private, max-age=3600",
+            **validators,
         }
-        return StreamingResponse(
-            file_iterator(start, end),
+        return FileRangeResponse(
+            file_path,
+            start,
+            end,
             status_code=206,
-            media_type="video/mp4",
             headers=headers,
+            media_type="video/mp4",
+            chunk_size=chunk_size,
+            file_size=file_size,
         )
 
     # No Range header → send full file
     headers = {
         "Accept-Ranges": "bytes",
         "Content-Length": str(file_size),
-        "Cache-Control": "private, max-age=3600",
+        **validators,
     }
-    return StreamingResponse(
-        file_iterator(0, file_size - 1),
-        media_type="video/mp4",
+    return FileRangeResponse(
+        file_path,
+        0,
+        file_size - 1,
         headers=headers,
+        media_type="video/mp4",
+        chunk_size=chunk_size,
+        file_size=file_size,
     )
@@ -0,0 +1,130 @@
+"""Thumbnail sprite sheets, so a screen of video cards needs a handful of image requests rather than hundreds."""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterable
+
+from PIL import Image
+
+from garden_eye.api.database import get_sprite_path, get_thumbnail_path
+
+TILE_WIDTH = 280  # Matches the thumbnail size produced by ingestion
+TILE_HEIGHT = 157
+SPRITE_COLUMNS = 8
+SPRITE_ROWS = 8
+SPRITE_PAGE_SIZE = SPRITE_COLUMNS * SPRITE_ROWS
+
+
+def sprite_page(video_id: int) -> int:
+    """
+    Get the sprite page that holds a video's thumbnail; pages cover fixed, consecutive ranges of video ids.
+
+    Args:
+        video_id: Video id
+
+    Returns:
+        Sprite page number
+    """
+    return video_id // SPRITE_PAGE_SIZE
+
+
+def tile_position(video_id: int) -> tuple[int, int]:
+    """
+    Get the pixel offset of a video's tile within its sprite page.
+
+    Args:
+        video_id: Video id
+
+    Returns:
+        Tuple of (x, y) offsets of the tile's top-left corner
+    """
+    slot = video_id % SPRITE_PAGE_SIZE
+    return (slot % SPRITE_COLUMNS) * TILE_WIDTH, (slot // SPRITE_COLUMNS) * TILE_HEIGHT
+
+
+def build_sprite_page(page: int) -> dict[int, tuple[int, int]]:
+    """
+    Pack the existing thumbnails of a page's videos into a sprite sheet and write it with its offset map.
+
+    Both files are replaced atomically, so the API server never serves a half-written page. A page with no
+    thumbnails is removed.
+
+    Args:
+        page: Sprite page number
+
+    Returns:
+        Mapping of video id to (x, y) tile offset for every thumbnail on the page
+    """
+    sheet = Image.new("RGB", (SPRITE_COLUMNS * TILE_WIDTH, SPRITE_ROWS * TILE_HEIGHT))
+    tiles = {}
+    for video_id in range(page * SPRITE_PAGE_SIZE, (page + 1) * SPRITE_PAGE_SIZE):
+        thumbnail_path = get_thumbnail_path(video_id)
+        if not thumbnail_path.exists():
+            continue
+        with Image.open(thumbnail_path) as thumbnail:
+            tile = thumbnail.convert("RGB")
+        if tile.size != (TILE_WIDTH, TILE_HEIGHT):
+            tile = tile.resize((TILE_WIDTH, TILE_HEIGHT))
+        tiles[video_id] = tile_position(video_id)
+        sheet.paste(tile, tiles[video_id])
+
+    image_path, map_path = get_sprite_path(page), get_sprite_path(page, ".json")
+    if not tiles:
+        image_path.unlink(missing_ok=True)
+        map_path.unlink(missing_ok=True)
+        return tiles
+
+    image_path.parent.mkdir(parents=True, exist_ok=True)
+    sheet.save(image_path.with_suffix(".jpg.tmp"), format="JPEG", quality=85)
+    map_path.with_suffix(".json.tmp").write_text(json.dumps({"tiles": tiles}))
+    os.replace(image_path.with_suffix(".jpg.tmp"), image_path)
+    os.replace(map_path.with_suffix(".json.tmp"), map_path)
+    return tiles
+
+
+def build_sprite_pages(video_ids: Iterable[int]) -> list[int]:
+    """
+    Rebuild every sprite page that holds one of the given videos.
+
+    Args:
+        video_ids: Ids of videos whose thumbnails were added or changed
+
+    Returns:
+        Sorted page numbers that were rebuilt
+    """
+    pages = sorted({sprite_page(video_id) for video_id in video_ids})
+    for page in pages:
+        build_sprite_page(page)
+    return pages
+
+
+def list_sprite_pages() -> list[int]:
+    """
+    List the sprite pages that have been built.
+
+    Returns:
+        Sorted page numbers
+    """
+    sprite_dir = get_sprite_path(0).parent
+    if not sprite_dir.is_dir():
+        return []
+    return sorted(int(path.stem) for path in sprite_dir.glob("*.json"))
+
+
+def load_sprite_map(page: int) -> dict[int, tuple[int, int]] | None:
+    """
+    Load a sprite page's offset map.
+
+    Args:
+        page: Sprite page number
+
+    Returns:
+        Mapping of video id to (x, y) tile offset, or None if the page hasn't been built
+    """
+    try:
+        raw = json.loads(get_sprite_path(page, ".json").read_text())
+    except FileNotFoundError:
+        return None
+    return {int(video_id): (x, y) for video_id, (x, y) in raw["tiles"].items()}
@@ -0,0 +1,123 @@
+"""Library-wide statistics for the analysis views, computed with set-based SQL and cached per catalogue generation."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+
+from peewee import fn
+
+from garden_eye.api.database import TARGET_NAMES, DetectionSummary, VideoFile
+
+# Equal-width bins of the wildlife proportion histogram over (0, 1]
+WILDLIFE_PROP_BINS = 20
+
+
+@dataclass(frozen=True)
+class ClassStats:
+    """Detections of one object class across the library."""
+
+    name: str  # Object class name (e.g., "fox")
+    box_count: int  # Detections of the class in every video
+    video_count: int  # Videos with at least one detection of the class
+
+
+@dataclass(frozen=True)
+class LibraryStats:
+    """Statistics of the whole library at one catalogue generation."""
+
+    generation: int  # Catalogue generation the statistics were computed at
+    video_count: int
+    wildlife_videos: int  # Videos with at least one non-person target detection
+    person_only_videos: int  # Videos whose only target detections are people
+    empty_videos: int  # Videos without target detections, including those not yet annotated
+    classes: list[ClassStats]  # Every detected class, including non-targets, most detections first
+    wildlife_prop_histogram: list[int]  # Videos with any wildlife per equal-width bin of wildlife_prop over (0, 1]
+
+
+def compute_library_stats(generation: int, bins: int = WILDLIFE_PROP_BINS) -> LibraryStats:
+    """
+    Compute the library statistics with a handful of aggregate queries over the detection summary and video table.
+
+    Args:
+        generation: Current catalogue generation, recorded with the result
+        bins: Number of wildlife proportion histogram bins
+
+    Returns:
+        LibraryStats of every video
+    """
+    classes = [
+        ClassStats(name, box_count, video_count)
+        for name, box_count, video_count in DetectionSummary.select(
+            DetectionSummary.name, fn.SUM(DetectionSummary.box_count), fn.COUNT(DetectionSummary.video_file.distinct())
+        )
+        .group_by(DetectionSummary.name)
+        .order_by(fn.SUM(DetectionSummary.box_count).desc(), DetectionSummary.name)
+        .tuples()
+    ]
+    # One row per video with target detections, flagging whether any of them is wildlife
+    per_video = (
+        DetectionSummary.select(fn.MAX(DetectionSummary.name != "person").alias("has_wildlife"))
+        .where(DetectionSummary.name.in_(TARGET_NAMES))
+        .group_by(DetectionSummary.video_file)
+        .alias("per_video")
+    )
+    detected, wildlife_videos = (
+        DetectionSummary.select(fn.COUNT(), fn.COALESCE(fn.SUM(per_video.c.has_wildlife), 0))
+        .from_(per_video)
+        .scalar(as_tuple=True)
+    )
+    video_count = VideoFile.select().count()
+    bin_idx = fn.MIN((VideoFile.wildlife_prop * bins).cast("INTEGER"), bins - 1)
+    histogram = [0] * bins
+    for idx, count in (
+        VideoFile.select(bin_idx, fn.COUNT()).where(VideoFile.wildlife_prop > 0).group_by(bin_idx).tuples()
+    ):
+        histogram[idx] = count
+    return LibraryStats(
+        generation=generation,
+        video_count=video_count,
+        wildlife_videos=wildlife_videos,
+        person_only_videos=detected - wildlife_videos,
+        empty_videos=video_count - detected,
+        classes=classes,
+        wildlife_prop_histogram=histogram,
+    )
+
+
+class StatsCache:
+    """
+    The library statistics of the latest catalogue generation.
+
+    Ingestion bumps the generation whenever it changes videos or annotations, so statistics are recomputed on the
+    first request after a change and served from memory until the next one.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty cache."""
+        self._stats: LibraryStats | None = None
+        self._lock = threading.Lock()
+
+    def get(self, generation: int) -> LibraryStats:
+        """
+        Get the library statistics, computing them if the generation has moved on since they were last computed.
+
+        Args:
+            generation: Current catalogue generation
+
+        Returns:
+            LibraryStats at the given generation
+        """
+        # Held while computing, so concurrent requests after a change wait for one computation rather than repeat it
+        with self._lock:
+            if self._stats is None or self._stats.generation != generation:
+                self._stats = compute_library_stats(generation)
+            return self._stats
+
+    def invalidate(self) -> None:
+        """Drop the cached statistics."""
+        with self._lock:
+            self._stats = None
+
+
+STATS_CACHE = StatsCache()
@@ -0,0 +1,123 @@
+"""In-memory LRU cache of thumbnail images for the API server."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from garden_eye import CONFIG
+from garden_eye.api.database import get_thumbnail_path
+
+
+@dataclass(frozen=True)
+class CachedThumbnail:
+    """A thumbnail's bytes and the validators used to detect and advertise changes."""
+
+    content: bytes
+    etag: str  # Quoted ETag header value
+    mtime_ns: int  # File modification time when read
+    size: int  # File size in bytes when read
+
+
+def _read_thumbnail(video_id: int) -> CachedThumbnail | None:
+    """
+    Read a thumbnail from disk.
+
+    Args:
+        video_id: Video id
+
+    Returns:
+        CachedThumbnail, or None if the video has no thumbnail
+    """
+    path = get_thumbnail_path(video_id)
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            content = f.read()
+    except FileNotFoundError:
+        return None
+    digest = hashlib.blake2b(f"{video_id}-{st.st_mtime_ns}-{st.st_size}".encode(), digest_size=8).hexdigest()
+    return CachedThumbnail(content=content, etag=f'"{digest}"', mtime_ns=st.st_mtime_ns, size=st.st_size)
+
+
+class ThumbnailCache:
+    """
+    Size-bounded LRU of thumbnails keyed by video id.
+
+    Ingestion runs in a separate process, so every access checks the file's stat against the cached entry: a hit
+    costs one stat call and never touches the database, and a regenerated or removed thumbnail is noticed at once.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        Create an empty cache.
+
+        Args:
+            max_bytes: Total thumbnail bytes to keep in memory
+        """
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, CachedThumbnail] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached thumbnails."""
+        return len(self._entries)
+
+    def get(self, video_id: int) -> CachedThumbnail | None:
+        """
+        Get a video's thumbnail, reading it from disk on a miss or if the file has changed.
+
+        Args:
+            video_id: Video id
+
+        Returns:
+            CachedThumbnail, or None if the video has no thumbnail
+        """
+        try:
+            st = os.stat(get_thumbnail_path(video_id))
+        except FileNotFoundError:
+            self.invalidate(video_id)
+            return None
+        with self._lock:
+            cached = self._entries.get(video_id)
+            if cached is not None and (st.st_mtime_ns, st.st_size) == (cached.mtime_ns, cached.size):
+                self._entries.move_to_end(video_id)
+                return cached
+
+        # Disk reads happen outside the lock so a miss doesn't stall hits on other thumbnails
+        thumbnail = _read_thumbnail(video_id)
+        with self._lock:
+            self._remove(video_id)
+            if thumbnail is not None and thumbnail.size <= self.max_bytes:
+                self._entries[video_id] = thumbnail
+                self._total_bytes += thumbnail.size
+                while self._total_bytes > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+        return thumbnail
+
+    def invalidate(self, video_id: int | None = None) -> None:
+        """
+        Drop a thumbnail from the cache, or every thumbnail if no id is given.
+
+        Args:
+            video_id: Video id, or None to clear the cache
+        """
+        with self._lock:
+            if video_id is None:
+                self._entries.clear()
+                self._total_bytes = 0
+            else:
+                self._remove(video_id)
+
+    def _remove(self, video_id: int) -> None:
+        """Remove an entry, if present; the caller must hold the lock."""
+        removed = self._entries.pop(video_id, None)
+        if removed is not None:
+            self._total_bytes -= removed.size
+
+
+THUMBNAIL_CACHE = ThumbnailCache(CONFIG.thumbnail_cache_mib * 1024 * 1024)
@@ -1,11 +1,47 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import yaml
 
 CONFIG_PATH = Path(__file__).parents[3] / "config.yaml"
+ANNOTATION_STORAGE_MODES = ("rows", "packed", "tracks")
+
+
+@dataclass(frozen=True)
+class DatabaseConfig:
+    """SQLite tuning, mapping the optional `database` section of config.yaml."""
+
+    journal_mode: str = "wal"  # WAL lets API readers proceed while ingestion holds a write transaction
+    synchronous: str = "normal"  # Durable at checkpoints, which is safe with WAL and far fewer fsyncs
+    cache_size_mib: int = 64  # Page cache per connection
+    mmap_size_mib: int = 256  # Memory-mapped I/O window per connection, 0 to disable
+    busy_timeout_s: float = 30.0  # How long a connection waits for a lock before raising
+
+
+@dataclass(frozen=True)
+class IngestConfig:
+    """Ingestion pipeline tuning, mapping the optional `ingest` section of config.yaml."""
+
+    decode_workers: int = 2  # Processes decoding and downscaling video frames
+    batch_frames: int = 64  # Frames per inference batch, which is also the size of each decoded chunk
+    max_decode_width: int = 640  # Wider frames are downscaled before inference, matching the model's input size
+    queue_chunks: int = 8  # Decoded chunks buffered ahead of inference
+    thumbnail_workers: int = 2  # Threads generating thumbnails
+    probe_workers: int = 4  # ffprobe processes reading video metadata at once
+    log_interval_s: float = 10.0  # How often stage throughput is logged
+    frame_stride: int = 1  # Run detection on every Nth frame only
+    # Skip detection on frames whose mean grayscale change (0-255) since the last detected frame is at most this,
+    # reusing that frame's detections, 0 to disable
+    motion_threshold: float = 0.0
+    settle_s: float = 60.0  # Files modified more recently than this may still be uploading, so wait before ingesting
+    watch_interval_s: float = 60.0  # Time between library scans in watch mode
+    # Tracking, used by the "tracks" annotation storage mode
+    track_iou_threshold: float = 0.3  # Minimum overlap for a box to continue a track
+    track_max_gap: int = 15  # Frames a track may go undetected, e.g. through brief occlusion, before it ends
+    keyframe_tolerance_px: float = 2.0  # Largest error of a box coordinate when interpolating between keyframes
+    keyframe_tolerance_confidence: float = 0.05  # Largest error of a confidence when interpolating keyframes
 
 
 @dataclass(frozen=True)
@@ -13,10 +49,28 @@ class Config:
     """One-to-one mapping with config.yaml."""
 
     data_root: Path
+    # "rows" for one database row per box, "packed" for one blob per video, "tracks" for one row per tracked object
+    annotation_storage: str = "rows"
+    database: DatabaseConfig = field(default_factory=DatabaseConfig)
+    ingest: IngestConfig = field(default_factory=IngestConfig)
+    stream_chunk_size_kib: int = 1024  # Size of each body chunk when streaming video without zero-copy support
+    thumbnail_cache_mib: int = 64  # Memory budget for thumbnails held by the API server, 0 to disable
 
     @staticmethod
     def load() -> Config:
         """Load the config from disk."""
         with open(CONFIG_PATH) as f:
             raw_config = yaml.safe_load(f)
-        return Config(data_root=Path(raw_config["data_root"]))
+        annotation_storage = raw_config.get("annotation_storage", "rows")
+        if annotation_storage not in ANNOTATION_STORAGE_MODES:
+            raise ValueError(
+                f"annotation_storage must be one of {ANNOTATION_STORAGE_MODES}, got {annotation_storage!r}"
+            )
+        return Config(
+            data_root=Path(raw_config["data_root"]),
+            annotation_storage=annotation_storage,
+            database=DatabaseConfig(**raw_config.get("database", {})),
+            ingest=IngestConfig(**raw_config.get("ingest", {})),
+            stream_chunk_size_kib=int(raw_config.get("stream_chunk_size_kib", 1024)),
+            thumbnail_cache_mib=int(raw_config.get("thumbnail_cache_mib", 64)),
+        )
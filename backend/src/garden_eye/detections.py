@@ -0,0 +1,247 @@
+"""
+Struct-of-arrays representation of a video's detections.
+
+The packed wire format produced by `DetectionArrays.to_wire` is, all little-endian:
+
+- 4 bytes: magic `GEA1`
+- uint32: length H of the JSON header
+- H bytes: UTF-8 JSON header `{"count": N, "frame_count": F, "names": {class_id: name}}`, space padded to 4 bytes
+- int32[F + 1]: frame offsets, the boxes for frame f are at indices [offsets[f], offsets[f + 1])
+- int32[N]: class ids
+- float32[N]: confidences
+- float32[N * 4]: boxes as x1, y1, x2, y2
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import zlib
+from collections.abc import Collection, Iterable
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+WIRE_MAGIC = b"GEA1"
+
+# Row layout accepted by DetectionArrays.from_rows
+DetectionRow = tuple[int, int, str, float, float, float, float, float]
+
+
+@dataclass(frozen=True)
+class DetectionArrays:
+    """Detections for one video as parallel arrays, sorted by frame index."""
+
+    frame_idx: npt.NDArray[np.int32]
+    class_id: npt.NDArray[np.int32]
+    # Held as float64 so values read from the database round-trip exactly; packed formats store float32
+    confidence: npt.NDArray[np.float64]
+    boxes: npt.NDArray[np.float64]  # Shape (N, 4) of x1, y1, x2, y2
+    names: dict[int, str]  # Class id to object class name
+
+    @staticmethod
+    def from_rows(rows: Iterable[DetectionRow]) -> DetectionArrays:
+        """
+        Build arrays from (frame_idx, class_id, name, confidence, x1, y1, x2, y2) rows in any order.
+
+        Args:
+            rows: Detection rows, e.g. straight from an annotation query
+
+        Returns:
+            DetectionArrays sorted by frame index
+        """
+        rows = list(rows)
+        names = {class_id: name for _, class_id, name, *_ in rows}
+        frame_idx = np.fromiter((row[0] for row in rows), dtype=np.int32, count=len(rows))
+        class_id = np.fromiter((row[1] for row in rows), dtype=np.int32, count=len(rows))
+        values = np.array([row[3:] for row in rows], dtype=np.float64).reshape(len(rows), 5)
+        # Stable sort keeps the original order of boxes within a frame
+        order = np.argsort(frame_idx, kind="stable")
+        return DetectionArrays(
+            frame_idx=frame_idx[order],
+            class_id=class_id[order],
+            confidence=np.ascontiguousarray(values[order, 0]),
+            boxes=np.ascontiguousarray(values[order, 1:]),
+            names=names,
+        )
+
+    @staticmethod
+    def empty() -> DetectionArrays:
+        """
+        Build arrays holding no detections.
+
+        Returns:
+            Empty DetectionArrays
+        """
+        return DetectionArrays(
+            frame_idx=np.empty(0, dtype=np.int32),
+            class_id=np.empty(0, dtype=np.int32),
+            confidence=np.empty(0),
+            boxes=np.empty((0, 4)),
+            names={},
+        )
+
+    @staticmethod
+    def concatenate(parts: Iterable[DetectionArrays]) -> DetectionArrays:
+        """
+        Join detections from consecutive windows of one video.
+
+        Args:
+            parts: DetectionArrays whose frame ranges are in increasing order and don't overlap
+
+        Returns:
+            Single DetectionArrays holding every detection, still sorted by frame index
+        """
+        parts = list(parts)
+        names: dict[int, str] = {}
+        for part in parts:
+            names.update(part.names)
+        return DetectionArrays(
+            frame_idx=np.concatenate([np.empty(0, dtype=np.int32), *(part.frame_idx for part in parts)]),
+            class_id=np.concatenate([np.empty(0, dtype=np.int32), *(part.class_id for part in parts)]),
+            confidence=np.concatenate([np.empty(0), *(part.confidence for part in parts)]),
+            boxes=np.concatenate([np.empty((0, 4)), *(part.boxes for part in parts)]),
+            names=names,
+        )
+
+    def __len__(self) -> int:
+        """Return the number of detections."""
+        return len(self.frame_idx)
+
+    @property
+    def frame_count(self) -> int:
+        """Number of frames covered, i.e. one past the last frame with a detection."""
+        return int(self.frame_idx[-1]) + 1 if len(self) else 0
+
+    def at_frame(self, frame_idx: int) -> DetectionArrays:
+        """
+        Copy the detections onto a single frame, e.g. to repeat one frame's detections on a later, unchanged frame.
+
+        Args:
+            frame_idx: Frame index given to every detection
+
+        Returns:
+            New DetectionArrays sharing the box data, with every detection on frame_idx
+        """
+        return DetectionArrays(
+            frame_idx=np.full(len(self), frame_idx, dtype=np.int32),
+            class_id=self.class_id,
+            confidence=self.confidence,
+            boxes=self.boxes,
+            names=self.names,
+        )
+
+    def frame_offsets(self) -> npt.NDArray[np.int32]:
+        """
+        Build a dense offset table for O(1) lookup of a frame's detections.
+
+        Returns:
+            Array of length frame_count + 1 where frame f's detections are at [offsets[f], offsets[f + 1])
+        """
+        return np.searchsorted(self.frame_idx, np.arange(self.frame_count + 1), side="left").astype(np.int32)
+
+    def select(self, names: Collection[str] | None = None, min_confidence: float | None = None) -> DetectionArrays:
+        """
+        Filter detections by class name and confidence.
+
+        Args:
+            names: Object class names to keep; all classes are kept if None
+            min_confidence: Optional minimum detection confidence (inclusive)
+
+        Returns:
+            New DetectionArrays containing only the matching detections
+        """
+        keep = np.ones(len(self), dtype=bool)
+        if names is not None:
+            keep &= np.isin(self.class_id, [class_id for class_id, name in self.names.items() if name in names])
+        if min_confidence is not None:
+            keep &= self.confidence >= min_confidence
+        kept_ids = set(np.unique(self.class_id[keep]).tolist())
+        return DetectionArrays(
+            frame_idx=self.frame_idx[keep],
+            class_id=self.class_id[keep],
+            confidence=self.confidence[keep],
+            boxes=self.boxes[keep],
+            names={class_id: name for class_id, name in self.names.items() if class_id in kept_ids},
+        )
+
+    def to_wire(self) -> bytes:
+        """
+        Serialise to the packed binary wire format described in the module docstring.
+
+        Returns:
+            Packed bytes
+        """
+        header = json.dumps(
+            {"count": len(self), "frame_count": self.frame_count, "names": self.names}, separators=(",", ":")
+        ).encode()
+        # Pad so the typed arrays that follow start on a 4-byte boundary
+        header += b" " * (-len(header) % 4)
+        return b"".join(
+            [
+                WIRE_MAGIC,
+                struct.pack("<I", len(header)),
+                header,
+                self.frame_offsets().astype("<i4").tobytes(),
+                self.class_id.astype("<i4").tobytes(),
+                self.confidence.astype("<f4").tobytes(),
+                self.boxes.astype("<f4").tobytes(),
+            ]
+        )
+
+    @staticmethod
+    def from_wire(data: bytes) -> DetectionArrays:
+        """
+        Deserialise bytes produced by to_wire.
+
+        Args:
+            data: Packed bytes
+
+        Returns:
+            Decoded DetectionArrays
+        """
+        if data[:4] != WIRE_MAGIC:
+            raise ValueError("Not a packed detections payload")
+        (header_len,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8 : 8 + header_len])
+        count, frame_count = header["count"], header["frame_count"]
+        offset = 8 + header_len
+        offsets = np.frombuffer(data, dtype="<i4", count=frame_count + 1, offset=offset)
+        offset += offsets.nbytes
+        class_id = np.frombuffer(data, dtype="<i4", count=count, offset=offset)
+        offset += class_id.nbytes
+        confidence = np.frombuffer(data, dtype="<f4", count=count, offset=offset)
+        offset += confidence.nbytes
+        boxes = np.frombuffer(data, dtype="<f4", count=count * 4, offset=offset).reshape(count, 4)
+        # Expand the offset table back into a per-detection frame index
+        frame_idx = np.repeat(np.arange(frame_count, dtype=np.int32), np.diff(offsets))
+        return DetectionArrays(
+            frame_idx=frame_idx,
+            class_id=class_id.astype(np.int32),
+            confidence=confidence.astype(np.float64),
+            boxes=boxes.astype(np.float64),
+            names={int(key): name for key, name in header["names"].items()},
+        )
+
+    def to_blob(self) -> bytes:
+        """
+        Serialise to a compressed blob for database storage.
+
+        Returns:
+            zlib-compressed wire format bytes
+        """
+        return zlib.compress(self.to_wire(), level=6)
+
+    @staticmethod
+    def from_blob(blob: bytes) -> DetectionArrays:
+        """
+        Deserialise a blob produced by to_blob.
+
+        Args:
+            blob: Compressed bytes
+
+        Returns:
+            Decoded DetectionArrays
+        """
+        return DetectionArrays.from_wire(zlib.decompress(blob))
@@ -0,0 +1,183 @@
+"""Video decoding for the ingestion pipeline."""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+try:
+    import cv2
+except ImportError:  # OpenCV is only needed by ingestion, not by the API server
+    cv2 = None
+
+# Approximate (width, height) of the grid frames are sampled on when checking for motion
+MOTION_GRID = (64, 36)
+
+
+@dataclass(frozen=True)
+class DecodeTask:
+    """A video to decode into chunks of frames."""
+
+    video_id: int
+    path: Path
+    chunk_frames: int  # Frames to run detection on per chunk
+    max_width: int  # Frames wider than this are downscaled, preserving aspect ratio
+    frame_stride: int = 1  # Only every Nth frame is sampled
+    motion_threshold: float = 0.0  # Sampled frames that changed by no more than this are held, 0 to disable
+    thumbnail_s: float | None = 1.0  # Time of the frame to capture as the thumbnail, or None for no thumbnail
+    thumbnail_size: tuple[int, int] = (280, 157)  # Thumbnail (width, height)
+
+
+@dataclass(frozen=True)
+class FrameChunk:
+    """A run of consecutive frames from one video, of which the sampled ones are either decoded or held."""
+
+    video_id: int
+    start_frame: int  # Index of the first frame in the video
+    end_frame: int  # Index one past the last frame in the chunk
+    frame_idx: npt.NDArray[np.int32]  # Video frame index of each sampled frame
+    held: npt.NDArray[np.bool_]  # Sampled frames that barely changed, which repeat the previous frame's detections
+    frames: npt.NDArray[np.uint8]  # Shape (N, H, W, 3) of BGR frames for the sampled frames that aren't held
+    scale: tuple[float, float]  # Multiply x and y coordinates in these frames by this to get source pixels
+    last: bool  # Whether this is the video's final chunk
+    # BGR thumbnail captured while decoding this chunk; a later chunk's thumbnail supersedes an earlier one
+    thumbnail: npt.NDArray[np.uint8] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of sampled frames in the chunk."""
+        return len(self.frame_idx)
+
+
+def motion_signature(frame: npt.NDArray[np.uint8]) -> npt.NDArray[np.float32]:
+    """
+    Reduce a frame to a small grayscale grid that is cheap to compare.
+
+    Args:
+        frame: Shape (H, W, 3) frame
+
+    Returns:
+        Grayscale samples on a grid of roughly MOTION_GRID pixels, whatever the frame size
+    """
+    height, width = frame.shape[:2]
+    step_y = max(height // MOTION_GRID[1], 1)
+    step_x = max(width // MOTION_GRID[0], 1)
+    return frame[::step_y, ::step_x].mean(axis=2, dtype=np.float32)
+
+
+class MotionGate:
+    """Passes frames that differ enough from the last frame it passed, so detection skips static scenes."""
+
+    def __init__(self, threshold: float) -> None:
+        """
+        Create the gate; the first frame it sees always passes.
+
+        Args:
+            threshold: Mean absolute grayscale change (0-255) a frame must exceed to pass, 0 to pass every frame
+        """
+        self.threshold = threshold
+        self._reference: npt.NDArray[np.float32] | None = None
+
+    def __call__(self, frame: npt.NDArray[np.uint8]) -> bool:
+        """
+        Decide whether a frame should go through detection.
+
+        Frames are compared to the last frame that passed, not the one before them, so slow changes still accumulate
+        until they cross the threshold.
+
+        Args:
+            frame: Shape (H, W, 3) frame
+
+        Returns:
+            True if the frame has changed enough to be worth running detection on
+        """
+        if self.threshold <= 0:
+            return True
+        signature = motion_signature(frame)
+        if self._reference is not None and np.abs(signature - self._reference).mean() <= self.threshold:
+            return False
+        self._reference = signature
+        return True
+
+
+def decode_chunks(task: DecodeTask) -> Iterator[FrameChunk]:
+    """
+    Decode a video into chunks of frames, downscaling wide frames so less data crosses process boundaries.
+
+    Only every `frame_stride`-th frame is sampled, and the others are skipped without being decoded. Sampled frames
+    that the motion gate rejects are marked as held rather than shipped, as their detections are assumed unchanged.
+    Every video yields at least one chunk, and exactly one chunk has `last` set, even if it holds no frames.
+
+    The thumbnail is taken from this same decode: the first frame is captured, then replaced by the frame at
+    `thumbnail_s` if the video is that long, so no second pass over the file is needed.
+
+    Args:
+        task: Video to decode
+
+    Returns:
+        Iterator over the video's frame chunks in order
+    """
+    if cv2 is None:
+        raise RuntimeError("OpenCV is required to decode videos")
+    capture = cv2.VideoCapture(os.fspath(task.path))
+    gate = MotionGate(task.motion_threshold)
+    try:
+        frames: list[npt.NDArray[np.uint8]] = []
+        frame_idx: list[int] = []
+        held: list[bool] = []
+        start_frame = index = 0
+        scale = (1.0, 1.0)
+        thumbnail: npt.NDArray[np.uint8] | None = None
+        thumbnail_frames: set[int] = set()
+        if task.thumbnail_s is not None:
+            thumbnail_frames = {0, round(capture.get(cv2.CAP_PROP_FPS) * task.thumbnail_s)}
+
+        def make_chunk(last: bool) -> FrameChunk:
+            stacked = np.stack(frames) if frames else np.empty((0, 0, 0, 3), dtype=np.uint8)
+            return FrameChunk(
+                task.video_id,
+                start_frame,
+                index,
+                np.array(frame_idx, dtype=np.int32),
+                np.array(held, dtype=bool),
+                stacked,
+                scale,
+                last=last,
+                thumbnail=thumbnail,
+            )
+
+        # Grabbing without retrieving skips the colour conversion of frames that aren't sampled
+        while capture.grab():
+            index += 1
+            sampled = (index - 1) % task.frame_stride == 0
+            if not sampled and index - 1 not in thumbnail_frames:
+                continue
+            ok, frame = capture.retrieve()
+            if not ok:
+                break
+            if index - 1 in thumbnail_frames:
+                thumbnail = cv2.resize(frame, task.thumbnail_size, interpolation=cv2.INTER_AREA)
+            if not sampled:
+                continue
+            frame_idx.append(index - 1)
+            held.append(not gate(frame))
+            if held[-1]:
+                continue
+            height, width = frame.shape[:2]
+            if width > task.max_width:
+                size = (task.max_width, round(height * task.max_width / width))
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                scale = (width / size[0], height / size[1])
+            frames.append(frame)
+            if len(frames) == task.chunk_frames:
+                yield make_chunk(last=False)
+                start_frame = index
+                frames, frame_idx, held = [], [], []
+                thumbnail = None
+        yield make_chunk(last=True)
+    finally:
+        capture.release()
@@ -3,6 +3,7 @@
 from pathlib import Path
 
 import numpy as np
+import numpy.typing as npt
 from PIL import Image
 
 from garden_eye.log import get_logger
@@ -49,11 +50,24 @@ def is_night_video(thumbnail_path: Path, tolerance: float = 2.0) -> bool:
     Returns:
         True if the video appears to be a night/IR recording
     """
-    thumbnail = np.asarray(Image.open(thumbnail_path))
-    mean_rgb = thumbnail.mean(axis=(0, 1))
+    return is_night_frame(np.asarray(Image.open(thumbnail_path)), tolerance)
 
-    # Check if RGB channels are nearly equal (grayscale)
+
+def is_night_frame(frame: npt.NDArray[np.uint8], tolerance: float = 2.0) -> bool:
+    """
+    Detect if a decoded frame is from night mode (typically grayscale with IR illumination).
+
+    Args:
+        frame: Shape (H, W, 3) frame, in RGB or BGR order
+        tolerance: Maximum allowed difference between colour channels to consider grayscale
+
+    Returns:
+        True if the frame appears to be from a night/IR recording
+    """
+    mean_rgb = frame.mean(axis=(0, 1))
+
+    # Check if colour channels are nearly equal (grayscale); the comparison is symmetric, so channel order is irrelevant
     r, g, b = mean_rgb[0], mean_rgb[1], mean_rgb[2]
     max_diff = max(abs(r - g), abs(g - b), abs(r - b))
 
-    return max_diff <= tolerance
+    return bool(max_diff <= tolerance)
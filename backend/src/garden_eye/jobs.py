@@ -0,0 +1,218 @@
+"""Durable per-video ingestion state, so interrupted runs resume where they stopped."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable
+
+from peewee import JOIN, ModelSelect, chunked
+
+from garden_eye import CONFIG
+from garden_eye.api.database import (
+    IngestJob,
+    IngestRun,
+    VideoFile,
+    bump_generation,
+    get_thumbnail_path,
+    refresh_activity_timeline,
+    refresh_detection_summary,
+    refresh_sightings,
+    store_detections,
+)
+from garden_eye.detections import DetectionArrays
+from garden_eye.log import get_logger
+
+logger = get_logger(__name__)
+
+# Ingestion stages in the order they complete; a job's stage is the last one it completed
+STAGES = ("scanned", "annotated", "thumbnailed", "classified")
+
+
+def has_reached(current: str, stage: str) -> bool:
+    """
+    Check whether a job's stage is at or beyond another stage.
+
+    Args:
+        current: The job's last completed stage
+        stage: Stage to compare against
+
+    Returns:
+        True if `stage` has been completed
+    """
+    return STAGES.index(current) >= STAGES.index(stage)
+
+
+def reset_jobs(video_ids: Iterable[int]) -> None:
+    """
+    Put videos back at the start of ingestion, e.g. when they are discovered or their file changes.
+
+    Args:
+        video_ids: Ids of the videos to reset
+    """
+    now = time.time()
+    for batch in chunked(video_ids, 500):
+        rows = [{"video_file": video_id, "stage": STAGES[0], "updated": now} for video_id in batch]
+        IngestJob.insert_many(rows).on_conflict_replace().execute()
+
+
+def delete_jobs(video_ids: Iterable[int]) -> None:
+    """
+    Forget the ingestion state of videos that have been removed.
+
+    Args:
+        video_ids: Ids of the removed videos
+    """
+    for batch in chunked(video_ids, 500):
+        IngestJob.delete().where(IngestJob.video_file.in_(batch)).execute()
+
+
+def advance(video_id: int, stage: str) -> None:
+    """
+    Record that a video completed a stage, never moving a job backwards.
+
+    Call this inside the transaction that commits the stage's results, so the two can't disagree after a crash.
+
+    Args:
+        video_id: Id of the video
+        stage: Stage that was completed
+    """
+    IngestJob.update(stage=stage, updated=time.time(), error=None).where(
+        (IngestJob.video_file == video_id) & IngestJob.stage.in_(STAGES[: STAGES.index(stage)])
+    ).execute()
+
+
+def fail_job(video_id: int, error: str) -> None:
+    """
+    Record that a video's next stage failed, so later runs skip it rather than failing on it again.
+
+    The job keeps its stage, and is queued again by reset_jobs when the file changes.
+
+    Args:
+        video_id: Id of the video
+        error: Description of the failure
+    """
+    IngestJob.update(error=error, updated=time.time()).where(IngestJob.video_file == video_id).execute()
+
+
+def record_annotation(
+    video_file: VideoFile,
+    detections: DetectionArrays | Iterable[DetectionArrays],
+    wildlife_prop: float,
+    frame_stride: int = CONFIG.ingest.frame_stride,
+    storage: str = CONFIG.annotation_storage,
+) -> None:
+    """
+    Store a video's detections, with everything derived from them, and advance its job in a single transaction.
+
+    The summary, activity timeline and sighting index are refreshed, and the video is marked annotated even if
+    nothing was detected.
+
+    Args:
+        video_file: VideoFile instance that was processed
+        detections: Every detection in the video, whole or as consecutive windows
+        wildlife_prop: Proportion of sampled frames containing wildlife
+        frame_stride: Detection ran on every Nth frame
+        storage: Annotation storage mode, see store_detections
+    """
+    with VideoFile._meta.database.atomic():  # type: ignore[attr-defined]
+        # Tracks, sightings and timelines are built on the sampled frames, so the stride must be recorded first
+        video_file.frame_stride = frame_stride  # type: ignore[assignment]
+        video_file.wildlife_prop = wildlife_prop  # type: ignore[assignment]
+        video_file.annotated = True  # type: ignore[assignment]
+        video_file.save(only=[VideoFile.frame_stride, VideoFile.wildlife_prop, VideoFile.annotated])
+        store_detections(video_file, detections, storage)
+        refresh_detection_summary(video_file)
+        refresh_activity_timeline(video_file)
+        refresh_sightings(video_file)
+        advance(video_file.get_id(), "annotated")
+    bump_generation()
+
+
+def backfill_jobs() -> int:
+    """
+    Create jobs for videos ingested before job state was recorded, inferring their stage from what exists.
+
+    Returns:
+        Number of jobs created
+    """
+    missing = (
+        VideoFile.select(VideoFile.id, VideoFile.annotated)
+        .join(IngestJob, JOIN.LEFT_OUTER, on=IngestJob.video_file == VideoFile.id)
+        .where(IngestJob.id.is_null())  # type: ignore[attr-defined]
+        .tuples()
+    )
+    now = time.time()
+    rows = []
+    for video_id, annotated in missing:
+        stage = STAGES[0]
+        if annotated:
+            # Thumbnails were always classified as soon as they were created
+            stage = "classified" if get_thumbnail_path(video_id).exists() else "annotated"
+        rows.append({"video_file": video_id, "stage": stage, "updated": now})
+    for batch in chunked(rows, 500):
+        IngestJob.insert_many(batch).execute()
+    return len(rows)
+
+
+def select_incomplete() -> ModelSelect:
+    """
+    Build a query for videos with stages still to run, leaving out those whose last attempt failed.
+
+    Returns:
+        Query over VideoFile, ordered by path
+    """
+    return (
+        VideoFile.select()
+        .join(IngestJob, on=IngestJob.video_file == VideoFile.id)
+        .where((IngestJob.stage != STAGES[-1]) & IngestJob.error.is_null())
+        .order_by(VideoFile.path)
+    )
+
+
+def get_stages(video_ids: Iterable[int]) -> dict[int, str]:
+    """
+    Look up the stage of several videos.
+
+    Args:
+        video_ids: Ids of the videos
+
+    Returns:
+        Mapping of video id to its last completed stage
+    """
+    stages: dict[int, str] = {}
+    for batch in chunked(video_ids, 500):
+        query = IngestJob.select(IngestJob.video_file, IngestJob.stage).where(IngestJob.video_file.in_(batch))
+        stages.update(query.tuples())
+    return stages
+
+
+def start_run() -> IngestRun:
+    """
+    Record the start of an ingestion run, closing off any earlier run that was killed without finishing.
+
+    Returns:
+        The new run
+    """
+    for run in IngestRun.select().where(IngestRun.status == "running"):
+        logger.warning(f"Ingestion run {run.id} stopped without finishing; resuming from its last committed video")
+        run.status = "interrupted"
+        run.save(only=[IngestRun.status])
+    queued = select_incomplete().count()
+    return IngestRun.create(started=time.time(), queued=queued)
+
+
+def finish_run(run: IngestRun, status: str) -> None:
+    """
+    Record how an ingestion run ended.
+
+    Args:
+        run: Run started by start_run
+        status: "completed", "interrupted" or "failed"
+    """
+    run.finished = time.time()  # type: ignore[assignment]
+    run.status = status  # type: ignore[assignment]
+    run.completed = (  # type: ignore[assignment]
+        IngestJob.select().where((IngestJob.stage == STAGES[-1]) & (IngestJob.updated >= run.started)).count()
+    )
+    run.save()
+    logger.info(f"Ingestion run {run.id} {status}: {run.completed} of {run.queued} queued videos finished")
@@ -0,0 +1,352 @@
+"""Bounded-queue stages for running ingestion as a multi-stage pipeline."""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import multiprocessing.queues
+import queue
+import threading
+import time
+import traceback
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from types import TracebackType
+
+from garden_eye.log import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds to wait for a worker's output before checking that every worker is still alive
+WORKER_POLL_S = 1.0
+
+
+@dataclass(frozen=True)
+class _WorkerDone:
+    """Sent by a worker process when it runs out of tasks, or fails."""
+
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class _TaskFailed[T]:
+    """Sent by a worker process in place of the rest of a task's items when fn raises on it."""
+
+    task: T
+    error: str
+
+
+def _process_worker[T, U](
+    fn: Callable[[T], Iterable[U]],
+    tasks: mp.queues.Queue[T | None],
+    out: mp.queues.Queue[U | _WorkerDone | _TaskFailed[T]],
+    skip_failed: bool,
+) -> None:
+    """Apply fn to tasks until a None task arrives, forwarding every item it yields."""
+    try:
+        while (task := tasks.get()) is not None:
+            try:
+                for item in fn(task):
+                    out.put(item)
+            except Exception:
+                if not skip_failed:
+                    raise
+                out.put(_TaskFailed(task, traceback.format_exc()))
+    except BaseException:
+        out.put(_WorkerDone(error=traceback.format_exc()))
+        raise
+    out.put(_WorkerDone())
+
+
+class ProcessStage[T, U]:
+    """
+    Run a generator function over tasks in a pool of worker processes.
+
+    Workers block once `queue_size` items are waiting, so a slow consumer bounds the memory held by fast producers.
+    A worker that fails or dies raises RuntimeError in the consumer rather than leaving it waiting forever, unless
+    `on_error` is given, in which case a task that raises is reported through it and the worker moves on.
+    The spawn start method is used so workers never inherit CUDA state or open database connections.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[T], Iterable[U]],
+        workers: int,
+        queue_size: int,
+        on_error: Callable[[T, str], U] | None = None,
+    ) -> None:
+        """
+        Create the stage.
+
+        Args:
+            fn: Picklable, module-level function mapping one task to the items it produces
+            workers: Number of worker processes
+            queue_size: Maximum number of produced items waiting to be consumed
+            on_error: Called in this process with a failed task and its traceback, returning the item yielded in
+                place of the task's remaining items; if None, the first failure stops the stage
+        """
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size
+        self.on_error = on_error
+
+    def run(self, tasks: Iterable[T]) -> Iterator[U]:
+        """
+        Process tasks, yielding items in the order they are produced.
+
+        Items from one task arrive in order, but items of tasks handled by different workers are interleaved.
+
+        Args:
+            tasks: Picklable tasks
+
+        Returns:
+            Iterator over every item produced by every task
+        """
+        context = mp.get_context("spawn")
+        task_queue: mp.queues.Queue[T | None] = context.Queue()
+        out_queue: mp.queues.Queue[U | _WorkerDone | _TaskFailed[T]] = context.Queue(maxsize=self.queue_size)
+        for task in tasks:
+            task_queue.put(task)
+        for _ in range(self.workers):
+            task_queue.put(None)
+        processes = [
+            context.Process(
+                target=_process_worker, args=(self.fn, task_queue, out_queue, self.on_error is not None), daemon=True
+            )
+            for _ in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            finished = 0
+            while finished < self.workers:
+                try:
+                    item = out_queue.get(timeout=WORKER_POLL_S)
+                except queue.Empty:
+                    # A worker killed outright, e.g. by a segfault or the OOM killer, never sends _WorkerDone
+                    for process in processes:
+                        if process.exitcode not in (None, 0):
+                            raise RuntimeError(f"Worker process died with exit code {process.exitcode}") from None
+                    continue
+                if isinstance(item, _WorkerDone):
+                    if item.error is not None:
+                        raise RuntimeError(f"Worker process failed:\n{item.error}")
+                    finished += 1
+                elif isinstance(item, _TaskFailed):
+                    # Only sent when on_error is set
+                    yield self.on_error(item.task, item.error)  # type: ignore[misc]
+                else:
+                    yield item
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+
+_STOP = object()
+
+
+class ThreadStage[T]:
+    """
+    Consume items on worker threads fed through a bounded queue.
+
+    Used as a context manager: leaving the block waits for queued items to be processed, and an error raised by a
+    worker is re-raised in the producer on the next `put` or on exit.
+    """
+
+    def __init__(self, fn: Callable[[T], None], workers: int = 1, queue_size: int = 16, name: str = "stage") -> None:
+        """
+        Create the stage.
+
+        Args:
+            fn: Function applied to each item
+            workers: Number of worker threads
+            queue_size: Maximum number of items waiting to be processed
+            name: Thread name prefix, for logs and debugging
+        """
+        self.fn = fn
+        self._queue: queue.Queue[object] = queue.Queue(maxsize=queue_size)
+        self._error: BaseException | None = None
+        self._threads = [threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+
+    def __enter__(self) -> ThreadStage[T]:
+        """Start the worker threads."""
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None
+    ) -> None:
+        """Wait for queued items to be processed and re-raise any worker error."""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        if exc is None:
+            self._raise_error()
+
+    def put(self, item: T) -> None:
+        """
+        Queue an item, blocking while the queue is full.
+
+        Args:
+            item: Item to process
+        """
+        self._raise_error()
+        self._queue.put(item)
+
+    def _work(self) -> None:
+        """Process items until told to stop; after an error, keep draining so producers never block forever."""
+        while (item := self._queue.get()) is not _STOP:
+            if self._error is not None:
+                continue
+            try:
+                self.fn(item)  # type: ignore[arg-type]
+            except BaseException as e:
+                logger.exception("Error in pipeline stage")
+                self._error = e
+
+    def _raise_error(self) -> None:
+        """Re-raise the first worker error in the calling thread."""
+        if self._error is not None:
+            raise RuntimeError("Pipeline stage failed") from self._error
+
+
+@dataclass
+class _BatchEntry[K, T, R]:
+    """A queued group of items waiting for their results."""
+
+    key: K
+    items: Sequence[T]
+    results: list[R]
+    submitted: int = 0  # Number of items already sent to a batch
+
+
+class InferenceBatcher[K, T, R]:
+    """
+    Pack items from many small groups, e.g. the frames of several short clips, into fixed-size batches.
+
+    Groups are queued with `add` and may be split across batches. Each group's results are handed back, together
+    with its key, once all of them are available, and groups always complete in the order they were added.
+    """
+
+    def __init__(self, fn: Callable[[list[T]], Iterable[R]], batch_size: int) -> None:
+        """
+        Create the batcher.
+
+        Args:
+            fn: Function returning one result per item of the batch it is given, in order
+            batch_size: Items per call to fn; only the final flushed batch may be smaller
+        """
+        self.fn = fn
+        self.batch_size = batch_size
+        self.batches = 0
+        self.items = 0
+        self._queue: deque[_BatchEntry[K, T, R]] = deque()
+        self._waiting = 0  # Items queued but not yet sent to a batch
+
+    @property
+    def mean_fill(self) -> float:
+        """Average proportion of each batch that was filled with items."""
+        return self.items / (self.batches * self.batch_size) if self.batches else 0.0
+
+    def add(self, key: K, items: Sequence[T]) -> list[tuple[K, list[R]]]:
+        """
+        Queue a group of items, running every batch that is now full.
+
+        Args:
+            key: Identifies the group in the returned results
+            items: Items of the group, possibly none
+
+        Returns:
+            (key, results) for each group that completed, in the order they were added
+        """
+        self._queue.append(_BatchEntry(key, items, []))
+        self._waiting += len(items)
+        while self._waiting >= self.batch_size:
+            self._run_batch()
+        return self._pop_complete()
+
+    def flush(self) -> list[tuple[K, list[R]]]:
+        """
+        Run any partly filled batch, completing every queued group.
+
+        Returns:
+            (key, results) for each remaining group, in the order they were added
+        """
+        while self._waiting:
+            self._run_batch()
+        return self._pop_complete()
+
+    def _run_batch(self) -> None:
+        """Send up to batch_size waiting items to fn and distribute the results to their groups."""
+        batch: list[T] = []
+        owners: list[tuple[_BatchEntry[K, T, R], int]] = []
+        for entry in self._queue:
+            take = min(len(entry.items) - entry.submitted, self.batch_size - len(batch))
+            if take > 0:
+                batch.extend(entry.items[entry.submitted : entry.submitted + take])
+                owners.append((entry, take))
+                entry.submitted += take
+            if len(batch) == self.batch_size:
+                break
+        results = iter(self.fn(batch))
+        for entry, count in owners:
+            entry.results.extend(next(results) for _ in range(count))
+        self._waiting -= len(batch)
+        self.batches += 1
+        self.items += len(batch)
+
+    def _pop_complete(self) -> list[tuple[K, list[R]]]:
+        """Remove groups from the front of the queue that have all their results."""
+        complete = []
+        while self._queue and len(self._queue[0].results) == len(self._queue[0].items):
+            entry = self._queue.popleft()
+            complete.append((entry.key, entry.results))
+        return complete
+
+
+class ThroughputMeter:
+    """Count frames through a stage and periodically log the rate in frames per second."""
+
+    def __init__(self, label: str, interval_s: float = 10.0, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Create the meter; timing starts immediately.
+
+        Args:
+            label: Name of the stage, used in log messages
+            interval_s: Minimum time between progress logs
+            clock: Monotonic clock in seconds
+        """
+        self.label = label
+        self.interval_s = interval_s
+        self.clock = clock
+        self.frames = 0
+        self.start = self._last_log = clock()
+        self._last_frames = 0
+
+    @property
+    def fps(self) -> float:
+        """Average frames per second since the meter was created."""
+        elapsed = self.clock() - self.start
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+    def add(self, frames: int) -> None:
+        """
+        Record processed frames, logging the recent rate if the interval has elapsed.
+
+        Args:
+            frames: Number of frames processed since the last call
+        """
+        self.frames += frames
+        now = self.clock()
+        if now - self._last_log >= self.interval_s:
+            recent = (self.frames - self._last_frames) / (now - self._last_log)
+            logger.info(f"{self.label}: {recent:.1f} frames/s ({self.frames} frames)")
+            self._last_log, self._last_frames = now, self.frames
+
+    def summary(self) -> str:
+        """Describe the overall throughput."""
+        return f"{self.label}: {self.frames} frames in {self.clock() - self.start:.1f}s ({self.fps:.1f} frames/s)"
@@ -0,0 +1,156 @@
+"""Video stream metadata read from container headers with ffprobe, without decoding any frames."""
+
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from fractions import Fraction
+from pathlib import Path
+from typing import Any
+
+from peewee import chunked
+
+from garden_eye import CONFIG
+from garden_eye.api.database import VideoFile, bump_generation, refresh_activity_timeline
+from garden_eye.log import get_logger
+
+logger = get_logger(__name__)
+
+# Stream and container fields requested from ffprobe; everything else in the header is skipped
+PROBE_ENTRIES = "stream=codec_name,width,height,avg_frame_rate,r_frame_rate,nb_frames,duration:format=duration"
+# Probed videos committed per transaction
+PROBE_BATCH_SIZE = 50
+
+
+@dataclass(frozen=True)
+class VideoMetadata:
+    """Properties of a video's first video stream, matching the metadata columns of VideoFile."""
+
+    fps: float  # Average frame rate
+    frame_count: int  # Number of frames, estimated from the duration if the container doesn't record it
+    duration: float  # Length in seconds
+    codec: str  # ffprobe codec name, e.g. "h264"
+    width: int  # Frame width in pixels
+    height: int  # Frame height in pixels
+
+
+def parse_probe(data: dict[str, Any]) -> VideoMetadata | None:
+    """
+    Extract video metadata from ffprobe's JSON output.
+
+    Args:
+        data: Parsed output of ffprobe run with `-show_entries PROBE_ENTRIES -of json`
+
+    Returns:
+        VideoMetadata, or None if there is no video stream with a usable frame rate and duration
+    """
+    streams = data.get("streams") or []
+    if not streams:
+        return None
+    stream = streams[0]
+    # The average rate is "0/0" for some streams, in which case the base rate is the best estimate
+    fps = _frame_rate(stream.get("avg_frame_rate")) or _frame_rate(stream.get("r_frame_rate"))
+    duration = float(stream.get("duration") or data.get("format", {}).get("duration") or 0)
+    if fps <= 0 or duration <= 0:
+        return None
+    frame_count = int(stream.get("nb_frames") or round(duration * fps))
+    return VideoMetadata(
+        fps=fps,
+        frame_count=frame_count,
+        duration=duration,
+        codec=str(stream.get("codec_name", "")),
+        width=int(stream.get("width", 0)),
+        height=int(stream.get("height", 0)),
+    )
+
+
+def _frame_rate(value: str | None) -> float:
+    """
+    Parse a frame rate as ffprobe writes it, e.g. "30000/1001".
+
+    Args:
+        value: Frame rate fraction, if present
+
+    Returns:
+        Frames per second, or 0 if the rate is missing or undefined
+    """
+    try:
+        return float(Fraction(value or "0"))
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def probe_video(path: Path, ffprobe_path: str) -> VideoMetadata | None:
+    """
+    Read a video's metadata from its container header.
+
+    Args:
+        path: Video file to probe
+        ffprobe_path: ffprobe executable
+
+    Returns:
+        VideoMetadata, or None if the file couldn't be probed
+    """
+    command = [
+        ffprobe_path,
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",  # First video stream only
+        "-show_entries",
+        PROBE_ENTRIES,
+        "-of",
+        "json",
+        str(path),
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        logger.warning(f"ffprobe failed on {path}: {result.stderr.strip()}")
+        return None
+    return parse_probe(json.loads(result.stdout))
+
+
+def probe_library(workers: int = CONFIG.ingest.probe_workers) -> int:
+    """
+    Record the metadata of every video that doesn't have it yet, e.g. new videos or those ingested before it existed.
+
+    Videos that fail to probe are left without metadata and tried again on the next call. Annotated videos have their
+    activity timeline rebuilt to span the newly known frame count.
+
+    Args:
+        workers: ffprobe processes to run at once
+
+    Returns:
+        Number of videos whose metadata was recorded
+    """
+    ffprobe_path = shutil.which("ffprobe")
+    if not ffprobe_path:
+        logger.error("ffprobe not found in PATH")
+        return 0
+    missing = list(VideoFile.select(VideoFile.id, VideoFile.path).where(VideoFile.fps.is_null()).tuples())
+    if not missing:
+        return 0
+    # Probing is bound by process start-up and file I/O, so threads keep several ffprobe processes running
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda row: probe_video(row[1], ffprobe_path), missing)
+        probed = 0
+        # Results are committed in short batches as they arrive, so other writers aren't locked out for the whole
+        # library and an interruption keeps what was already probed
+        for batch in chunked(zip(missing, results, strict=True), PROBE_BATCH_SIZE):
+            with VideoFile._meta.database.atomic():  # type: ignore[attr-defined]
+                updated = [(video_id, metadata) for (video_id, _), metadata in batch if metadata is not None]
+                for video_id, metadata in updated:
+                    VideoFile.update(**asdict(metadata)).where(VideoFile.id == video_id).execute()
+                # Timelines of videos annotated before their frame count was known end at the last detection, so
+                # they are rebuilt to span the whole video
+                ids = [video_id for video_id, _ in updated]
+                for video_file in VideoFile.select().where(VideoFile.id.in_(ids) & VideoFile.annotated):
+                    refresh_activity_timeline(video_file)
+                # The metadata is served in video listings, so cached responses must be revalidated
+                if updated:
+                    bump_generation()
+                probed += len(updated)
+    return probed
@@ -0,0 +1,168 @@
+"""Incremental discovery of new, changed and removed video files."""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from peewee import chunked
+
+from garden_eye import CONFIG, RAW_DIR
+from garden_eye.api.database import (
+    ScannedDirectory,
+    VideoFile,
+    bump_generation,
+    delete_detections,
+    get_thumbnail_path,
+)
+from garden_eye.jobs import delete_jobs, reset_jobs
+
+VIDEO_SUFFIX = ".MP4"
+
+
+@dataclass
+class ScanResult:
+    """Changes to the library found by a scan."""
+
+    added: list[int] = field(default_factory=list)  # Ids of new videos
+    changed: list[int] = field(default_factory=list)  # Ids of videos whose size or modification time changed
+    removed: list[int] = field(default_factory=list)  # Ids of videos that no longer exist, now deleted
+    unsettled: int = 0  # Files left for a later scan because they were modified too recently, e.g. mid-upload
+    directories: int = 0  # Directories visited
+    listed: int = 0  # Directories whose entries were read, rather than reused from the cache
+
+    @property
+    def queued(self) -> list[int]:
+        """Ids of videos that need (re-)ingesting."""
+        return self.added + self.changed
+
+    def __str__(self) -> str:
+        """Summarise the scan for logging."""
+        return (
+            f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed, "
+            f"{self.unsettled} still being written ({self.listed}/{self.directories} directories listed)"
+        )
+
+
+def scan_library(
+    root: Path = RAW_DIR, full: bool = False, settle_s: float = CONFIG.ingest.settle_s, now: float | None = None
+) -> ScanResult:
+    """
+    Bring the VideoFile table in line with the video files under root.
+
+    Directories are walked with `os.scandir`. A directory whose modification time matches the cache has gained or
+    lost no entries, so it is not listed again: its known files and subdirectories are reused, costing one stat
+    instead of one per file. Files in listed directories are compared to the database by (size, mtime). New files
+    are added, changed ones have their detections and thumbnail cleared, and both have their ingestion job reset.
+    Files that have gone are deleted with their detections, thumbnail and job.
+
+    Files modified within `settle_s` of the scan may still be being written, so they are left alone and their
+    directory is listed again on the next scan. An unchanged directory's mtime doesn't notice a file rewritten in
+    place, which a `full` scan, listing every directory, picks up.
+
+    Args:
+        root: Directory to scan
+        full: Ignore the directory cache and check every file
+        settle_s: Minimum age in seconds of a file's modification time before it is ingested
+        now: Current time in seconds since the epoch, for testing
+
+    Returns:
+        ScanResult describing the changes made
+    """
+    now = time.time() if now is None else now
+    result = ScanResult()
+    cached = {row.path: row.mtime_ns for row in ScannedDirectory.select()}
+    cached_children: dict[Path, list[Path]] = defaultdict(list)
+    for directory in cached:
+        cached_children[directory.parent].append(directory)
+    known: dict[Path, tuple[int, int, float]] = {}
+    known_by_dir: dict[Path, list[Path]] = defaultdict(list)
+    for video_id, path, size, modified in VideoFile.select(
+        VideoFile.id, VideoFile.path, VideoFile.size, VideoFile.modified
+    ).tuples():
+        known[path] = (video_id, size, modified)
+        known_by_dir[path.parent].append(path)
+
+    seen: set[Path] = set()  # Known paths that still exist
+    new_files: list[dict[str, object]] = []
+    changed_files: dict[int, tuple[int, float]] = {}
+    listed: dict[Path, int | None] = {}  # Listed directory to its mtime, or None if it must be listed again
+    visited: set[Path] = set()
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        visited.add(directory)
+        if not full and directory in cached and cached[directory] == mtime_ns:
+            stack.extend(cached_children[directory])
+            seen.update(known_by_dir[directory])
+            continue
+        settled = True
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                    continue
+                if not entry.name.endswith(VIDEO_SUFFIX) or not entry.is_file():
+                    continue
+                path, st = Path(entry.path), entry.stat()
+                if path in known:
+                    seen.add(path)
+                if now - st.st_mtime < settle_s:
+                    settled = False
+                    result.unsettled += 1
+                elif path not in known:
+                    new_files.append({"path": path, "size": st.st_size, "modified": st.st_mtime})
+                elif known[path][1:] != (st.st_size, st.st_mtime):
+                    changed_files[known[path][0]] = (st.st_size, st.st_mtime)
+        listed[directory] = mtime_ns if settled else None
+
+    result.directories, result.listed = len(visited), len(listed)
+    result.changed = list(changed_files)
+    result.removed = [video_id for path, (video_id, _, _) in known.items() if path not in seen]
+    with VideoFile._meta.database.atomic():  # type: ignore[attr-defined]
+        for batch in chunked(new_files, 500):
+            VideoFile.insert_many(batch).execute()
+            paths = [row["path"] for row in batch]
+            result.added.extend(vf.id for vf in VideoFile.select(VideoFile.id).where(VideoFile.path.in_(paths)))
+        # Changed videos go back to the unannotated, unprobed state, ready to be ingested again
+        delete_detections(result.changed + result.removed)
+        for video_id, (size, modified) in changed_files.items():
+            VideoFile.update(
+                size=size,
+                modified=modified,
+                annotated=False,
+                wildlife_prop=0,
+                **dict.fromkeys(("fps", "frame_count", "duration", "codec", "width", "height")),
+            ).where(VideoFile.id == video_id).execute()
+        reset_jobs(result.queued)
+        delete_jobs(result.removed)
+        for batch in chunked(result.removed, 500):
+            VideoFile.delete().where(VideoFile.id.in_(batch)).execute()
+        _update_directory_cache(listed, cached.keys() - visited)
+    for video_id in result.changed + result.removed:
+        get_thumbnail_path(video_id).unlink(missing_ok=True)
+    if result.added or result.changed or result.removed:
+        bump_generation()
+    return result
+
+
+def _update_directory_cache(listed: dict[Path, int | None], gone: set[Path]) -> None:
+    """
+    Record the modification times of listed directories and forget those that have gone.
+
+    Args:
+        listed: Listed directory to its mtime, or None if it must be listed again on the next scan
+        gone: Cached directories that no longer exist
+    """
+    for batch in chunked(gone, 500):
+        ScannedDirectory.delete().where(ScannedDirectory.path.in_(batch)).execute()
+    rows = [{"path": directory, "mtime_ns": mtime_ns} for directory, mtime_ns in listed.items()]
+    for batch in chunked(rows, 500):
+        ScannedDirectory.insert_many(batch).on_conflict_replace().execute()
@@ -0,0 +1,50 @@
+"""Run-length encoding of detections into sightings, for the library-wide inverted sighting index."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from garden_eye.detections import DetectionArrays
+
+# Detections of a class at most this many frames apart belong to the same sighting, bridging brief occlusions
+SIGHTING_MAX_GAP = 30
+
+
+@dataclass(frozen=True)
+class SightingSegment:
+    """A run of frames in which a class was detected, with gaps of at most the maximum gap."""
+
+    name: str  # Object class name (e.g., "fox")
+    start_frame: int  # First frame with a detection
+    end_frame: int  # Last frame with a detection (inclusive)
+    peak_confidence: float  # Highest confidence of any detection in the run
+
+
+def find_sightings(detections: DetectionArrays, max_gap: int = SIGHTING_MAX_GAP) -> list[SightingSegment]:
+    """
+    Run-length encode a video's detections into per-class sightings.
+
+    Args:
+        detections: Detections to encode, sorted by frame index as DetectionArrays always are
+        max_gap: Largest gap in frames between detections of a class that still continues its sighting
+
+    Returns:
+        Sightings of every class, ordered by class then start frame
+    """
+    sightings: list[SightingSegment] = []
+    for class_id in np.unique(detections.class_id).tolist():
+        mask = detections.class_id == class_id
+        frames, first = np.unique(detections.frame_idx[mask], return_index=True)
+        # Highest confidence on each frame; frames are sorted, so each frame's boxes are contiguous
+        peaks = np.maximum.reduceat(detections.confidence[mask], first)
+        starts = np.flatnonzero(np.diff(frames, prepend=frames[0] - max_gap - 1) > max_gap)
+        ends = np.append(starts[1:], len(frames)) - 1
+        run_peaks = np.maximum.reduceat(peaks, starts)
+        name = detections.names[class_id]
+        sightings.extend(
+            SightingSegment(name, start, end, peak)
+            for start, end, peak in zip(frames[starts].tolist(), frames[ends].tolist(), run_peaks.tolist(), strict=True)
+        )
+    return sightings
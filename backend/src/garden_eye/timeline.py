@@ -0,0 +1,84 @@
+"""Downsampled per-video activity histograms, for drawing detections along the player's scrubber bar."""
+
+from __future__ import annotations
+
+import json
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from garden_eye.detections import DetectionArrays
+
+# Every timeline has this many equal-width bins, however long the video, so its size doesn't grow with the clip
+TIMELINE_BINS = 100
+
+
+@dataclass(frozen=True)
+class ActivityHistogram:
+    """Detections per class in each of a fixed number of equal-width time bins across a video."""
+
+    frame_count: int  # Frames in the video, which the bins divide evenly between them
+    names: list[str]  # Object class of each row of `counts`, most detected first
+    counts: npt.NDArray[np.int64]  # Shape (len(names), bins) of detections per class per bin
+
+    @property
+    def bins(self) -> int:
+        """Number of time bins."""
+        return int(self.counts.shape[1])
+
+    @staticmethod
+    def from_detections(
+        detections: DetectionArrays, frame_count: int | None, bins: int = TIMELINE_BINS
+    ) -> ActivityHistogram:
+        """
+        Bin a video's detections by frame.
+
+        Args:
+            detections: Detections to count, e.g. a video's target detections
+            frame_count: Frames in the video, or None to end the timeline at the last detection; any detections
+                beyond it fall in the last bin
+            bins: Number of time bins
+
+        Returns:
+            ActivityHistogram of the detections
+        """
+        frame_count = frame_count or detections.frame_count or 1
+        class_ids, rows, totals = np.unique(detections.class_id, return_inverse=True, return_counts=True)
+        order = np.argsort(-totals, kind="stable")
+        # Rank of each class in the output, so the most detected class is the first row
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        bin_idx = np.minimum(detections.frame_idx.astype(np.int64) * bins // frame_count, bins - 1)
+        counts = np.bincount(rank[rows] * bins + bin_idx, minlength=len(class_ids) * bins)
+        return ActivityHistogram(
+            frame_count=frame_count,
+            names=[detections.names[class_id] for class_id in class_ids[order].tolist()],
+            counts=counts.reshape(len(class_ids), bins),
+        )
+
+    def to_blob(self) -> bytes:
+        """
+        Serialise to a compressed blob for database storage.
+
+        Returns:
+            zlib-compressed JSON
+        """
+        data = {"frame_count": self.frame_count, "bins": self.bins, "names": self.names, "counts": self.counts.tolist()}
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode(), level=6)
+
+    @staticmethod
+    def from_blob(blob: bytes) -> ActivityHistogram:
+        """
+        Deserialise a blob produced by to_blob.
+
+        Args:
+            blob: Compressed bytes
+
+        Returns:
+            Decoded ActivityHistogram
+        """
+        data = json.loads(zlib.decompress(blob))
+        counts = np.array(data["counts"], dtype=np.int64).reshape(len(data["names"]), data["bins"])
+        return ActivityHistogram(frame_count=data["frame_count"], names=data["names"], counts=counts)
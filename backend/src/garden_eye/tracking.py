@@ -0,0 +1,293 @@
+"""
+IoU tracking of detections across frames, and keyframe compression of the resulting tracks.
+
+Boxes of the same class on nearby frames are linked greedily, preferring the pairs that overlap most and falling back
+to the nearest centre for small, fast objects that don't overlap from one frame to the next. Each track then keeps
+only the keyframes needed to reproduce its boxes by linear interpolation, so an animal sitting still for a whole clip
+is stored as two keyframes rather than one box per frame.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import numpy.typing as npt
+
+from garden_eye import CONFIG
+from garden_eye.detections import DetectionArrays
+
+# Layout of a track's keyframes, which is also their storage format
+KEYFRAME_DTYPE = np.dtype([("frame", "<i4"), ("box", "<f4", (4,)), ("confidence", "<f4")])
+
+# A box whose centre is within this fraction of a track's last box diagonal may continue it without overlapping
+CENTROID_RATIO = 0.5
+
+
+@dataclass(frozen=True)
+class Track:
+    """One object followed across frames, stored as the keyframes its boxes are interpolated from."""
+
+    class_id: int
+    name: str  # Object class name (e.g., "fox")
+    keyframes: npt.NDArray[np.void]  # KEYFRAME_DTYPE records sorted by frame, always including both ends
+    peak_confidence: float  # Highest confidence of any observation, which is always a keyframe
+
+    @property
+    def start_frame(self) -> int:
+        """First frame the object was detected on."""
+        return int(self.keyframes["frame"][0])
+
+    @property
+    def end_frame(self) -> int:
+        """Last frame the object was detected on (inclusive)."""
+        return int(self.keyframes["frame"][-1])
+
+    def to_blob(self) -> bytes:
+        """
+        Serialise the keyframes for database storage.
+
+        Returns:
+            Packed KEYFRAME_DTYPE records
+        """
+        return self.keyframes.tobytes()
+
+    @staticmethod
+    def from_blob(class_id: int, name: str, blob: bytes, peak_confidence: float) -> Track:
+        """
+        Rebuild a track from keyframes serialised by to_blob.
+
+        Args:
+            class_id: Numeric class ID
+            name: Object class name
+            blob: Packed keyframes
+            peak_confidence: Highest confidence of any observation
+
+        Returns:
+            Decoded Track
+        """
+        return Track(class_id, name, np.frombuffer(blob, dtype=KEYFRAME_DTYPE), peak_confidence)
+
+
+@dataclass
+class _TrackBuilder:
+    """Observations of a track that is still being followed."""
+
+    class_id: int
+    frames: list[int] = field(default_factory=list)
+    boxes: list[npt.NDArray[np.float64]] = field(default_factory=list)
+    confidence: list[float] = field(default_factory=list)
+
+    def add(self, frame: int, box: npt.NDArray[np.float64], confidence: float) -> None:
+        """Record the track's box on another frame."""
+        self.frames.append(frame)
+        self.boxes.append(box)
+        self.confidence.append(confidence)
+
+
+def box_iou(a: npt.NDArray[np.float64], b: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """
+    Compute the intersection over union of every pair of boxes.
+
+    Args:
+        a: Shape (N, 4) of x1, y1, x2, y2
+        b: Shape (M, 4) of x1, y1, x2, y2
+
+    Returns:
+        Shape (N, M) of IoU values
+    """
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def _match(
+    previous: npt.NDArray[np.float64], boxes: npt.NDArray[np.float64], iou_threshold: float
+) -> list[tuple[int, int]]:
+    """
+    Greedily pair the last boxes of open tracks with a frame's boxes.
+
+    Args:
+        previous: Shape (N, 4) of the last box of each open track
+        boxes: Shape (M, 4) of the boxes on the new frame
+        iou_threshold: Minimum IoU for an overlap match
+
+    Returns:
+        (track, box) index pairs, each track and box used at most once
+    """
+    iou = box_iou(previous, boxes)
+    centres_a = (previous[:, :2] + previous[:, 2:]) / 2
+    centres_b = (boxes[:, :2] + boxes[:, 2:]) / 2
+    distance = np.linalg.norm(centres_a[:, None] - centres_b[None], axis=2)
+    reach = CENTROID_RATIO * np.linalg.norm(previous[:, 2:] - previous[:, :2], axis=1)[:, None]
+    # Overlap matches score above 1, so they always win over centroid matches, which score in (0, 1]
+    nearby = np.where(distance <= reach, 1 - distance / np.maximum(reach, 1e-9), 0.0)
+    score = np.where(iou >= iou_threshold, 1 + iou, nearby)
+    pairs = []
+    used_tracks: set[int] = set()
+    used_boxes: set[int] = set()
+    for flat in np.argsort(-score, axis=None, kind="stable").tolist():
+        track, box = divmod(flat, score.shape[1])
+        if score[track, box] <= 0:
+            break
+        if track not in used_tracks and box not in used_boxes:
+            pairs.append((track, box))
+            used_tracks.add(track)
+            used_boxes.add(box)
+    return pairs
+
+
+def simplify_keyframes(
+    frames: npt.NDArray[np.int32],
+    boxes: npt.NDArray[np.float64],
+    confidence: npt.NDArray[np.float64],
+    tolerance: float,
+    confidence_tolerance: float,
+) -> npt.NDArray[np.void]:
+    """
+    Keep the fewest observations from which linear interpolation reproduces every box and confidence within a tolerance.
+
+    Keyframes are chosen greedily: each segment is extended for as long as interpolating between its ends stays within
+    the tolerances at every observation it spans. The most confident observation is always kept, so confidence
+    filters and peaks see the same maximum as the raw detections.
+
+    Args:
+        frames: Frame index of each observation, increasing
+        boxes: Shape (N, 4) of the observed boxes
+        confidence: Confidence of each observation
+        tolerance: Largest allowed interpolation error of any box coordinate, in pixels
+        confidence_tolerance: Largest allowed interpolation error of the confidence
+
+    Returns:
+        KEYFRAME_DTYPE records of the kept observations, including the first, the last and the most confident
+    """
+    peak = int(np.argmax(confidence))
+    keep = [0]
+    anchor = 0
+    for end in range(2, len(frames)):
+        if anchor < peak < end:
+            anchor = peak
+            keep.append(anchor)
+            if end - anchor < 2:
+                continue
+        span = slice(anchor + 1, end)
+        weight = (frames[span] - frames[anchor]) / (frames[end] - frames[anchor])
+        interpolated = boxes[anchor] + weight[:, None] * (boxes[end] - boxes[anchor])
+        interpolated_confidence = confidence[anchor] + weight * (confidence[end] - confidence[anchor])
+        if (
+            np.abs(interpolated - boxes[span]).max() > tolerance
+            or np.abs(interpolated_confidence - confidence[span]).max() > confidence_tolerance
+        ):
+            anchor = end - 1
+            keep.append(anchor)
+    if len(frames) > 1:
+        keep.append(len(frames) - 1)
+    keyframes = np.empty(len(keep), dtype=KEYFRAME_DTYPE)
+    keyframes["frame"] = frames[keep]
+    keyframes["box"] = boxes[keep]
+    keyframes["confidence"] = confidence[keep]
+    return keyframes
+
+
+def track_detections(
+    detections: DetectionArrays,
+    iou_threshold: float = CONFIG.ingest.track_iou_threshold,
+    max_gap: int = CONFIG.ingest.track_max_gap,
+    tolerance: float = CONFIG.ingest.keyframe_tolerance_px,
+    confidence_tolerance: float = CONFIG.ingest.keyframe_tolerance_confidence,
+) -> list[Track]:
+    """
+    Link a video's detections into tracks, each compressed to keyframes.
+
+    Args:
+        detections: Every detection in the video, sorted by frame index as DetectionArrays always are
+        iou_threshold: Minimum IoU for a box to continue a track by overlap
+        max_gap: Most frames a track may go undetected, e.g. through brief occlusion, before it ends
+        tolerance: Largest interpolation error of a box coordinate in pixels when choosing keyframes
+        confidence_tolerance: Largest interpolation error of the confidence when choosing keyframes
+
+    Returns:
+        Tracks ordered by start frame
+    """
+    if not len(detections):
+        return []
+    open_tracks: list[_TrackBuilder] = []
+    closed: list[_TrackBuilder] = []
+    frames, starts = np.unique(detections.frame_idx, return_index=True)
+    ends = np.append(starts[1:], len(detections))
+    for frame, start, end in zip(frames.tolist(), starts.tolist(), ends.tolist(), strict=True):
+        # Tracks unseen for longer than the gap can't be continued
+        closed.extend(track for track in open_tracks if frame - track.frames[-1] > max_gap)
+        open_tracks = [track for track in open_tracks if frame - track.frames[-1] <= max_gap]
+        for class_id in np.unique(detections.class_id[start:end]).tolist():
+            index = start + np.flatnonzero(detections.class_id[start:end] == class_id)
+            boxes = detections.boxes[index]
+            candidates = [track for track in open_tracks if track.class_id == class_id]
+            matched: set[int] = set()
+            if candidates:
+                previous = np.stack([track.boxes[-1] for track in candidates])
+                for track_idx, box_idx in _match(previous, boxes, iou_threshold):
+                    candidates[track_idx].add(frame, boxes[box_idx], float(detections.confidence[index[box_idx]]))
+                    matched.add(box_idx)
+            # Boxes that continue no open track start new ones
+            for box_idx in range(len(index)):
+                if box_idx not in matched:
+                    builder = _TrackBuilder(class_id)
+                    builder.add(frame, boxes[box_idx], float(detections.confidence[index[box_idx]]))
+                    open_tracks.append(builder)
+    builders = sorted(closed + open_tracks, key=lambda track: track.frames[0])
+    return [
+        Track(
+            builder.class_id,
+            detections.names[builder.class_id],
+            simplify_keyframes(
+                np.array(builder.frames, dtype=np.int32),
+                np.array(builder.boxes, dtype=np.float64),
+                np.array(builder.confidence, dtype=np.float64),
+                tolerance,
+                confidence_tolerance,
+            ),
+            max(builder.confidence),
+        )
+        for builder in builders
+    ]
+
+
+def expand_tracks(tracks: list[Track], frame_stride: int = 1) -> DetectionArrays:
+    """
+    Interpolate tracks back into per-frame detections.
+
+    Args:
+        tracks: Tracks to expand
+        frame_stride: Detection ran on every Nth frame, so boxes are produced on those frames only
+
+    Returns:
+        One detection per track on every sampled frame it spans, sorted by frame index
+    """
+    parts = []
+    for track in tracks:
+        keyframes = track.keyframes
+        frames = np.arange(track.start_frame, track.end_frame + 1, frame_stride, dtype=np.int32)
+        boxes = np.stack([np.interp(frames, keyframes["frame"], keyframes["box"][:, i]) for i in range(4)], axis=1)
+        parts.append(
+            DetectionArrays(
+                frame_idx=frames,
+                class_id=np.full(len(frames), track.class_id, dtype=np.int32),
+                confidence=np.interp(frames, keyframes["frame"], keyframes["confidence"]),
+                boxes=boxes,
+                names={track.class_id: track.name},
+            )
+        )
+    merged = DetectionArrays.concatenate(parts)
+    order = np.argsort(merged.frame_idx, kind="stable")
+    return DetectionArrays(
+        frame_idx=merged.frame_idx[order],
+        class_id=merged.class_id[order],
+        confidence=merged.confidence[order],
+        boxes=merged.boxes[order],
+        names=merged.names,
+    )
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from peewee import SqliteDatabase
+from starlette.types import Message, Receive, Scope, Send
+
+from garden_eye.api.caching import ConditionalJSONMiddleware, choose_encoding, etag_matches, make_etag
+from garden_eye.api.database import VideoFile, bump_generation
+from garden_eye.api.main import app
+
+
+def test__make_etag__depends_on_generation_url_and_encoding() -> None:
+    etag = make_etag(1, "/api/videos?", None)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert make_etag(1, "/api/videos?", None) == etag
+    assert make_etag(2, "/api/videos?", None) != etag
+    assert make_etag(1, "/api/videos?sort=latest", None) != etag
+    assert make_etag(1, "/api/videos?", "gzip") != etag
+
+
+def test__etag_matches__handles_lists_weak_tags_and_wildcard() -> None:
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+def test__choose_encoding__prefers_gzip_when_brotli_not_accepted() -> None:
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding(None) is None
+
+
+def test__conditional_json__returns_304_until_generation_changes(
+    test_db: SqliteDatabase, sample_video_file: Path
+) -> None:
+    VideoFile.create(path=sample_video_file, size=1, modified=1.0)
+    client = TestClient(app)
+
+    first = client.get("/api/videos", headers={"Accept-Encoding": "identity"})
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    cached = client.get("/api/videos", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert cached.content == b""
+
+    bump_generation()
+    refreshed = client.get("/api/videos", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+
+
+def test__conditional_json__not_modified_responses_carry_cors_headers(
+    test_db: SqliteDatabase, sample_video_file: Path
+) -> None:
+    VideoFile.create(path=sample_video_file, size=1, modified=1.0)
+    client = TestClient(app)
+    headers = {"Accept-Encoding": "identity", "Origin": "http://localhost:5173"}
+    etag = client.get("/api/videos", headers=headers).headers["ETag"]
+
+    cached = client.get("/api/videos", headers={**headers, "If-None-Match": etag})
+
+    assert cached.status_code == 304
+    assert "access-control-allow-origin" in cached.headers
+
+
+def test__conditional_json__compresses_large_bodies(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    for i in range(50):
+        VideoFile.create(path=temp_video_dir / f"{i}.MP4", size=1, modified=float(i))
+    client = TestClient(app)
+
+    response = client.get("/api/videos", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"].endswith('-gzip"')
+    assert len(response.json()["items"]) == 50
+    assert int(response.headers["Content-Length"]) < len(json.dumps(response.json()))
+
+
+def test__conditional_json__ignores_non_catalogue_paths(test_db: SqliteDatabase) -> None:
+    client = TestClient(app)
+    response = client.get("/")
+    assert response.status_code == 200
+    assert "Vary" not in response.headers
+
+
+def test__conditional_json__forwards_file_responses_unbuffered(test_db: SqliteDatabase, tmp_path: Path) -> None:
+    sheet = tmp_path / "0.jpg"
+    sheet.write_bytes(b"jpeg")
+    sent: list[Message] = []
+
+    async def file_app(scope: Scope, receive: Receive, send: Send) -> None:
+        headers = [(b"content-type", b"image/jpeg"), (b"content-length", b"4")]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        # Sent by servers supporting the pathsend extension instead of the body
+        await send({"type": "http.response.pathsend", "path": str(sheet)})
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b""}
+
+    scope = {"type": "http", "method": "GET", "path": "/api/sprites/0", "query_string": b"", "headers": []}
+    asyncio.run(ConditionalJSONMiddleware(file_app)(scope, receive, send))
+
+    start, pathsend = sent
+    headers = dict(start["headers"])
+    assert headers[b"content-length"] == b"4"
+    assert headers[b"etag"] == make_etag(0, "/api/sprites/0?", None).encode()
+    assert pathsend == {"type": "http.response.pathsend", "path": str(sheet)}
@@ -1,9 +1,33 @@
+import sqlite3
+import threading
+from collections.abc import Iterator
 from pathlib import Path
 
 import pytest
 from peewee import IntegrityError, SqliteDatabase
 
-from garden_eye.api.database import Annotation, PathField, VideoFile, get_video_objects, init_database
+from garden_eye.api.database import (
+    Annotation,
+    AnnotationTrack,
+    DetectionSummary,
+    PackedAnnotation,
+    PathField,
+    VideoFile,
+    bump_generation,
+    delete_detections,
+    get_generation,
+    get_objects_by_video,
+    get_video_objects,
+    init_database,
+    insert_annotation_rows,
+    load_target_detections,
+    rebuild_detection_summary,
+    refresh_detection_summary,
+    select_target_annotations,
+    store_detections,
+)
+from garden_eye.config import DatabaseConfig
+from garden_eye.detections import DetectionArrays
 
 
 def test__path_field__converts_between_path_and_string() -> None:
@@ -68,6 +92,7 @@ def test__get_video_objects__returns_unique_object_names(test_db: SqliteDatabase
         video_file=video, frame_idx=2, name="cat", class_id=2, confidence=0.7, x1=30.0, y1=40.0, x2=70.0, y2=80.0
     )
 
+    refresh_detection_summary(video)
     objects = get_video_objects(video)
 
     assert len(objects) == 2
@@ -81,6 +106,7 @@ def test__get_video_objects__returns_empty_set_for_video_without_annotations(
     """Test get_video_objects returns empty set for video without annotations."""
     video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0)
 
+    refresh_detection_summary(video)
     objects = get_video_objects(video)
 
     assert objects == []
@@ -113,6 +139,7 @@ def test__get_video_objects__orders_by_annotation_frequency(test_db: SqliteDatab
             y2=70.0,
         )
 
+    refresh_detection_summary(video)
     objects = get_video_objects(video)
 
     assert objects == ["dog", "bird", "cat"]
@@ -129,6 +156,7 @@ def test__get_video_objects__filter_person_false_includes_person_only(
         video_file=video, frame_idx=0, name="person", class_id=0, confidence=0.8, x1=10.0, y1=20.0, x2=50.0, y2=60.0
     )
 
+    refresh_detection_summary(video)
     objects = get_video_objects(video, filter_person=False)
 
     assert objects == ["person"]
@@ -145,6 +173,7 @@ def test__get_video_objects__filter_person_true_excludes_person_only(
         video_file=video, frame_idx=0, name="person", class_id=0, confidence=0.8, x1=10.0, y1=20.0, x2=50.0, y2=60.0
     )
 
+    refresh_detection_summary(video)
     objects = get_video_objects(video, filter_person=True)
 
     assert objects == []
@@ -164,6 +193,7 @@ def test__get_video_objects__filter_person_true_includes_mixed_objects(
         video_file=video, frame_idx=1, name="dog", class_id=16, confidence=0.9, x1=15.0, y1=25.0, x2=55.0, y2=65.0
     )
 
+    refresh_detection_summary(video)
     objects = get_video_objects(video, filter_person=True)
 
     assert len(objects) == 2
@@ -183,6 +213,344 @@ def test__get_video_objects__filters_non_target_annotations(test_db: SqliteDatab
         video_file=video, frame_idx=1, name="chair", class_id=56, confidence=0.7, x1=30.0, y1=40.0, x2=70.0, y2=80.0
     )  # chair is not in COCO_TARGET_LABELS
 
+    refresh_detection_summary(video)
     objects = get_video_objects(video)
 
     assert objects == ["dog"]  # chair should be filtered out
+
+
+def test__refresh_detection_summary__counts_annotations_per_class(
+    test_db: SqliteDatabase, sample_video_file: Path
+) -> None:
+    """Test refresh_detection_summary stores one row per class with its box count."""
+    video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0)
+    for i in range(3):
+        Annotation.create(
+            video_file=video, frame_idx=i, name="dog", class_id=16, confidence=0.8, x1=10.0, y1=20.0, x2=50.0, y2=60.0
+        )
+    Annotation.create(
+        video_file=video, frame_idx=3, name="chair", class_id=56, confidence=0.7, x1=30.0, y1=40.0, x2=70.0, y2=80.0
+    )
+
+    refresh_detection_summary(video)
+    # Refreshing twice should not duplicate rows
+    refresh_detection_summary(video)
+
+    counts = {row.name: row.box_count for row in DetectionSummary.select()}
+    assert counts == {"dog": 3, "chair": 1}
+
+
+def test__get_objects_by_video__orders_by_frequency_and_filters_non_target(
+    test_db: SqliteDatabase, temp_video_dir: Path
+) -> None:
+    """Test get_objects_by_video returns target objects per video ordered by frequency."""
+    video_a = VideoFile.create(path=temp_video_dir / "a.MP4", size=1024, modified=1234567890.0)
+    video_b = VideoFile.create(path=temp_video_dir / "b.MP4", size=1024, modified=1234567890.0)
+    VideoFile.create(path=temp_video_dir / "c.MP4", size=1024, modified=1234567890.0)
+    DetectionSummary.create(video_file=video_a, name="cat", box_count=1)
+    DetectionSummary.create(video_file=video_a, name="bird", box_count=5)
+    DetectionSummary.create(video_file=video_a, name="chair", box_count=9)
+    DetectionSummary.create(video_file=video_b, name="person", box_count=2)
+
+    objects = get_objects_by_video()
+
+    assert objects == {video_a.id: ["bird", "cat"], video_b.id: ["person"]}
+    assert get_objects_by_video([video_b.id]) == {video_b.id: ["person"]}
+
+
+def test__rebuild_detection_summary__matches_get_video_objects(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    """Test rebuilding the summary gives the same object lists as the per-video query."""
+    videos = [VideoFile.create(path=temp_video_dir / f"{i}.MP4", size=1024, modified=0.0) for i in range(3)]
+    for i, video in enumerate(videos):
+        # Each video gets a different mix of classes with distinct frequencies
+        for name, count in [("dog", i + 1), ("cat", 3 - i), ("chair", 5)]:
+            for frame_idx in range(count):
+                Annotation.create(
+                    video_file=video,
+                    frame_idx=frame_idx,
+                    name=name,
+                    class_id=0,
+                    confidence=0.8,
+                    x1=0.0,
+                    y1=0.0,
+                    x2=1.0,
+                    y2=1.0,
+                )
+
+    rebuild_detection_summary()
+
+    objects = get_objects_by_video()
+    assert objects[videos[0].id] == get_video_objects(videos[0]) == ["cat", "dog"]
+    assert objects[videos[2].id] == get_video_objects(videos[2]) == ["dog", "cat"]
+
+
+def test__init_database__backfills_detection_summary(tmp_path: Path, sample_video_file: Path) -> None:
+    """Test init_database builds the summary for databases that predate it."""
+    db_path = tmp_path / "legacy.db"
+    db = init_database(db_path)
+    video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0)
+    Annotation.create(
+        video_file=video, frame_idx=0, name="dog", class_id=16, confidence=0.8, x1=10.0, y1=20.0, x2=50.0, y2=60.0
+    )
+    db.close()
+
+    db = init_database(db_path)
+
+    assert get_objects_by_video() == {video.id: ["dog"]}
+    db.close()
+
+
+def test__init_database__adds_columns_missing_from_older_databases(tmp_path: Path, sample_video_file: Path) -> None:
+    """Test init_database migrates a videofile table created before newer columns existed."""
+    db_path = tmp_path / "legacy.db"
+    db = init_database(db_path)
+    video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0)
+    db.execute_sql("ALTER TABLE videofile DROP COLUMN frame_stride")
+    db.close()
+
+    db = init_database(db_path)
+
+    assert "frame_stride" in {column.name for column in db.get_columns("videofile")}
+    assert VideoFile.get_by_id(video.id).frame_stride == 1
+    db.close()
+
+
+def test__bump_generation__increments_generation(test_db: SqliteDatabase) -> None:
+    """Test the catalogue generation starts at zero and increments on each bump."""
+    assert get_generation() == 0
+    bump_generation()
+    bump_generation()
+    assert get_generation() == 2
+
+
+def test__select_target_annotations__filters_labels_and_confidence_in_sql(
+    test_db: SqliteDatabase, sample_video_file: Path
+) -> None:
+    """Test select_target_annotations only returns target rows above the threshold, using the label index."""
+    video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0)
+    Annotation.create(
+        video_file=video, frame_idx=0, name="dog", class_id=16, confidence=0.8, x1=10.0, y1=20.0, x2=50.0, y2=60.0
+    )
+    Annotation.create(
+        video_file=video, frame_idx=1, name="dog", class_id=16, confidence=0.3, x1=10.0, y1=20.0, x2=50.0, y2=60.0
+    )
+    Annotation.create(
+        video_file=video, frame_idx=2, name="chair", class_id=56, confidence=0.9, x1=30.0, y1=40.0, x2=70.0, y2=80.0
+    )
+
+    assert [row[0] for row in select_target_annotations(video).tuples()] == [0, 1]
+    assert list(select_target_annotations(video, min_confidence=0.5).tuples()) == [
+        (0, 16, "dog", 0.8, 10.0, 20.0, 50.0, 60.0)
+    ]
+
+    sql, params = select_target_annotations(video, min_confidence=0.5).sql()
+    plan = " ".join(str(row) for row in test_db.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall())
+    assert "idx_annotation_video_name" in plan
+
+
+def _sample_detections() -> DetectionArrays:
+    return DetectionArrays.from_rows(
+        [
+            (0, 16, "dog", 0.9, 10.0, 20.0, 50.0, 60.0),
+            (1, 16, "dog", 0.4, 12.0, 22.0, 52.0, 62.0),
+            (1, 56, "chair", 0.8, 30.0, 40.0, 70.0, 80.0),
+        ]
+    )
+
+
+@pytest.mark.parametrize("storage", ["rows", "packed", "tracks"])
+def test__store_detections__round_trips_through_load_target_detections(
+    test_db: SqliteDatabase, sample_video_file: Path, storage: str
+) -> None:
+    """Test every storage mode returns the same target detections."""
+    video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0)
+
+    store_detections(video, _sample_detections(), storage=storage)
+    # Storing again replaces rather than duplicates
+    store_detections(video, _sample_detections(), storage=storage)
+
+    assert Annotation.select().count() == (3 if storage == "rows" else 0)
+    assert PackedAnnotation.select().count() == (1 if storage == "packed" else 0)
+    detections = load_target_detections(video)
+    assert detections.frame_idx.tolist() == [0, 1]
+    assert detections.names == {16: "dog"}
+    assert load_target_detections(video, min_confidence=0.5).frame_idx.tolist() == [0]
+
+
+def test__insert_annotation_rows__splits_statements_at_variable_limit(
+    test_db: SqliteDatabase, sample_video_file: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test rows spread over several multi-row statements, plus a shorter final one, all arrive intact."""
+    video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0)
+    # Room for two 9-column rows per statement
+    monkeypatch.setattr("garden_eye.api.database.MAX_INSERT_VARIABLES", 20)
+    detections = DetectionArrays.from_rows(
+        [(frame_idx, 16, "dog", 0.5, 1.0 * frame_idx, 2.0, 3.0, 4.0) for frame_idx in range(5)]
+    )
+
+    insert_annotation_rows(video.id, detections)
+
+    rows = list(
+        Annotation.select(Annotation.frame_idx, Annotation.name, Annotation.x1).order_by(Annotation.frame_idx).tuples()
+    )
+    assert rows == [(frame_idx, "dog", 1.0 * frame_idx) for frame_idx in range(5)]
+
+
+@pytest.mark.parametrize("storage", ["rows", "packed", "tracks"])
+def test__store_detections__accepts_windows(test_db: SqliteDatabase, sample_video_file: Path, storage: str) -> None:
+    """Test windows are consumed lazily, with row storage flushing each window before the next is produced."""
+    video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0)
+    rows_seen = []
+
+    def windows() -> Iterator[DetectionArrays]:
+        for frame_idx in range(3):
+            rows_seen.append(Annotation.select().count())
+            yield DetectionArrays.from_rows([(frame_idx, 16, "dog", 0.9, 1.0, 2.0, 3.0, 4.0)])
+
+    store_detections(video, windows(), storage=storage)
+
+    assert rows_seen == ([0, 1, 2] if storage == "rows" else [0, 0, 0])
+    assert load_target_detections(video).frame_idx.tolist() == [0, 1, 2]
+
+
+def test__store_detections__switching_mode_replaces_previous_storage(
+    test_db: SqliteDatabase, sample_video_file: Path
+) -> None:
+    """Test storing packed detections removes a video's annotation rows."""
+    video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0)
+    store_detections(video, _sample_detections(), storage="rows")
+
+    store_detections(video, _sample_detections(), storage="packed")
+
+    assert Annotation.select().count() == 0
+    assert PackedAnnotation.select().count() == 1
+
+
+def test__refresh_detection_summary__reads_packed_annotations(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    """Test the summary covers packed videos for both refresh and rebuild."""
+    packed = VideoFile.create(path=temp_video_dir / "packed.MP4", size=1024, modified=0.0)
+    rows = VideoFile.create(path=temp_video_dir / "rows.MP4", size=1024, modified=0.0)
+    store_detections(packed, _sample_detections(), storage="packed")
+    store_detections(rows, _sample_detections(), storage="rows")
+
+    refresh_detection_summary(packed)
+    assert get_objects_by_video() == {packed.id: ["dog"]}
+
+    rebuild_detection_summary()
+    counts = {(row.video_file_id, row.name): row.box_count for row in DetectionSummary.select()}
+    assert counts == {(packed.id, "dog"): 2, (packed.id, "chair"): 1, (rows.id, "dog"): 2, (rows.id, "chair"): 1}
+
+
+@pytest.mark.parametrize("storage", ["rows", "packed", "tracks"])
+def test__refresh_detection_summary__records_class_statistics(
+    test_db: SqliteDatabase, sample_video_file: Path, storage: str
+) -> None:
+    """Test every storage mode gives the same per-class statistics."""
+    video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0)
+    detections = DetectionArrays.concatenate(
+        [
+            _sample_detections(),
+            DetectionArrays.from_rows(
+                [(5, 16, "dog", 0.6, 0.0, 0.0, 1.0, 1.0), (5, 16, "dog", 0.7, 2.0, 2.0, 3.0, 3.0)]
+            ),
+        ]
+    )
+    store_detections(video, detections, storage=storage)
+
+    refresh_detection_summary(video)
+
+    dog = DetectionSummary.get(DetectionSummary.name == "dog")
+    assert (dog.box_count, dog.frame_count, dog.first_frame, dog.last_frame, dog.max_instances) == (4, 3, 0, 5, 2)
+    assert dog.max_confidence == pytest.approx(0.9)
+    assert dog.mean_confidence == pytest.approx(0.65)
+    chair = DetectionSummary.get(DetectionSummary.name == "chair")
+    assert (chair.box_count, chair.frame_count, chair.first_frame, chair.last_frame) == (1, 1, 1, 1)
+
+
+def test__store_detections__tracks_count_objects_and_delete_with_video(
+    test_db: SqliteDatabase, sample_video_file: Path
+) -> None:
+    """Test tracked storage keeps one row per object, counts objects per class, and is removed with the video."""
+    video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0, frame_stride=2)
+    detections = DetectionArrays.from_rows(
+        [(frame_idx, 16, "dog", 0.8, 0.0, 0.0, 10.0, 10.0) for frame_idx in range(0, 60, 2)]
+        + [(frame_idx, 16, "dog", 0.6, 50.0, 50.0, 60.0, 60.0) for frame_idx in range(0, 60, 2)]
+    )
+    store_detections(video, detections, storage="tracks")
+
+    assert AnnotationTrack.select().count() == 2
+    assert load_target_detections(video).frame_idx.tolist() == sorted(detections.frame_idx.tolist())
+    refresh_detection_summary(video)
+    dog = DetectionSummary.get(DetectionSummary.name == "dog")
+    assert (dog.box_count, dog.max_instances, dog.track_count) == (60, 2, 2)
+
+    delete_detections([video.id])
+    assert AnnotationTrack.select().count() == 0
+
+
+def test__init_database__rebuilds_summary_missing_statistics(tmp_path: Path, sample_video_file: Path) -> None:
+    """Test init_database recomputes summaries written before their newer statistics columns existed."""
+    db_path = tmp_path / "legacy.db"
+    db = init_database(db_path)
+    video = VideoFile.create(path=sample_video_file, size=1024, modified=1234567890.0)
+    store_detections(video, _sample_detections(), storage="rows")
+    refresh_detection_summary(video)
+    db.execute_sql("ALTER TABLE detectionsummary DROP COLUMN max_instances")
+    db.close()
+
+    db = init_database(db_path)
+
+    assert DetectionSummary.get(DetectionSummary.name == "dog").max_instances == 1
+    db.close()
+
+
+def test__init_database__applies_pragmas(test_db: SqliteDatabase) -> None:
+    """Test init_database configures WAL journaling and the tuning pragmas."""
+    assert test_db.execute_sql("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert test_db.execute_sql("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert test_db.execute_sql("PRAGMA cache_size").fetchone()[0] == -64 * 1024
+    assert test_db.execute_sql("PRAGMA busy_timeout").fetchone()[0] == 30_000
+
+
+def test__init_database__uses_configured_pragmas(tmp_path: Path) -> None:
+    """Test the pragmas come from the database config."""
+    db = init_database(tmp_path / "custom.db", DatabaseConfig(journal_mode="delete", cache_size_mib=8))
+
+    assert db.execute_sql("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert db.execute_sql("PRAGMA cache_size").fetchone()[0] == -8 * 1024
+    db.close()
+
+
+def test__init_database__gives_each_thread_its_own_configured_connection(test_db: SqliteDatabase) -> None:
+    """Test worker threads open their own connection, with the same pragmas applied."""
+    results: dict[str, object] = {}
+
+    def worker() -> None:
+        results["connection"] = test_db.connection()
+        results["journal_mode"] = test_db.execute_sql("PRAGMA journal_mode").fetchone()[0]
+        results["count"] = VideoFile.select().count()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert results["connection"] is not test_db.connection()
+    assert results["journal_mode"] == "wal"
+    assert results["count"] == 0
+
+
+def test__init_database__readers_do_not_wait_for_writers(test_db: SqliteDatabase, tmp_path: Path) -> None:
+    """Test an open write transaction (e.g. from ingestion) does not block API reads."""
+    VideoFile.create(path=tmp_path / "committed.MP4", size=1, modified=0.0)
+    writer = sqlite3.connect(test_db.database, timeout=0, isolation_level=None)
+    writer.execute("BEGIN EXCLUSIVE")
+    writer.execute(
+        "INSERT INTO videofile (path, size, modified, annotated, is_night, wildlife_prop) VALUES ('x', 1, 0, 0, 0, 0)"
+    )
+
+    # Reads see the last committed state straight away rather than waiting out the busy timeout
+    assert VideoFile.select().count() == 1
+
+    writer.execute("COMMIT")
+    writer.close()
+    assert VideoFile.select().count() == 2
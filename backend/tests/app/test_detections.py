@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from garden_eye.detections import DetectionArrays
+
+
+def make_detections() -> DetectionArrays:
+    return DetectionArrays.from_rows(
+        [
+            (3, 16, "dog", 0.9, 1.0, 2.0, 3.0, 4.0),
+            (0, 15, "cat", 0.5, 5.0, 6.0, 7.0, 8.0),
+            (3, 15, "cat", 0.7, 9.0, 10.0, 11.0, 12.0),
+        ]
+    )
+
+
+def test__from_rows__sorts_by_frame_and_keeps_order_within_frame() -> None:
+    detections = make_detections()
+
+    assert len(detections) == 3
+    assert detections.frame_idx.tolist() == [0, 3, 3]
+    assert detections.class_id.tolist() == [15, 16, 15]
+    assert detections.boxes[1].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert detections.names == {16: "dog", 15: "cat"}
+
+
+def test__frame_offsets__indexes_detections_by_frame() -> None:
+    detections = make_detections()
+
+    offsets = detections.frame_offsets()
+
+    assert detections.frame_count == 4
+    assert offsets.tolist() == [0, 1, 1, 1, 3]
+    # Frame 3's detections
+    assert detections.class_id[offsets[3] : offsets[4]].tolist() == [16, 15]
+
+
+def test__to_wire__round_trips_through_from_wire() -> None:
+    detections = make_detections()
+
+    data = detections.to_wire()
+    decoded = DetectionArrays.from_wire(data)
+
+    assert data[:4] == b"GEA1"
+    assert decoded.names == detections.names
+    np.testing.assert_array_equal(decoded.frame_idx, detections.frame_idx)
+    np.testing.assert_array_equal(decoded.class_id, detections.class_id)
+    np.testing.assert_allclose(decoded.confidence, detections.confidence)
+    np.testing.assert_allclose(decoded.boxes, detections.boxes)
+
+
+def test__to_wire__handles_no_detections() -> None:
+    detections = DetectionArrays.from_rows([])
+
+    decoded = DetectionArrays.from_wire(detections.to_wire())
+
+    assert len(decoded) == 0
+    assert detections.frame_offsets().tolist() == [0]
+
+
+def test__from_wire__rejects_unknown_payload() -> None:
+    with pytest.raises(ValueError):
+        DetectionArrays.from_wire(b"nope")
+
+
+def test__select__filters_by_name_and_confidence() -> None:
+    detections = make_detections()
+
+    selected = detections.select(names=["cat"], min_confidence=0.6)
+
+    assert selected.frame_idx.tolist() == [3]
+    assert selected.confidence.tolist() == [0.7]
+    assert selected.names == {15: "cat"}
+    assert len(detections.select()) == 3
+
+
+def test__to_blob__round_trips_through_from_blob() -> None:
+    detections = make_detections()
+
+    decoded = DetectionArrays.from_blob(detections.to_blob())
+
+    np.testing.assert_array_equal(decoded.frame_idx, detections.frame_idx)
+    np.testing.assert_allclose(decoded.boxes, detections.boxes)
+
+
+def test__concatenate__joins_windows_in_frame_order() -> None:
+    first = DetectionArrays.from_rows([(0, 15, "cat", 0.5, 1.0, 2.0, 3.0, 4.0)])
+    empty = DetectionArrays.from_rows([])
+    second = DetectionArrays.from_rows([(5, 16, "dog", 0.9, 5.0, 6.0, 7.0, 8.0)])
+
+    joined = DetectionArrays.concatenate([first, empty, second])
+
+    assert joined.frame_idx.tolist() == [0, 5]
+    assert joined.boxes.tolist() == [[1.0, 2.0, 3.0, 4.0], [5.0, 6.0, 7.0, 8.0]]
+    assert joined.names == {15: "cat", 16: "dog"}
+    assert len(DetectionArrays.concatenate([])) == 0
+
+
+def test__at_frame__moves_every_detection_to_one_frame() -> None:
+    moved = make_detections().at_frame(7)
+
+    assert moved.frame_idx.tolist() == [7, 7, 7]
+    assert moved.class_id.tolist() == make_detections().class_id.tolist()
+    assert len(DetectionArrays.empty().at_frame(7)) == 0
@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from garden_eye.frames import DecodeTask, MotionGate, cv2, decode_chunks, motion_signature
+
+requires_cv2 = pytest.mark.skipif(cv2 is None, reason="OpenCV is not installed")
+
+
+def _write_clip(path: Path, frame_count: int, width: int, height: int) -> None:
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (width, height))
+    for i in range(frame_count):
+        writer.write(np.full((height, width, 3), i * 10, dtype=np.uint8))
+    writer.release()
+
+
+@requires_cv2
+def test__decode_chunks__splits_frames_and_downscales(tmp_path: Path) -> None:
+    path = tmp_path / "clip.avi"
+    _write_clip(path, frame_count=10, width=320, height=180)
+
+    chunks = list(decode_chunks(DecodeTask(video_id=7, path=path, chunk_frames=4, max_width=160)))
+
+    assert [(chunk.start_frame, len(chunk.frames), chunk.last) for chunk in chunks] == [
+        (0, 4, False),
+        (4, 4, False),
+        (8, 2, True),
+    ]
+    assert all(chunk.video_id == 7 for chunk in chunks)
+    assert chunks[0].frames.shape[1:] == (90, 160, 3)
+    assert chunks[0].scale == (2.0, 2.0)
+
+
+@requires_cv2
+def test__decode_chunks__marks_last_chunk_when_frames_divide_evenly(tmp_path: Path) -> None:
+    path = tmp_path / "clip.avi"
+    _write_clip(path, frame_count=4, width=64, height=36)
+
+    chunks = list(decode_chunks(DecodeTask(video_id=1, path=path, chunk_frames=4, max_width=640)))
+
+    assert [(len(chunk), chunk.last) for chunk in chunks] == [(4, False), (0, True)]
+    assert chunks[-1].end_frame == 4
+    assert chunks[0].scale == (1.0, 1.0)
+
+
+@requires_cv2
+def test__decode_chunks__samples_every_nth_frame(tmp_path: Path) -> None:
+    path = tmp_path / "clip.avi"
+    _write_clip(path, frame_count=10, width=64, height=36)
+
+    chunks = list(decode_chunks(DecodeTask(video_id=1, path=path, chunk_frames=2, max_width=640, frame_stride=3)))
+
+    assert [chunk.frame_idx.tolist() for chunk in chunks] == [[0, 3], [6, 9]]
+    assert [chunk.last for chunk in chunks] == [False, True]
+    assert chunks[-1].end_frame == 10
+
+
+@requires_cv2
+def test__decode_chunks__holds_static_frames(tmp_path: Path) -> None:
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 36))
+    for value in (0, 0, 0, 200, 200):
+        writer.write(np.full((36, 64, 3), value, dtype=np.uint8))
+    writer.release()
+
+    (chunk,) = decode_chunks(DecodeTask(video_id=1, path=path, chunk_frames=8, max_width=640, motion_threshold=10.0))
+
+    assert chunk.held.tolist() == [False, True, True, False, True]
+    assert len(chunk.frames) == 2
+
+
+@requires_cv2
+def test__decode_chunks__captures_thumbnail_from_the_same_decode(tmp_path: Path) -> None:
+    path = tmp_path / "clip.avi"
+    _write_clip(path, frame_count=20, width=64, height=36)
+
+    task = DecodeTask(video_id=1, path=path, chunk_frames=4, max_width=640, frame_stride=3, thumbnail_size=(32, 18))
+    thumbnails = [chunk.thumbnail for chunk in decode_chunks(task) if chunk.thumbnail is not None]
+
+    # The first frame, then the frame one second in (frame 10 at 10 fps), which inference doesn't sample
+    assert [thumbnail.shape for thumbnail in thumbnails] == [(18, 32, 3)] * 2
+    assert abs(int(thumbnails[-1].mean()) - 100) <= 5
+
+
+def test__motion_signature__samples_a_small_grayscale_grid() -> None:
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[..., 2] = 90
+
+    signature = motion_signature(frame)
+
+    assert signature.shape == (36, 64)
+    assert np.all(signature == 30.0)
+
+
+def test__motion_gate__passes_frames_that_changed_since_the_last_passed_frame() -> None:
+    gate = MotionGate(threshold=10.0)
+    frames = [np.full((36, 64, 3), value, dtype=np.uint8) for value in (0, 5, 9, 12, 20)]
+
+    # 5 and 9 are within the threshold of 0, 12 is not, and 20 is within the threshold of 12
+    assert [gate(frame) for frame in frames] == [True, False, False, True, False]
+
+
+def test__motion_gate__passes_every_frame_when_disabled() -> None:
+    gate = MotionGate(threshold=0.0)
+    frame = np.zeros((36, 64, 3), dtype=np.uint8)
+
+    assert all(gate(frame) for _ in range(3))
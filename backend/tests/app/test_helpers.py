@@ -1,4 +1,9 @@
-from garden_eye.helpers import is_target_coco_annotation
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from garden_eye.helpers import is_night_frame, is_night_video, is_target_coco_annotation
 
 
 def test__is_target_coco_annotation__returns_true_for_target_labels() -> None:
@@ -13,3 +18,21 @@ def test__is_target_coco_annotation__returns_false_for_non_target_labels() -> No
 
     for label in non_target_labels:
         assert is_target_coco_annotation(label) is False
+
+
+def test__is_night_frame__detects_grayscale_frames() -> None:
+    gray = np.full((10, 10, 3), 120, dtype=np.uint8)
+    colour = gray.copy()
+    colour[..., 1] = 150
+
+    assert is_night_frame(gray) is True
+    assert is_night_frame(colour) is False
+
+
+def test__is_night_video__matches_is_night_frame_on_thumbnail(tmp_path: Path) -> None:
+    frame = np.zeros((20, 20, 3), dtype=np.uint8)
+    frame[..., 0] = 200
+    path = tmp_path / "thumbnail.png"
+    Image.fromarray(frame).save(path)
+
+    assert is_night_video(path) is is_night_frame(frame) is False
@@ -0,0 +1,159 @@
+from pathlib import Path
+from typing import Any
+
+from peewee import SqliteDatabase
+
+from garden_eye import CONFIG
+from garden_eye.api.database import (
+    AnnotationTrack,
+    DetectionSummary,
+    IngestJob,
+    IngestRun,
+    Sighting,
+    VideoFile,
+    get_thumbnail_path,
+    load_target_detections,
+)
+from garden_eye.detections import DetectionArrays
+from garden_eye.jobs import (
+    advance,
+    backfill_jobs,
+    delete_jobs,
+    fail_job,
+    finish_run,
+    get_stages,
+    has_reached,
+    record_annotation,
+    reset_jobs,
+    select_incomplete,
+    start_run,
+)
+from garden_eye.sightings import SIGHTING_MAX_GAP
+
+
+def _videos(temp_video_dir: Path, count: int) -> list[Any]:
+    return [VideoFile.create(path=temp_video_dir / f"{i}.MP4", size=1, modified=0.0) for i in range(count)]
+
+
+def test__has_reached__compares_stage_order() -> None:
+    assert has_reached("thumbnailed", "annotated")
+    assert has_reached("annotated", "annotated")
+    assert not has_reached("scanned", "annotated")
+
+
+def test__advance__moves_forward_but_never_back(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    (video,) = _videos(temp_video_dir, 1)
+    reset_jobs([video.id])
+
+    advance(video.id, "annotated")
+    advance(video.id, "classified")
+    advance(video.id, "thumbnailed")
+
+    assert get_stages([video.id]) == {video.id: "classified"}
+
+
+def test__reset_jobs__restarts_existing_jobs(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    first, second = _videos(temp_video_dir, 2)
+    reset_jobs([first.id, second.id])
+    advance(first.id, "classified")
+
+    reset_jobs([first.id])
+    delete_jobs([second.id])
+
+    assert get_stages([first.id, second.id]) == {first.id: "scanned"}
+
+
+def test__select_incomplete__skips_finished_videos(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    videos = _videos(temp_video_dir, 3)
+    reset_jobs(vf.id for vf in videos)
+    advance(videos[0].id, "classified")
+    advance(videos[1].id, "annotated")
+
+    assert [vf.id for vf in select_incomplete()] == [videos[1].id, videos[2].id]
+
+
+def test__fail_job__skips_video_until_it_is_reset(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    corrupt, ok = _videos(temp_video_dir, 2)
+    reset_jobs([corrupt.id, ok.id])
+
+    fail_job(corrupt.id, "CalledProcessError(1, 'ffmpeg')")
+
+    assert [vf.id for vf in select_incomplete()] == [ok.id]
+    assert IngestJob.get(IngestJob.video_file == corrupt.id).error == "CalledProcessError(1, 'ffmpeg')"
+    # A changed file is queued again
+    reset_jobs([corrupt.id])
+    assert [vf.id for vf in select_incomplete()] == [corrupt.id, ok.id]
+    # Completing a stage clears the failure
+    fail_job(corrupt.id, "error")
+    advance(corrupt.id, "annotated")
+    assert IngestJob.get(IngestJob.video_file == corrupt.id).error is None
+
+
+def test__backfill_jobs__infers_stage_of_existing_videos(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    new, annotated, thumbnailed, tracked = _videos(temp_video_dir, 4)
+    VideoFile.update(annotated=True).where(VideoFile.id != new.id).execute()
+    thumbnail = get_thumbnail_path(thumbnailed)
+    thumbnail.parent.mkdir(parents=True, exist_ok=True)
+    thumbnail.write_bytes(b"jpeg")
+    reset_jobs([tracked.id])
+
+    assert backfill_jobs() == 3
+    assert get_stages([new.id, annotated.id, thumbnailed.id, tracked.id]) == {
+        new.id: "scanned",
+        annotated.id: "annotated",
+        thumbnailed.id: "classified",
+        tracked.id: "scanned",
+    }
+    assert backfill_jobs() == 0
+
+
+def test__start_run__marks_abandoned_runs_interrupted(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    videos = _videos(temp_video_dir, 2)
+    reset_jobs(vf.id for vf in videos)
+    abandoned = start_run()
+
+    run = start_run()
+    advance(videos[0].id, "classified")
+    finish_run(run, "completed")
+
+    assert IngestRun.get_by_id(abandoned.id).status == "interrupted"
+    run = IngestRun.get_by_id(run.id)
+    assert (run.status, run.queued, run.completed) == ("completed", 2, 1)
+    assert run.finished is not None
+    assert IngestJob.select().count() == 2
+
+
+def test__record_annotation__tracks_sampled_frames_at_the_recorded_stride(
+    test_db: SqliteDatabase, temp_video_dir: Path
+) -> None:
+    (video,) = _videos(temp_video_dir, 1)
+    reset_jobs([video.id])
+    stride = CONFIG.ingest.track_max_gap + 5
+    # One stationary cat on every sampled frame
+    detections = DetectionArrays.from_rows(
+        (frame_idx, 15, "cat", 0.8, 10.0, 10.0, 50.0, 50.0) for frame_idx in range(0, 10 * stride, stride)
+    )
+
+    record_annotation(video, detections, wildlife_prop=1.0, frame_stride=stride, storage="tracks")
+
+    video = VideoFile.get_by_id(video.id)
+    assert (video.frame_stride, video.annotated, video.wildlife_prop) == (stride, True, 1.0)
+    assert AnnotationTrack.select().count() == 1
+    assert DetectionSummary.get(DetectionSummary.name == "cat").track_count == 1
+    assert load_target_detections(video).frame_idx.tolist() == detections.frame_idx.tolist()
+    assert get_stages([video.id]) == {video.id: "annotated"}
+
+
+def test__record_annotation__indexes_one_sighting_across_sampled_frames(
+    test_db: SqliteDatabase, temp_video_dir: Path
+) -> None:
+    (video,) = _videos(temp_video_dir, 1)
+    reset_jobs([video.id])
+    stride = SIGHTING_MAX_GAP + 10
+    detections = DetectionArrays.from_rows(
+        (frame_idx, 16, "dog", 0.8, 0.0, 0.0, 1.0, 1.0) for frame_idx in range(0, 10 * stride, stride)
+    )
+
+    record_annotation(video, detections, wildlife_prop=1.0, frame_stride=stride, storage="rows")
+
+    assert [(row.start_frame, row.end_frame) for row in Sighting.select()] == [(0, 9 * stride)]
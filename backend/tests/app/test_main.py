@@ -3,8 +3,18 @@ from pathlib import Path
 from fastapi.testclient import TestClient
 from peewee import SqliteDatabase
 
-from garden_eye.api.database import Annotation, VideoFile
-from garden_eye.api.main import app, get_annotations, list_videos
+from garden_eye.api.database import (
+    Annotation,
+    DetectionSummary,
+    VideoFile,
+    refresh_activity_timeline,
+    refresh_detection_summary,
+    refresh_sightings,
+    store_detections,
+)
+from garden_eye.api.main import app, get_annotation_columns, get_annotations, get_video_bounds, list_videos
+from garden_eye.detections import DetectionArrays
+from garden_eye.timeline import TIMELINE_BINS
 
 
 def test__index_endpoint__returns_html_file() -> None:
@@ -16,18 +26,229 @@ def test__index_endpoint__returns_html_file() -> None:
 
 def test__list_videos__empty_database(test_db: SqliteDatabase) -> None:
     result = list_videos()
-    assert result == []
+    assert result.items == []
+    assert result.next_cursor is None
+    assert result.total == 0
 
 
 def test__list_videos__returns_sample_data(test_db: SqliteDatabase, sample_video_file: Path) -> None:
     # Insert test video
     VideoFile.create(path=sample_video_file, size=len("fake video content"), modified=1234567890.0)
-    result = list_videos()
+    result = list_videos().items
     assert len(result) == 1
     assert result[0].name == "sample.MP4"
     assert result[0].size == len("fake video content")
 
 
+def test__list_videos__includes_frame_stride(test_db: SqliteDatabase, sample_video_file: Path) -> None:
+    VideoFile.create(path=sample_video_file, size=1, modified=0.0, frame_stride=5)
+    assert list_videos().items[0].frame_stride == 5
+
+
+def test__list_videos__includes_stream_metadata(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    VideoFile.create(path=temp_video_dir / "a.MP4", size=1, modified=0.0)
+    VideoFile.create(
+        path=temp_video_dir / "b.MP4",
+        size=1,
+        modified=1.0,
+        fps=29.97,
+        frame_count=300,
+        duration=10.01,
+        codec="h264",
+        width=1920,
+        height=1080,
+    )
+
+    unprobed, probed = sorted(list_videos().items, key=lambda video: video.name)
+
+    assert (unprobed.fps, unprobed.frame_count) == (None, None)
+    assert (probed.fps, probed.frame_count, probed.duration) == (29.97, 300, 10.01)
+    assert (probed.codec, probed.width, probed.height) == ("h264", 1920, 1080)
+
+
+def test__list_videos__includes_objects_by_frequency(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    empty = VideoFile.create(path=temp_video_dir / "a.MP4", size=1, modified=1234567890.0)
+    video = VideoFile.create(path=temp_video_dir / "b.MP4", size=1, modified=1234567890.0)
+    for frame_idx, name in enumerate(["cat", "dog", "dog", "chair"]):
+        Annotation.create(
+            video_file=video,
+            frame_idx=frame_idx,
+            name=name,
+            class_id=0,
+            confidence=0.8,
+            x1=0.0,
+            y1=0.0,
+            x2=1.0,
+            y2=1.0,
+        )
+    refresh_detection_summary(video)
+
+    result = {item.vid: item.objects for item in list_videos().items}
+
+    assert result == {empty.id: [], video.id: ["dog", "cat"]}
+
+
+def test__list_videos__pages_through_all_videos_with_cursor(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    # Duplicate modification times check that ties are broken consistently across pages
+    for i in range(7):
+        VideoFile.create(path=temp_video_dir / f"{i}.MP4", size=1, modified=float(i // 2), wildlife_prop=i / 10)
+
+    for sort, expected in [
+        ("oldest", [0, 1, 2, 3, 4, 5, 6]),
+        ("latest", [6, 5, 4, 3, 2, 1, 0]),
+        ("most_activity", [6, 5, 4, 3, 2, 1, 0]),
+        ("least_activity", [0, 1, 2, 3, 4, 5, 6]),
+    ]:
+        names: list[str] = []
+        cursor = None
+        while True:
+            page = list_videos(sort=sort, cursor=cursor, limit=3)  # type: ignore[arg-type]
+            assert page.total == 7
+            names.extend(item.name for item in page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert names == [f"{i}.MP4" for i in expected]
+
+
+def test__list_videos__applies_filters(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    empty = VideoFile.create(path=temp_video_dir / "empty.MP4", size=1, modified=10.0)
+    night_dog = VideoFile.create(path=temp_video_dir / "dog.MP4", size=1, modified=20.0, is_night=True)
+    person = VideoFile.create(path=temp_video_dir / "person.MP4", size=1, modified=30.0)
+    chair = VideoFile.create(path=temp_video_dir / "chair.MP4", size=1, modified=40.0)
+    DetectionSummary.create(video_file=night_dog, name="dog", box_count=3)
+    DetectionSummary.create(video_file=person, name="person", box_count=1)
+    DetectionSummary.create(video_file=person, name="cat", box_count=1)
+    DetectionSummary.create(video_file=chair, name="chair", box_count=1)
+
+    def vids(**kwargs: object) -> list[int]:
+        return [item.vid for item in list_videos(**kwargs).items]  # type: ignore[arg-type]
+
+    assert vids() == [empty.id, night_dog.id, person.id, chair.id]
+    assert vids(min_modified=20.0, max_modified=30.0) == [night_dog.id, person.id]
+    assert vids(time="night") == [night_dog.id]
+    assert vids(time="day") == [empty.id, person.id, chair.id]
+    assert vids(hide_empty=True) == [night_dog.id, person.id]
+    assert vids(exclude_person=True) == [empty.id, night_dog.id, chair.id]
+    assert vids(object_name="cat") == [person.id]
+    assert list_videos(hide_empty=True, exclude_person=True).total == 1
+
+
+def test__list_videos_endpoint__rejects_invalid_cursor(test_db: SqliteDatabase) -> None:
+    client = TestClient(app)
+    assert client.get("/api/videos", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/videos", params={"limit": 0}).status_code == 422
+
+
+def test__list_videos_endpoint__filters_by_object_query_parameter(
+    test_db: SqliteDatabase, temp_video_dir: Path
+) -> None:
+    VideoFile.create(path=temp_video_dir / "a.MP4", size=1, modified=1.0)
+    video = VideoFile.create(path=temp_video_dir / "b.MP4", size=1, modified=2.0)
+    DetectionSummary.create(video_file=video, name="bird", box_count=1)
+
+    client = TestClient(app)
+    response = client.get("/api/videos", params={"object": "bird"})
+
+    assert response.status_code == 200
+    assert [item["vid"] for item in response.json()["items"]] == [video.id]
+
+
+def test__get_video_object_summaries__returns_target_class_statistics(
+    test_db: SqliteDatabase, sample_video_file: Path
+) -> None:
+    video = VideoFile.create(path=sample_video_file, size=1, modified=0.0)
+    detections = DetectionArrays.from_rows(
+        [
+            (2, 16, "dog", 0.9, 0.0, 0.0, 1.0, 1.0),
+            (2, 16, "dog", 0.5, 2.0, 2.0, 3.0, 3.0),
+            (4, 14, "bird", 0.8, 0.0, 0.0, 1.0, 1.0),
+            (4, 56, "chair", 0.8, 0.0, 0.0, 1.0, 1.0),
+        ]
+    )
+    store_detections(video, detections, storage="rows")
+    refresh_detection_summary(video)
+
+    client = TestClient(app)
+    response = client.get(f"/api/videos/{video.id}/objects")
+
+    assert response.status_code == 200
+    dog, bird = response.json()
+    assert dog == {
+        "name": "dog",
+        "box_count": 2,
+        "frame_count": 1,
+        "max_confidence": 0.9,
+        "mean_confidence": 0.7,
+        "first_frame": 2,
+        "last_frame": 2,
+        "max_instances": 2,
+        "track_count": None,
+    }
+    assert bird["name"] == "bird"
+    assert client.get("/api/videos/999/objects").status_code == 404
+
+
+def test__get_video_timeline__returns_precomputed_histogram(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    video = VideoFile.create(path=temp_video_dir / "a.MP4", size=1, modified=0.0, frame_count=200)
+    pending = VideoFile.create(path=temp_video_dir / "b.MP4", size=1, modified=0.0)
+    detections = DetectionArrays.from_rows(
+        [(0, 16, "dog", 0.9, 0.0, 0.0, 1.0, 1.0), (199, 16, "dog", 0.9, 0.0, 0.0, 1.0, 1.0)]
+        + [(frame_idx, 56, "chair", 0.9, 0.0, 0.0, 1.0, 1.0) for frame_idx in range(10)]
+    )
+    store_detections(video, detections, storage="packed")
+    refresh_activity_timeline(video)
+
+    client = TestClient(app)
+    response = client.get(f"/api/videos/{video.id}/timeline")
+
+    assert response.status_code == 200
+    timeline = response.json()
+    assert (timeline["frame_count"], timeline["bins"], timeline["names"]) == (200, TIMELINE_BINS, ["dog"])
+    assert timeline["counts"][0][0] == timeline["counts"][0][-1] == 1
+    assert len(response.content) < 1024
+    assert client.get(f"/api/videos/{pending.id}/timeline").json()["counts"] == []
+    assert client.get("/api/videos/999/timeline").status_code == 404
+
+
+def test__get_sightings__ranks_matching_sightings_by_confidence(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    march = VideoFile.create(path=temp_video_dir / "a.MP4", size=1, modified=1_741_000_000.0, fps=10.0)
+    april = VideoFile.create(path=temp_video_dir / "b.MP4", size=1, modified=1_744_000_000.0)
+    for video, rows in [
+        (march, [(0, 15, "cat", 0.75), (1, 15, "cat", 0.8), (100, 15, "cat", 0.95), (5, 16, "dog", 0.9)]),
+        (april, [(0, 15, "cat", 0.99), (3, 14, "bird", 0.9)]),
+    ]:
+        store_detections(video, DetectionArrays.from_rows(row + (0.0, 0.0, 1.0, 1.0) for row in rows), storage="rows")
+        refresh_sightings(video)
+
+    client = TestClient(app)
+    response = client.get(
+        "/api/sightings", params={"name": ["cat", "bird"], "min_confidence": 0.7, "max_modified": 1_743_000_000.0}
+    )
+
+    assert response.status_code == 200
+    sightings = response.json()
+    assert [(s["vid"], s["name"], s["start_frame"], s["end_frame"]) for s in sightings] == [
+        (march.id, "cat", 100, 100),
+        (march.id, "cat", 0, 1),
+    ]
+    assert (sightings[1]["start_s"], sightings[1]["end_s"], sightings[1]["peak_confidence"]) == (0.0, 0.1, 0.8)
+    assert [s["vid"] for s in client.get("/api/sightings", params={"name": "cat"}).json()][0] == april.id
+    assert client.get("/api/sightings").status_code == 422
+
+
+def test__get_video_bounds__returns_modified_range(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    assert get_video_bounds().count == 0
+    for modified in [30.0, 10.0, 20.0]:
+        VideoFile.create(path=temp_video_dir / f"{modified}.MP4", size=1, modified=modified)
+
+    bounds = get_video_bounds()
+
+    assert bounds.count == 3
+    assert bounds.min_modified == 10.0
+    assert bounds.max_modified == 30.0
+
+
 def test__get_annotations__returns_filtered_annotations(test_db: SqliteDatabase, sample_video_file: Path) -> None:
     # Insert test video
     video = VideoFile.create(path=sample_video_file, size=len("fake video content"), modified=1234567890.0)
@@ -46,3 +267,93 @@ def test__get_annotations__returns_filtered_annotations(test_db: SqliteDatabase,
     assert result[0].name == "dog"
     assert result[0].frame_idx == 0
     assert result[0].confidence == 0.8
+
+
+def test__get_annotations__applies_min_confidence(test_db: SqliteDatabase, sample_video_file: Path) -> None:
+    video = VideoFile.create(path=sample_video_file, size=1, modified=1.0)
+    for frame_idx, confidence in enumerate([0.2, 0.5, 0.9]):
+        Annotation.create(
+            video_file=video,
+            frame_idx=frame_idx,
+            name="cat",
+            class_id=15,
+            confidence=confidence,
+            x1=0.0,
+            y1=0.0,
+            x2=1.0,
+            y2=1.0,
+        )
+
+    assert [a.frame_idx for a in get_annotations(video.id)] == [0, 1, 2]
+    assert [a.frame_idx for a in get_annotations(video.id, min_confidence=0.5)] == [1, 2]
+    assert get_annotation_columns(video.id, min_confidence=0.6).frame_offsets == [0, 0, 0, 1]
+
+
+def test__get_annotations_endpoint__validates_min_confidence(test_db: SqliteDatabase, sample_video_file: Path) -> None:
+    video = VideoFile.create(path=sample_video_file, size=1, modified=1.0)
+    client = TestClient(app)
+    assert client.get(f"/api/annotations/{video.id}", params={"min_confidence": 0.5}).status_code == 200
+    assert client.get(f"/api/annotations/{video.id}", params={"min_confidence": 1.5}).status_code == 422
+
+
+def test__get_annotation_columns__groups_target_annotations_by_frame(
+    test_db: SqliteDatabase, sample_video_file: Path
+) -> None:
+    video = VideoFile.create(path=sample_video_file, size=1, modified=1.0)
+    Annotation.create(
+        video_file=video, frame_idx=2, name="dog", class_id=16, confidence=0.8, x1=10.0, y1=20.0, x2=50.0, y2=60.0
+    )
+    Annotation.create(
+        video_file=video, frame_idx=0, name="chair", class_id=56, confidence=0.7, x1=30.0, y1=40.0, x2=70.0, y2=80.0
+    )
+    Annotation.create(
+        video_file=video, frame_idx=0, name="cat", class_id=15, confidence=0.6, x1=1.0, y1=2.0, x2=3.0, y2=4.0
+    )
+
+    result = get_annotation_columns(video.id)
+
+    assert result.names == {15: "cat", 16: "dog"}
+    assert result.frame_offsets == [0, 1, 1, 2]
+    assert result.class_id == [15, 16]
+    assert result.boxes == [1.0, 2.0, 3.0, 4.0, 10.0, 20.0, 50.0, 60.0]
+
+
+def test__get_annotations_packed__returns_binary_payload(test_db: SqliteDatabase, sample_video_file: Path) -> None:
+    video = VideoFile.create(path=sample_video_file, size=1, modified=1.0)
+    Annotation.create(
+        video_file=video, frame_idx=1, name="bird", class_id=14, confidence=0.5, x1=1.0, y1=2.0, x2=3.0, y2=4.0
+    )
+    client = TestClient(app)
+
+    response = client.get(f"/api/annotations/{video.id}/packed")
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/octet-stream"
+    detections = DetectionArrays.from_wire(response.content)
+    assert detections.frame_idx.tolist() == [1]
+    assert detections.names == {14: "bird"}
+
+
+def test__get_annotations__reads_packed_storage(test_db: SqliteDatabase, sample_video_file: Path) -> None:
+    video = VideoFile.create(path=sample_video_file, size=1, modified=1.0)
+    detections = DetectionArrays.from_rows(
+        [(4, 16, "dog", 0.5, 10.0, 20.0, 50.0, 60.0), (4, 56, "chair", 0.7, 30.0, 40.0, 70.0, 80.0)]
+    )
+    store_detections(video, detections, storage="packed")
+
+    result = get_annotations(video.id)
+
+    assert [(a.frame_idx, a.name, a.confidence, a.x2) for a in result] == [(4, "dog", 0.5, 50.0)]
+
+
+def test__stream__validators_come_from_catalogue(test_db: SqliteDatabase, sample_video_file: Path) -> None:
+    video = VideoFile.create(path=sample_video_file, size=18, modified=1234567890.5)
+    client = TestClient(app)
+
+    response = client.get("/stream", params={"vid": video.id}, headers={"Range": "bytes=5-9"})
+    cached = client.get("/stream", params={"vid": video.id}, headers={"If-None-Match": response.headers["ETag"]})
+
+    assert response.status_code == 206
+    assert response.content == b"video"
+    assert response.headers["Last-Modified"] == "Fri, 13 Feb 2009 23:31:30 GMT"
+    assert cached.status_code == 304
@@ -0,0 +1,24 @@
+import pytest
+from fastapi import HTTPException
+
+from garden_eye.api.pagination import decode_cursor, encode_cursor
+
+
+def test__encode_cursor__round_trips_through_decode_cursor() -> None:
+    cursor = encode_cursor("latest", 1234567890.5, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "latest") == (1234567890.5, 42)
+
+
+def test__decode_cursor__rejects_garbage() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("!!!", "oldest")
+    assert exc_info.value.status_code == 400
+
+
+def test__decode_cursor__rejects_cursor_from_other_sort_order() -> None:
+    cursor = encode_cursor("most_activity", 0.5, 1)
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, "oldest")
+    assert exc_info.value.status_code == 400
+    assert "sort order" in exc_info.value.detail
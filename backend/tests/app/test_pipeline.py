@@ -0,0 +1,128 @@
+import os
+import signal
+import threading
+from collections.abc import Iterator
+
+import pytest
+
+from garden_eye import pipeline
+from garden_eye.pipeline import InferenceBatcher, ProcessStage, ThreadStage, ThroughputMeter
+
+
+def _count_to(n: int) -> Iterator[tuple[int, int]]:
+    """Yield (task, i) pairs; module level so spawned workers can unpickle it."""
+    for i in range(n):
+        yield n, i
+
+
+def _fail(n: int) -> Iterator[int]:
+    """Yield once, then fail."""
+    yield n
+    raise ValueError("bad task")
+
+
+def _crash(n: int) -> Iterator[int]:
+    """Yield once, then die without cleaning up, as a segfault or the OOM killer would."""
+    yield n
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def test__process_stage__yields_every_item_in_order_per_task() -> None:
+    stage = ProcessStage(_count_to, workers=2, queue_size=2)
+
+    items = list(stage.run([3, 5, 0, 4]))
+
+    assert sorted(items) == sorted((n, i) for n in (3, 5, 0, 4) for i in range(n))
+    for n in (3, 5, 4):
+        assert [i for task, i in items if task == n] == list(range(n))
+
+
+def test__process_stage__raises_worker_errors() -> None:
+    stage = ProcessStage(_fail, workers=1, queue_size=2)
+
+    with pytest.raises(RuntimeError, match="bad task"):
+        list(stage.run([1]))
+
+
+def test__thread_stage__processes_all_items_before_exit() -> None:
+    seen: list[int] = []
+    lock = threading.Lock()
+
+    def record(item: int) -> None:
+        with lock:
+            seen.append(item)
+
+    with ThreadStage(record, workers=3, queue_size=2) as stage:
+        for i in range(20):
+            stage.put(i)
+
+    assert sorted(seen) == list(range(20))
+
+
+def test__thread_stage__reraises_worker_error() -> None:
+    def fail(item: int) -> None:
+        raise ValueError(f"bad item {item}")
+
+    with pytest.raises(RuntimeError, match="Pipeline stage failed") as exc_info:
+        with ThreadStage(fail, queue_size=1) as stage:
+            for i in range(5):
+                stage.put(i)
+    assert isinstance(exc_info.value.__cause__, ValueError)
+
+
+def test__inference_batcher__packs_groups_into_full_batches() -> None:
+    batches: list[list[str]] = []
+
+    def upper(items: list[str]) -> list[str]:
+        batches.append(items)
+        return [item.upper() for item in items]
+
+    batcher: InferenceBatcher[int, str, str] = InferenceBatcher(upper, batch_size=4)
+
+    assert batcher.add(1, "abc") == []
+    assert batcher.add(2, "") == []
+    assert batcher.add(3, "defghi") == [(1, ["A", "B", "C"]), (2, [])]
+    assert batcher.flush() == [(3, ["D", "E", "F", "G", "H", "I"])]
+    assert batches == [list("abcd"), list("efgh"), ["i"]]
+    assert batcher.mean_fill == 9 / 12
+
+
+def test__inference_batcher__flushes_partial_batch() -> None:
+    batcher: InferenceBatcher[str, int, int] = InferenceBatcher(lambda items: [i * 2 for i in items], batch_size=8)
+
+    batcher.add("a", [1, 2])
+    batcher.add("b", [3])
+
+    assert batcher.flush() == [("a", [2, 4]), ("b", [6])]
+    assert batcher.batches == 1
+    assert batcher.mean_fill == 3 / 8
+    assert batcher.flush() == []
+
+
+def test__throughput_meter__reports_frames_per_second() -> None:
+    now = [0.0]
+    meter = ThroughputMeter("Inference", interval_s=10.0, clock=lambda: now[0])
+
+    now[0] = 5.0
+    meter.add(100)
+    now[0] = 10.0
+    meter.add(200)
+
+    assert meter.fps == 30.0
+    assert meter.summary() == "Inference: 300 frames in 10.0s (30.0 frames/s)"
+
+
+def test__process_stage__reports_failed_tasks_through_on_error() -> None:
+    stage = ProcessStage(
+        _fail, workers=1, queue_size=2, on_error=lambda task, error: -task if "bad task" in error else 0
+    )
+
+    assert list(stage.run([1, 2])) == [1, -1, 2, -2]
+
+
+def test__process_stage__raises_when_worker_dies(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(pipeline, "WORKER_POLL_S", 0.1)
+    stage = ProcessStage(_crash, workers=1, queue_size=2)
+
+    with pytest.raises(RuntimeError, match="exit code -9"):
+        list(stage.run([1]))
@@ -0,0 +1,114 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+from peewee import SqliteDatabase
+
+from garden_eye import probe
+from garden_eye.api.database import (
+    VideoFile,
+    get_generation,
+    load_activity_timeline,
+    refresh_activity_timeline,
+    store_detections,
+)
+from garden_eye.detections import DetectionArrays
+from garden_eye.probe import VideoMetadata, parse_probe, probe_library
+
+
+def _output(**stream: Any) -> dict[str, Any]:
+    base = {"codec_name": "h264", "width": 1920, "height": 1080, "avg_frame_rate": "30000/1001", "duration": "10.01"}
+    return {"streams": [base | stream], "format": {"duration": "10.05"}}
+
+
+def test__parse_probe__reads_stream_properties() -> None:
+    metadata = parse_probe(_output(nb_frames="300"))
+
+    assert metadata == VideoMetadata(
+        fps=30000 / 1001, frame_count=300, duration=10.01, codec="h264", width=1920, height=1080
+    )
+
+
+def test__parse_probe__estimates_missing_values() -> None:
+    metadata = parse_probe(_output(avg_frame_rate="0/0", r_frame_rate="25/1", duration=None))
+
+    assert metadata is not None
+    assert (metadata.fps, metadata.duration, metadata.frame_count) == (25.0, 10.05, 251)
+
+
+@pytest.mark.parametrize("data", [{}, {"streams": []}, _output(avg_frame_rate="0/0")])
+def test__parse_probe__rejects_output_without_usable_video(data: dict[str, Any]) -> None:
+    assert parse_probe(data) is None
+
+
+def test__probe_library__records_metadata_of_unprobed_videos(
+    test_db: SqliteDatabase, temp_video_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    probed = VideoFile.create(path=temp_video_dir / "a.MP4", size=1, modified=0.0, fps=25.0)
+    new = VideoFile.create(path=temp_video_dir / "b.MP4", size=1, modified=0.0)
+    broken = VideoFile.create(path=temp_video_dir / "c.MP4", size=1, modified=0.0)
+    calls: list[Path] = []
+
+    def probe_video(path: Path, ffprobe_path: str) -> VideoMetadata | None:
+        calls.append(path)
+        return parse_probe(_output()) if path.name == "b.MP4" else None
+
+    monkeypatch.setattr(probe.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(probe, "probe_video", probe_video)
+
+    generation = get_generation()
+    assert probe_library(workers=2) == 1
+    assert get_generation() != generation
+    assert sorted(path.name for path in calls) == ["b.MP4", "c.MP4"]
+    assert VideoFile.get_by_id(new.id).frame_count == 300
+    assert VideoFile.get_by_id(broken.id).fps is None
+    assert VideoFile.get_by_id(probed.id).fps == 25.0
+
+
+def test__probe_library__keeps_committed_batches_when_interrupted(
+    test_db: SqliteDatabase, temp_video_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    videos = [VideoFile.create(path=temp_video_dir / f"{i}.MP4", size=1, modified=0.0) for i in range(3)]
+
+    def probe_video(path: Path, ffprobe_path: str) -> VideoMetadata | None:
+        if path.name == "2.MP4":
+            raise RuntimeError("interrupted")
+        return parse_probe(_output())
+
+    monkeypatch.setattr(probe.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(probe, "probe_video", probe_video)
+    monkeypatch.setattr(probe, "PROBE_BATCH_SIZE", 1)
+
+    with pytest.raises(RuntimeError):
+        probe_library(workers=1)
+    assert [VideoFile.get_by_id(video.id).fps is not None for video in videos] == [True, True, False]
+
+
+def test__probe_library__keeps_generation_when_nothing_is_probed(
+    test_db: SqliteDatabase, temp_video_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    VideoFile.create(path=temp_video_dir / "a.MP4", size=1, modified=0.0)
+    monkeypatch.setattr(probe.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(probe, "probe_video", lambda path, ffprobe_path: None)
+    generation = get_generation()
+
+    assert probe_library(workers=1) == 0
+    assert get_generation() == generation
+
+
+def test__probe_library__rebuilds_timelines_of_annotated_videos(
+    test_db: SqliteDatabase, temp_video_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    video = VideoFile.create(path=temp_video_dir / "a.MP4", size=1, modified=0.0, annotated=True)
+    store_detections(video, DetectionArrays.from_rows([(149, 16, "dog", 0.9, 0.0, 0.0, 1.0, 1.0)]), storage="packed")
+    # Built before the frame count was known, so the timeline ends at the last detection
+    refresh_activity_timeline(video)
+    assert load_activity_timeline(video).frame_count == 150
+    monkeypatch.setattr(probe.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(probe, "probe_video", lambda path, ffprobe_path: parse_probe(_output(nb_frames="300")))
+
+    probe_library(workers=1)
+
+    timeline = load_activity_timeline(VideoFile.get_by_id(video.id))
+    assert timeline.frame_count == 300
+    assert timeline.counts[0].nonzero()[0].tolist() == [timeline.bins // 2 - 1]
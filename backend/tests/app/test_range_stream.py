@@ -1,86 +1,95 @@
 from pathlib import Path
+from typing import Any
 from unittest.mock import MagicMock
 
 import pytest
-from fastapi import HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from starlette.responses import Response
+from starlette.types import Message
 
-from garden_eye.api.range_stream import _parse_range, range_file_response
+from garden_eye.api.range_stream import FileRangeResponse, _parse_ranges, range_file_response
 
 
-def test__parse_range__valid_start_end() -> None:
+def test__parse_ranges__valid_start_end() -> None:
     """Test parsing range header with start and end."""
-    start, end = _parse_range("bytes=0-499", 1000)
-    assert start == 0
-    assert end == 499
+    assert _parse_ranges("bytes=0-499", 1000) == [(0, 499)]
 
 
-def test__parse_range__start_only() -> None:
+def test__parse_ranges__start_only() -> None:
     """Test parsing range header with start only."""
-    start, end = _parse_range("bytes=500-", 1000)
-    assert start == 500
-    assert end == 999
+    assert _parse_ranges("bytes=500-", 1000) == [(500, 999)]
 
 
-def test__parse_range__suffix_range() -> None:
+def test__parse_ranges__suffix_range() -> None:
     """Test parsing range header with suffix."""
-    start, end = _parse_range("bytes=-200", 1000)
-    assert start == 800
-    assert end == 999
+    assert _parse_ranges("bytes=-200", 1000) == [(800, 999)]
 
 
-def test__parse_range__suffix_larger_than_file() -> None:
+def test__parse_ranges__suffix_larger_than_file() -> None:
     """Test parsing range header with suffix larger than file."""
-    start, end = _parse_range("bytes=-2000", 1000)
-    assert start == 0
-    assert end == 999
+    assert _parse_ranges("bytes=-2000", 1000) == [(0, 999)]
 
 
-def test__parse_range__invalid_header_format() -> None:
+def test__parse_ranges__invalid_header_format() -> None:
     """Test parsing invalid range header format."""
     with pytest.raises(HTTPException) as exc_info:
-        _parse_range("invalid", 1000)
+        _parse_ranges("invalid", 1000)
     assert exc_info.value.status_code == 416
     assert "Invalid Range header" in exc_info.value.detail
 
 
-def test__parse_range__invalid_units() -> None:
+def test__parse_ranges__invalid_units() -> None:
     """Test parsing range header with invalid units."""
     with pytest.raises(HTTPException) as exc_info:
-        _parse_range("items=0-499", 1000)
+        _parse_ranges("items=0-499", 1000)
     assert exc_info.value.status_code == 416
     assert "Only 'bytes' range supported" in exc_info.value.detail
 
 
-def test__parse_range__invalid_range_format() -> None:
+def test__parse_ranges__invalid_range_format() -> None:
     """Test parsing range header with invalid range format."""
     with pytest.raises(HTTPException) as exc_info:
-        _parse_range("bytes=0-499-999", 1000)
+        _parse_ranges("bytes=0-499-999", 1000)
     assert exc_info.value.status_code == 416
     assert "Invalid range format" in exc_info.value.detail
 
 
-def test__parse_range__zero_suffix() -> None:
+def test__parse_ranges__zero_suffix() -> None:
     """Test parsing range header with zero suffix."""
     with pytest.raises(HTTPException) as exc_info:
-        _parse_range("bytes=-0", 1000)
+        _parse_ranges("bytes=-0", 1000)
     assert exc_info.value.status_code == 416
     assert "Invalid suffix length" in exc_info.value.detail
 
 
-def test__parse_range__invalid_bounds() -> None:
+def test__parse_ranges__invalid_bounds() -> None:
     """Test parsing range header with invalid bounds."""
     with pytest.raises(HTTPException) as exc_info:
-        _parse_range("bytes=500-499", 1000)
+        _parse_ranges("bytes=500-499", 1000)
     assert exc_info.value.status_code == 416
     assert "Invalid range bounds" in exc_info.value.detail
 
 
-def test__parse_range__negative_start() -> None:
+def test__parse_ranges__negative_start() -> None:
     """Test parsing range header with negative start."""
     # This is actually a valid suffix range (-10) followed by invalid format (10-499)
     # The current implementation will fail on int("10-499")
     with pytest.raises(ValueError):
-        _parse_range("bytes=-10-499", 1000)
+        _parse_ranges("bytes=-10-499", 1000)
+
+
+def test__parse_ranges__multiple_ranges_are_sorted_and_coalesced() -> None:
+    """Test that overlapping and adjacent ranges merge and unsatisfiable ranges are dropped."""
+    assert _parse_ranges("bytes=500-599, 0-99, 50-149, 150-199, 2000-", 1000) == [(0, 199), (500, 599)]
+
+
+def test__parse_ranges__unsatisfiable() -> None:
+    """Test that a range starting beyond the file gives 416 with the file size in Content-Range."""
+    with pytest.raises(HTTPException) as exc_info:
+        _parse_ranges("bytes=1000-1100", 1000)
+    assert exc_info.value.status_code == 416
+    assert exc_info.value.headers == {"Content-Range": "bytes */1000"}
 
 
 def test__range_file_response__file_not_found() -> None:
@@ -171,3 +180,182 @@ def test__range_file_response__end_beyond_file_size(tmp_path: Path) -> None:
     assert response.status_code == 206
     assert response.headers["Content-Range"] == "bytes 50-99/100"
     assert response.headers["Content-Length"] == "50"
+
+
+async def _collect(response: Response, extensions: dict[str, Any] | None = None) -> list[Message]:
+    """Run an ASGI response against a fake server and return the messages it sent."""
+    messages: list[Message] = []
+
+    async def receive() -> Message:
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "extensions": extensions or {}}
+    await response(scope, receive, send)
+    return messages
+
+
+async def test__file_range_response__sends_chunks_read_from_disk(tmp_path: Path) -> None:
+    """Test that without server extensions the range is sent as chunks of at most chunk_size."""
+    test_file = tmp_path / "test.mp4"
+    test_content = bytes(range(256)) * 40  # 10240 bytes
+    test_file.write_bytes(test_content)
+
+    messages = await _collect(FileRangeResponse(test_file, 5000, 9999, status_code=206, chunk_size=2048))
+
+    assert messages[0]["status"] == 206
+    bodies = [message["body"] for message in messages[1:]]
+    assert [len(body) for body in bodies] == [2048, 2048, 904]
+    assert [message["more_body"] for message in messages[1:]] == [True, True, False]
+    assert b"".join(bodies) == test_content[5000:10000]
+
+
+async def test__file_range_response__ends_early_when_file_is_truncated(tmp_path: Path) -> None:
+    """Test that a file truncated while it is sent ends the response short instead of failing."""
+    test_file = tmp_path / "test.mp4"
+    test_file.write_bytes(b"0123456789" * 1000)
+    response = FileRangeResponse(test_file, 0, 9999, chunk_size=4096)
+    sent: list[Message] = []
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+        if message["type"] == "http.response.body":
+            # Rewritten in place, as ingestion does with a partially copied clip
+            with open(test_file, "r+b") as f:
+                f.truncate(5000)
+
+    await response._send_body(send, {})
+
+    assert [len(message["body"]) for message in sent] == [4096]
+    assert sent[-1]["more_body"] is True
+
+
+async def test__file_range_response__uses_zerocopy_extension(tmp_path: Path) -> None:
+    """Test that the zerocopy extension is used for ranges when the server supports it."""
+    test_file = tmp_path / "test.mp4"
+    test_file.write_bytes(b"0123456789" * 100)
+
+    messages = await _collect(
+        FileRangeResponse(test_file, 100, 199, status_code=206), extensions={"http.response.zerocopy": {}}
+    )
+
+    assert messages[1]["type"] == "http.response.zerocopy"
+    assert (messages[1]["offset"], messages[1]["count"]) == (100, 100)
+    assert messages[1]["file"].closed
+
+
+async def test__file_range_response__uses_pathsend_for_whole_file(tmp_path: Path) -> None:
+    """Test that pathsend is used for whole-file responses but not for partial ranges."""
+    test_file = tmp_path / "test.mp4"
+    test_file.write_bytes(b"0123456789" * 100)
+    extensions: dict[str, Any] = {"http.response.pathsend": {}}
+
+    whole = await _collect(FileRangeResponse(test_file, 0, 999), extensions=extensions)
+    partial = await _collect(FileRangeResponse(test_file, 0, 499, status_code=206), extensions=extensions)
+
+    assert whole[1] == {"type": "http.response.pathsend", "path": str(test_file)}
+    assert partial[1]["type"] == "http.response.body"
+    assert bytes(partial[1]["body"]) == test_file.read_bytes()[:500]
+
+
+def test__range_file_response__streams_through_app(tmp_path: Path) -> None:
+    """Test full and partial responses end to end, including an empty file."""
+    test_file = tmp_path / "test.mp4"
+    test_content = bytes(range(256)) * 1000
+    test_file.write_bytes(test_content)
+    empty_file = tmp_path / "empty.mp4"
+    empty_file.touch()
+
+    app = FastAPI()
+
+    @app.get("/{name}")
+    def stream(name: str, request: Request) -> Response:
+        return range_file_response(tmp_path / name, request, chunk_size=4096)
+
+    client = TestClient(app)
+    assert client.get("/test.mp4").content == test_content
+    assert client.get("/test.mp4", headers={"Range": "bytes=70000-"}).content == test_content[70000:]
+    empty = client.get("/empty.mp4")
+    assert empty.status_code == 200
+    assert empty.content == b""
+
+
+def _conditional_client(tmp_path: Path, content: bytes, modified: float = 1_700_000_000.0) -> TestClient:
+    """Serve a file through range_file_response with validators from the given size and modification time."""
+    test_file = tmp_path / "test.mp4"
+    test_file.write_bytes(content)
+    app = FastAPI()
+
+    @app.get("/")
+    def stream(request: Request) -> Response:
+        return range_file_response(test_file, request, size=len(content), modified=modified, chunk_size=64)
+
+    return TestClient(app)
+
+
+def test__range_file_response__multipart_byteranges(tmp_path: Path) -> None:
+    """Test that several ranges are sent as a multipart/byteranges body."""
+    content = bytes(range(256)) * 4
+    client = _conditional_client(tmp_path, content)
+
+    response = client.get("/", headers={"Range": "bytes=0-9, 500-599, -10"})
+
+    assert response.status_code == 206
+    media_type, boundary = response.headers["Content-Type"].split("; boundary=")
+    assert media_type == "multipart/byteranges"
+    assert int(response.headers["Content-Length"]) == len(response.content)
+    parts = response.content.split(f"--{boundary}".encode())
+    assert parts[0] == b"" and parts[-1] == b"--\r\n"
+    expected = [(0, 9), (500, 599), (1014, 1023)]
+    for part, (start, end) in zip(parts[1:-1], expected, strict=True):
+        part_headers, body = part.split(b"\r\n\r\n", 1)
+        assert f"Content-Range: bytes {start}-{end}/1024".encode() in part_headers
+        assert b"Content-Type: video/mp4" in part_headers
+        assert body.removesuffix(b"\r\n") == content[start : end + 1]
+
+
+def test__range_file_response__not_modified(tmp_path: Path) -> None:
+    """Test that matching If-None-Match or If-Modified-Since validators give an empty 304."""
+    client = _conditional_client(tmp_path, b"0123456789" * 100)
+    first = client.get("/")
+    etag, last_modified = first.headers["ETag"], first.headers["Last-Modified"]
+
+    by_etag = client.get("/", headers={"If-None-Match": f"W/{etag}", "Range": "bytes=0-9"})
+    by_date = client.get("/", headers={"If-Modified-Since": last_modified})
+    changed = client.get("/", headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified})
+
+    assert by_etag.status_code == 304
+    assert by_etag.content == b""
+    assert by_etag.headers["ETag"] == etag
+    assert by_date.status_code == 304
+    # If-Modified-Since is ignored when If-None-Match is present
+    assert changed.status_code == 200
+
+
+def test__range_file_response__if_range(tmp_path: Path) -> None:
+    """Test that a Range is honoured only while the If-Range validator still matches."""
+    content = b"0123456789" * 100
+    client = _conditional_client(tmp_path, content)
+    etag, last_modified = client.get("/").headers["ETag"], client.get("/").headers["Last-Modified"]
+
+    current = client.get("/", headers={"Range": "bytes=10-19", "If-Range": etag})
+    current_date = client.get("/", headers={"Range": "bytes=10-19", "If-Range": last_modified})
+    stale = client.get("/", headers={"Range": "bytes=10-19", "If-Range": '"stale"'})
+    weak = client.get("/", headers={"Range": "bytes=10-19", "If-Range": f"W/{etag}"})
+
+    assert (current.status_code, current.content) == (206, content[10:20])
+    assert current_date.status_code == 206
+    assert (stale.status_code, stale.content) == (200, content)
+    assert weak.status_code == 200
+
+
+def test__range_file_response__unsatisfiable_range(tmp_path: Path) -> None:
+    """Test that a range beyond the end of the file gives 416."""
+    client = _conditional_client(tmp_path, b"0123456789")
+
+    response = client.get("/", headers={"Range": "bytes=20-"})
+
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */10"
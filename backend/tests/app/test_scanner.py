@@ -0,0 +1,117 @@
+import os
+from pathlib import Path
+
+import pytest
+from peewee import SqliteDatabase
+
+from garden_eye.api.database import Annotation, ScannedDirectory, VideoFile, get_generation, get_thumbnail_path
+from garden_eye.jobs import advance, get_stages
+from garden_eye.scanner import scan_library
+
+# Files are written with this mtime, and scanned at NOW, well after they settle
+MTIME = 1_700_000_000.0
+NOW = MTIME + 3600
+
+
+def _write(path: Path, content: bytes = b"video", mtime: float = MTIME) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _paths() -> set[Path]:
+    return {vf.path for vf in VideoFile.select()}
+
+
+def test__scan_library__adds_new_videos_recursively(test_db: SqliteDatabase, tmp_path: Path) -> None:
+    root = tmp_path / "raw"
+    first = _write(root / "2025-01-01" / "a.MP4")
+    second = _write(root / "2025-01-02" / "deep" / "b.MP4")
+    _write(root / "notes.txt")
+
+    result = scan_library(root, now=NOW)
+
+    assert _paths() == {first, second}
+    assert sorted(result.added) == sorted(vf.id for vf in VideoFile.select())
+    assert result.changed == result.removed == []
+    assert result.listed == result.directories == 4
+    assert set(get_stages(result.added).values()) == {"scanned"}
+    assert get_generation() == 1
+
+
+def test__scan_library__skips_listing_unchanged_directories(test_db: SqliteDatabase, tmp_path: Path) -> None:
+    root = tmp_path / "raw"
+    _write(root / "2025-01-01" / "a.MP4")
+    _write(root / "2025-01-02" / "b.MP4")
+    scan_library(root, now=NOW)
+
+    unchanged = scan_library(root, now=NOW)
+    _write(root / "2025-01-02" / "c.MP4")
+    one_new = scan_library(root, now=NOW)
+
+    assert unchanged.listed == 0 and unchanged.directories == 3
+    assert unchanged.queued == unchanged.removed == []
+    assert one_new.listed == 1
+    assert [VideoFile.get_by_id(video_id).path.name for video_id in one_new.added] == ["c.MP4"]
+    assert len(VideoFile) == 3
+
+
+def test__scan_library__requeues_changed_videos(test_db: SqliteDatabase, tmp_path: Path) -> None:
+    root = tmp_path / "raw"
+    path = _write(root / "a.MP4")
+    scan_library(root, now=NOW)
+    video = VideoFile.get(VideoFile.path == path)
+    VideoFile.update(annotated=True, wildlife_prop=0.5, fps=25.0, frame_count=250).execute()
+    advance(video.id, "classified")
+    Annotation.create(video_file=video, frame_idx=0, name="dog", class_id=16, confidence=0.9, x1=0, y1=0, x2=1, y2=1)
+    thumbnail = get_thumbnail_path(video)
+    thumbnail.parent.mkdir(parents=True, exist_ok=True)
+    thumbnail.write_bytes(b"jpeg")
+
+    # Rewriting a file in place leaves its directory's mtime alone, so only a full scan notices
+    _write(path, b"longer video")
+    os.utime(root, ns=(ScannedDirectory.get().mtime_ns,) * 2)
+    assert scan_library(root, now=NOW).changed == []
+    result = scan_library(root, full=True, now=NOW)
+
+    assert result.changed == [video.id]
+    video = VideoFile.get_by_id(video.id)
+    assert (video.size, video.annotated, video.wildlife_prop) == (len(b"longer video"), False, 0)
+    assert (video.fps, video.frame_count) == (None, None)
+    assert Annotation.select().count() == 0
+    assert not thumbnail.exists()
+    assert get_stages([video.id]) == {video.id: "scanned"}
+
+
+def test__scan_library__removes_deleted_videos(test_db: SqliteDatabase, tmp_path: Path) -> None:
+    root = tmp_path / "raw"
+    kept = _write(root / "keep" / "a.MP4")
+    deleted = _write(root / "drop" / "b.MP4")
+    scan_library(root, now=NOW)
+    video = VideoFile.get(VideoFile.path == deleted)
+    Annotation.create(video_file=video, frame_idx=0, name="dog", class_id=16, confidence=0.9, x1=0, y1=0, x2=1, y2=1)
+
+    deleted.unlink()
+    deleted.parent.rmdir()
+    result = scan_library(root, now=NOW)
+
+    assert result.removed == [video.id]
+    assert _paths() == {kept}
+    assert get_stages([video.id]) == {}
+    assert Annotation.select().count() == 0
+    assert {row.path for row in ScannedDirectory.select()} == {root, kept.parent}
+
+
+@pytest.mark.parametrize("full", [False, True])
+def test__scan_library__waits_for_files_to_settle(test_db: SqliteDatabase, tmp_path: Path, full: bool) -> None:
+    root = tmp_path / "raw"
+    path = _write(root / "day" / "a.MP4", mtime=NOW - 5)
+
+    uploading = scan_library(root, full=full, settle_s=60, now=NOW)
+    settled = scan_library(root, full=full, settle_s=60, now=NOW + 60)
+
+    assert uploading.unsettled == 1 and uploading.added == []
+    # Only the directory holding the unsettled file is listed again, unless every directory is
+    assert settled.listed == (2 if full else 1)
+    assert _paths() == {path}
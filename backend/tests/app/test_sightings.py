@@ -0,0 +1,33 @@
+from garden_eye.detections import DetectionArrays
+from garden_eye.sightings import SightingSegment, find_sightings
+
+
+def _detections(*rows: tuple[int, int, str, float]) -> DetectionArrays:
+    return DetectionArrays.from_rows(
+        (frame_idx, class_id, name, confidence, 0.0, 0.0, 1.0, 1.0) for frame_idx, class_id, name, confidence in rows
+    )
+
+
+def test__find_sightings__merges_detections_within_the_gap() -> None:
+    detections = _detections(
+        (0, 16, "dog", 0.5), (2, 16, "dog", 0.9), (5, 16, "dog", 0.6), (20, 16, "dog", 0.4), (21, 16, "dog", 0.7)
+    )
+
+    assert find_sightings(detections, max_gap=3) == [
+        SightingSegment("dog", 0, 5, 0.9),
+        SightingSegment("dog", 20, 21, 0.7),
+    ]
+
+
+def test__find_sightings__keeps_classes_apart_and_takes_peak_of_each_frame() -> None:
+    detections = _detections((4, 15, "cat", 0.3), (4, 15, "cat", 0.8), (4, 16, "dog", 0.6), (9, 15, "cat", 0.2))
+
+    assert find_sightings(detections, max_gap=1) == [
+        SightingSegment("cat", 4, 4, 0.8),
+        SightingSegment("cat", 9, 9, 0.2),
+        SightingSegment("dog", 4, 4, 0.6),
+    ]
+
+
+def test__find_sightings__returns_nothing_without_detections() -> None:
+    assert find_sightings(DetectionArrays.empty()) == []
@@ -0,0 +1,102 @@
+from collections.abc import Generator
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from peewee import SqliteDatabase
+from PIL import Image
+
+from garden_eye.api.main import app
+from garden_eye.api.sprites import (
+    SPRITE_COLUMNS,
+    SPRITE_PAGE_SIZE,
+    SPRITE_ROWS,
+    TILE_HEIGHT,
+    TILE_WIDTH,
+    build_sprite_page,
+    build_sprite_pages,
+    list_sprite_pages,
+    load_sprite_map,
+    sprite_page,
+    tile_position,
+)
+
+
+@pytest.fixture
+def thumbnail_dir(tmp_path: Path) -> Generator[Path]:
+    """Point thumbnail and sprite paths at an empty temporary directory."""
+    directory = tmp_path / "thumbnails"
+    directory.mkdir()
+    with patch("garden_eye.api.database.THUMBNAIL_DIR", directory):
+        yield directory
+
+
+def _write_thumbnail(directory: Path, video_id: int, colour: tuple[int, int, int]) -> None:
+    Image.new("RGB", (TILE_WIDTH, TILE_HEIGHT), colour).save(directory / f"{video_id}.jpg")
+
+
+def test__tile_position__fills_pages_row_by_row() -> None:
+    assert sprite_page(SPRITE_PAGE_SIZE - 1) == 0
+    assert sprite_page(SPRITE_PAGE_SIZE) == 1
+    assert tile_position(0) == (0, 0)
+    assert tile_position(SPRITE_COLUMNS + 1) == (TILE_WIDTH, TILE_HEIGHT)
+    assert tile_position(SPRITE_PAGE_SIZE) == (0, 0)
+
+
+def test__build_sprite_page__packs_thumbnails_at_their_offsets(thumbnail_dir: Path) -> None:
+    _write_thumbnail(thumbnail_dir, 1, (255, 0, 0))
+    _write_thumbnail(thumbnail_dir, 10, (0, 0, 255))
+
+    tiles = build_sprite_page(0)
+
+    assert tiles == {1: tile_position(1), 10: tile_position(10)}
+    assert load_sprite_map(0) == tiles
+    assert list_sprite_pages() == [0]
+    with Image.open(thumbnail_dir / "sprites" / "0.jpg") as sheet:
+        assert sheet.size == (SPRITE_COLUMNS * TILE_WIDTH, SPRITE_ROWS * TILE_HEIGHT)
+        red = sheet.getpixel((tile_position(1)[0] + 10, tile_position(1)[1] + 10))
+        blue = sheet.getpixel((tile_position(10)[0] + 10, tile_position(10)[1] + 10))
+    assert isinstance(red, tuple) and red[0] > 200 and red[2] < 50
+    assert isinstance(blue, tuple) and blue[2] > 200 and blue[0] < 50
+
+
+def test__build_sprite_pages__rebuilds_affected_pages_and_removes_empty_ones(thumbnail_dir: Path) -> None:
+    _write_thumbnail(thumbnail_dir, 1, (255, 0, 0))
+    _write_thumbnail(thumbnail_dir, SPRITE_PAGE_SIZE * 2, (0, 255, 0))
+    assert build_sprite_pages([1, 2, SPRITE_PAGE_SIZE * 2]) == [0, 2]
+    assert list_sprite_pages() == [0, 2]
+
+    (thumbnail_dir / "1.jpg").unlink()
+    build_sprite_pages([1])
+
+    assert list_sprite_pages() == [2]
+    assert load_sprite_map(0) is None
+
+
+def test__sprite_endpoints__serve_layout_map_and_sheet(test_db: SqliteDatabase, thumbnail_dir: Path) -> None:
+    _write_thumbnail(thumbnail_dir, 3, (255, 0, 0))
+    build_sprite_page(0)
+    client = TestClient(app)
+
+    layout = client.get("/api/sprites").json()
+    sprite_map = client.get("/api/sprites/0/map").json()
+    sheet = client.get("/api/sprites/0", headers={"Accept-Encoding": "gzip"})
+    cached = client.get("/api/sprites/0", headers={"If-None-Match": sheet.headers["ETag"]})
+
+    assert layout == {
+        "tile_width": TILE_WIDTH,
+        "tile_height": TILE_HEIGHT,
+        "columns": SPRITE_COLUMNS,
+        "rows": SPRITE_ROWS,
+        "pages": [0],
+    }
+    assert sprite_map == {"page": 0, "url": "/api/sprites/0", "tiles": {"3": list(tile_position(3))}}
+    assert sheet.headers["Content-Type"] == "image/jpeg"
+    # JPEG is already compressed, so it is sent as-is
+    assert "Content-Encoding" not in sheet.headers
+    assert Image.open(BytesIO(sheet.content)).size == (SPRITE_COLUMNS * TILE_WIDTH, SPRITE_ROWS * TILE_HEIGHT)
+    assert cached.status_code == 304
+    assert client.get("/api/sprites/1/map").status_code == 404
+    assert client.get("/api/sprites/1").status_code == 404
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from peewee import SqliteDatabase
+
+from garden_eye.api.database import VideoFile, bump_generation, refresh_detection_summary, store_detections
+from garden_eye.api.main import app
+from garden_eye.api.stats import STATS_CACHE, ClassStats, StatsCache, compute_library_stats
+from garden_eye.detections import DetectionArrays
+
+
+def _add_video(directory: Path, name: str, wildlife_prop: float, *rows: tuple[int, int, str]) -> VideoFile:
+    video = VideoFile.create(path=directory / name, size=1, modified=0.0, wildlife_prop=wildlife_prop)
+    detections = DetectionArrays.from_rows(
+        (frame_idx, class_id, label, 0.8, 0.0, 0.0, 1.0, 1.0) for frame_idx, class_id, label in rows
+    )
+    store_detections(video, detections, storage="rows")
+    refresh_detection_summary(video)
+    return video
+
+
+def test__compute_library_stats__counts_videos_classes_and_proportions(
+    test_db: SqliteDatabase, temp_video_dir: Path
+) -> None:
+    _add_video(temp_video_dir, "fox.MP4", 1.0, (0, 16, "dog"), (1, 16, "dog"), (1, 0, "person"))
+    _add_video(temp_video_dir, "person.MP4", 0.0, (0, 0, "person"), (0, 56, "chair"))
+    _add_video(temp_video_dir, "bird.MP4", 0.12, (3, 14, "bird"))
+    _add_video(temp_video_dir, "chair.MP4", 0.0, (0, 56, "chair"))
+    VideoFile.create(path=temp_video_dir / "new.MP4", size=1, modified=0.0)
+
+    stats = compute_library_stats(generation=7, bins=10)
+
+    assert stats.generation == 7
+    assert (stats.video_count, stats.wildlife_videos, stats.person_only_videos, stats.empty_videos) == (5, 2, 1, 2)
+    assert stats.classes == [
+        ClassStats("chair", 2, 2),
+        ClassStats("dog", 2, 1),
+        ClassStats("person", 2, 2),
+        ClassStats("bird", 1, 1),
+    ]
+    assert stats.wildlife_prop_histogram == [0, 1, 0, 0, 0, 0, 0, 0, 0, 1]
+
+
+def test__compute_library_stats__handles_an_empty_library(test_db: SqliteDatabase) -> None:
+    stats = compute_library_stats(generation=0, bins=4)
+
+    assert (stats.video_count, stats.wildlife_videos, stats.person_only_videos, stats.empty_videos) == (0, 0, 0, 0)
+    assert stats.classes == []
+    assert stats.wildlife_prop_histogram == [0, 0, 0, 0]
+
+
+def test__stats_cache__recomputes_only_when_generation_changes(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    cache = StatsCache()
+    first = cache.get(generation=1)
+    _add_video(temp_video_dir, "bird.MP4", 0.5, (0, 14, "bird"))
+
+    assert cache.get(generation=1) is first
+    refreshed = cache.get(generation=2)
+    assert (refreshed.video_count, refreshed.wildlife_videos) == (1, 1)
+
+
+def test__get_stats__serves_cached_stats_with_etag(test_db: SqliteDatabase, temp_video_dir: Path) -> None:
+    STATS_CACHE.invalidate()
+    _add_video(temp_video_dir, "bird.MP4", 0.5, (0, 14, "bird"))
+    client = TestClient(app)
+
+    response = client.get("/api/stats", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["video_count"], body["wildlife_videos"]) == (1, 1)
+    assert body["classes"] == [{"name": "bird", "box_count": 1, "video_count": 1}]
+    assert sum(body["wildlife_prop_histogram"]) == 1
+    cached = client.get(
+        "/api/stats", headers={"Accept-Encoding": "identity", "If-None-Match": response.headers["ETag"]}
+    )
+    assert cached.status_code == 304
+
+    VideoFile.create(path=temp_video_dir / "new.MP4", size=1, modified=0.0)
+    bump_generation()
+    assert client.get("/api/stats").json()["empty_videos"] == 1
+    STATS_CACHE.invalidate()
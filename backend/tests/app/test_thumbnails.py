@@ -0,0 +1,103 @@
+import os
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from peewee import SqliteDatabase
+
+from garden_eye.api.main import app
+from garden_eye.api.thumbnails import THUMBNAIL_CACHE, ThumbnailCache
+
+
+@pytest.fixture
+def thumbnail_dir(tmp_path: Path) -> Generator[Path]:
+    """Point thumbnail paths at an empty temporary directory."""
+    directory = tmp_path / "thumbnails"
+    directory.mkdir()
+    with patch("garden_eye.api.database.THUMBNAIL_DIR", directory):
+        THUMBNAIL_CACHE.invalidate()
+        yield directory
+    THUMBNAIL_CACHE.invalidate()
+
+
+def test__thumbnail_cache__serves_hits_from_memory(thumbnail_dir: Path) -> None:
+    (thumbnail_dir / "1.jpg").write_bytes(b"jpeg")
+    cache = ThumbnailCache(max_bytes=1024)
+
+    first = cache.get(1)
+    with patch("garden_eye.api.thumbnails._read_thumbnail") as read_thumbnail:
+        second = cache.get(1)
+
+    assert first is not None and first.content == b"jpeg"
+    assert second is first
+    read_thumbnail.assert_not_called()
+    assert cache.get(2) is None
+
+
+def test__thumbnail_cache__evicts_least_recently_used(thumbnail_dir: Path) -> None:
+    for video_id in (1, 2, 3):
+        (thumbnail_dir / f"{video_id}.jpg").write_bytes(b"x" * 400)
+    (thumbnail_dir / "4.jpg").write_bytes(b"x" * 2000)
+    cache = ThumbnailCache(max_bytes=1000)
+
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)
+    oversized = cache.get(4)
+
+    # 2 was least recently used when 3 pushed the total over budget, and 4 is too big to keep at all
+    assert len(cache) == 2
+    assert oversized is not None and len(oversized.content) == 2000
+    with patch("garden_eye.api.thumbnails._read_thumbnail", return_value=None) as read_thumbnail:
+        cache.get(1)
+        cache.get(3)
+        read_thumbnail.assert_not_called()
+        cache.get(2)
+        read_thumbnail.assert_called_once_with(2)
+
+
+def test__thumbnail_cache__rereads_changed_files(thumbnail_dir: Path) -> None:
+    path = thumbnail_dir / "1.jpg"
+    path.write_bytes(b"old")
+    cache = ThumbnailCache(max_bytes=1024)
+    old = cache.get(1)
+
+    path.write_bytes(b"new!")
+    os.utime(path, ns=(1, 1))
+    new = cache.get(1)
+    assert new is not None and new.content == b"new!"
+    assert old is not None and new.etag != old.etag
+
+    path.unlink()
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+def test__get_thumbnail__returns_304_for_current_etag(test_db: SqliteDatabase, thumbnail_dir: Path) -> None:
+    (thumbnail_dir / "7.jpg").write_bytes(b"jpeg")
+    client = TestClient(app)
+
+    response = client.get("/api/thumbnail/7")
+    cached = client.get("/api/thumbnail/7", headers={"If-None-Match": response.headers["ETag"]})
+    missing = client.get("/api/thumbnail/8")
+
+    assert response.status_code == 200
+    assert response.content == b"jpeg"
+    assert response.headers["Content-Type"] == "image/jpeg"
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert missing.status_code == 404
+
+
+def test__get_thumbnail__picks_up_regenerated_thumbnail(test_db: SqliteDatabase, thumbnail_dir: Path) -> None:
+    path = thumbnail_dir / "7.jpg"
+    path.write_bytes(b"old")
+    client = TestClient(app)
+    assert client.get("/api/thumbnail/7").content == b"old"
+
+    path.write_bytes(b"new thumbnail")
+
+    assert client.get("/api/thumbnail/7").content == b"new thumbnail"
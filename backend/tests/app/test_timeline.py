@@ -0,0 +1,47 @@
+import numpy as np
+
+from garden_eye.detections import DetectionArrays
+from garden_eye.timeline import ActivityHistogram
+
+
+def _detections(*rows: tuple[int, int, str]) -> DetectionArrays:
+    return DetectionArrays.from_rows(
+        (frame_idx, class_id, name, 0.9, 0.0, 0.0, 1.0, 1.0) for frame_idx, class_id, name in rows
+    )
+
+
+def test__from_detections__bins_each_class_by_frame() -> None:
+    detections = _detections((0, 16, "dog"), (9, 16, "dog"), (10, 14, "bird"), (35, 16, "dog"), (39, 16, "dog"))
+
+    histogram = ActivityHistogram.from_detections(detections, frame_count=40, bins=4)
+
+    # Most detected class first
+    assert histogram.names == ["dog", "bird"]
+    assert histogram.counts.tolist() == [[2, 0, 0, 2], [0, 1, 0, 0]]
+    assert (histogram.bins, histogram.frame_count) == (4, 40)
+
+
+def test__from_detections__ends_at_last_detection_without_frame_count() -> None:
+    detections = _detections((0, 16, "dog"), (19, 16, "dog"))
+
+    histogram = ActivityHistogram.from_detections(detections, frame_count=None, bins=2)
+
+    assert histogram.frame_count == 20
+    assert histogram.counts.tolist() == [[1, 1]]
+
+
+def test__from_detections__puts_late_detections_in_last_bin() -> None:
+    histogram = ActivityHistogram.from_detections(_detections((50, 16, "dog")), frame_count=10, bins=5)
+
+    assert histogram.counts.tolist() == [[0, 0, 0, 0, 1]]
+
+
+def test__to_blob__round_trips() -> None:
+    for detections in [_detections((3, 16, "dog"), (7, 14, "bird")), DetectionArrays.empty()]:
+        histogram = ActivityHistogram.from_detections(detections, frame_count=10, bins=5)
+
+        restored = ActivityHistogram.from_blob(histogram.to_blob())
+
+        assert (restored.frame_count, restored.names) == (histogram.frame_count, histogram.names)
+        np.testing.assert_array_equal(restored.counts, histogram.counts)
+        assert restored.counts.shape == (len(histogram.names), 5)
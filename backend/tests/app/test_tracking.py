@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from garden_eye.detections import DetectionArrays
+from garden_eye.tracking import Track, expand_tracks, track_detections
+
+
+def _boxes(*rows: tuple[int, int, str, float, float, float]) -> DetectionArrays:
+    """Build detections of 10px square boxes from (frame, class ID, name, confidence, x1, y1) rows."""
+    return DetectionArrays.from_rows(
+        (frame_idx, class_id, name, confidence, x1, y1, x1 + 10, y1 + 10)
+        for frame_idx, class_id, name, confidence, x1, y1 in rows
+    )
+
+
+def test__track_detections__stationary_object_keeps_two_keyframes() -> None:
+    detections = _boxes(*((frame_idx, 16, "dog", 0.8, 5.0, 5.0) for frame_idx in range(900)))
+
+    (track,) = track_detections(detections, tolerance=1.0)
+
+    assert (track.name, track.start_frame, track.end_frame) == ("dog", 0, 899)
+    assert track.keyframes["frame"].tolist() == [0, 899]
+
+
+def test__track_detections__keyframes_reproduce_moving_object_within_tolerance() -> None:
+    # Moves right, then turns down halfway through
+    path = [(float(min(f, 50)), float(max(f - 50, 0))) for f in range(100)]
+    detections = _boxes(*((frame_idx, 16, "dog", 0.8, x, y) for frame_idx, (x, y) in enumerate(path)))
+
+    (track,) = track_detections(detections, tolerance=1.0)
+    expanded = expand_tracks([track])
+
+    assert len(track.keyframes) == 3
+    assert expanded.frame_idx.tolist() == list(range(100))
+    assert np.abs(expanded.boxes - detections.boxes).max() <= 1.0
+
+
+def test__track_detections__separates_objects_and_classes() -> None:
+    detections = _boxes(
+        *((frame_idx, 16, "dog", 0.8, 0.0, 0.0) for frame_idx in range(5)),
+        *((frame_idx, 16, "dog", 0.7, 100.0, 100.0) for frame_idx in range(5)),
+        *((frame_idx, 15, "cat", 0.6, 0.0, 0.0) for frame_idx in range(2, 5)),
+    )
+
+    tracks = track_detections(detections)
+
+    assert sorted((track.name, track.start_frame, track.peak_confidence) for track in tracks) == [
+        ("cat", 2, pytest.approx(0.6)),
+        ("dog", 0, pytest.approx(0.7)),
+        ("dog", 0, pytest.approx(0.8)),
+    ]
+
+
+def test__track_detections__ends_tracks_after_the_gap() -> None:
+    detections = _boxes((0, 16, "dog", 0.8, 0.0, 0.0), (3, 16, "dog", 0.8, 0.0, 0.0), (10, 16, "dog", 0.8, 0.0, 0.0))
+
+    tracks = track_detections(detections, max_gap=5)
+
+    assert [(track.start_frame, track.end_frame) for track in tracks] == [(0, 3), (10, 10)]
+
+
+def test__track_detections__follows_small_fast_object_by_its_centre() -> None:
+    # Each step moves 6px, so consecutive 10px boxes overlap by less than the IoU threshold
+    detections = _boxes(*((frame_idx, 14, "bird", 0.8, 6.0 * frame_idx, 0.0) for frame_idx in range(4)))
+
+    tracks = track_detections(detections, iou_threshold=0.5)
+
+    assert [(track.start_frame, track.end_frame) for track in tracks] == [(0, 3)]
+
+
+def test__expand_tracks__samples_every_strided_frame() -> None:
+    detections = _boxes((0, 16, "dog", 0.4, 0.0, 0.0), (8, 16, "dog", 0.8, 4.0, 0.0))
+    (track,) = track_detections(detections)
+
+    expanded = expand_tracks([track], frame_stride=4)
+
+    assert expanded.frame_idx.tolist() == [0, 4, 8]
+    assert expanded.boxes[:, 0].tolist() == [0.0, 2.0, 4.0]
+    assert expanded.confidence.tolist() == pytest.approx([0.4, 0.6, 0.8])
+
+
+def test__track_detections__keeps_the_confidence_peak() -> None:
+    detections = _boxes(
+        *((frame_idx, 15, "cat", 0.95 if frame_idx == 37 else 0.4, 5.0, 5.0) for frame_idx in range(100))
+    )
+
+    (track,) = track_detections(detections)
+    expanded = expand_tracks([track])
+
+    # The frames either side of the spike are kept too, so interpolation doesn't raise their neighbours' confidence
+    assert track.keyframes["frame"].tolist() == [0, 36, 37, 38, 99]
+    assert track.peak_confidence == pytest.approx(0.95)
+    assert expanded.select(min_confidence=0.7).frame_idx.tolist() == [37]
+
+
+def test__track_detections__keyframes_follow_changing_confidence() -> None:
+    # Stationary, but the confidence rises then falls
+    detections = _boxes(
+        *((frame_idx, 15, "cat", 0.3 + 0.01 * min(frame_idx, 60 - frame_idx), 5.0, 5.0) for frame_idx in range(61))
+    )
+
+    (track,) = track_detections(detections, confidence_tolerance=0.02)
+
+    assert track.keyframes["frame"].tolist() == [0, 30, 60]
+    assert np.abs(expand_tracks([track]).confidence - detections.confidence).max() <= 0.02
+
+
+def test__track__round_trips_through_blob() -> None:
+    (track,) = track_detections(_boxes((0, 16, "dog", 0.5, 1.0, 2.0), (1, 16, "dog", 0.9, 3.0, 4.0)))
+
+    decoded = Track.from_blob(track.class_id, track.name, track.to_blob(), track.peak_confidence)
+
+    assert decoded.keyframes.tobytes() == track.keyframes.tobytes()
+    assert (decoded.start_frame, decoded.end_frame, decoded.peak_confidence) == (0, 1, pytest.approx(0.9))
+
+
+def test__track_detections__returns_nothing_without_detections() -> None:
+    assert track_detections(DetectionArrays.empty()) == []
+    assert len(expand_tracks([])) == 0
@@ -1,8 +1,14 @@
-let allFiles = [];
+const PAGE_SIZE = 60;
+
 let filteredFiles = [];
+let nextCursor = null;
+let totalCount = 0;
+let loadingPage = false;
+let listGeneration = 0;
+let reloadTimer = null;
 let currentSort = 'oldest';
 let selectedVideoId = null;
-let annotations = [];
+let annotations = null;
 let showAnnotations = true;
 let hideEmpty = false;
 let objectFilter = '';
@@ -12,26 +18,25 @@ let dateRangeMin = 0;
 let dateRangeMax = 100;
 let minDate = null;
 let maxDate = null;
+let spriteLayout = null;
+const spriteMaps = new Map();
 
 async function init() {
   try {
-    const res = await fetch('/api/videos');
-    allFiles = await res.json();
-    filteredFiles = [...allFiles];
-
-    // Calculate date range from files
-    if (allFiles.length > 0) {
-      const dates = allFiles.map(f => f.modified).filter(d => d != null).sort((a, b) => a - b);
-      if (dates.length > 0) {
-        minDate = dates[0];
-        maxDate = dates[dates.length - 1];
-      }
+    // Only the catalogue's date bounds and sprite layout are needed up front; videos are fetched a page at a time
+    const [boundsRes, spritesRes] = await Promise.all([fetch('/api/videos/bounds'), fetch('/api/sprites')]);
+    const bounds = await boundsRes.json();
+    minDate = bounds.min_modified;
+    maxDate = bounds.max_modified;
+    if (spritesRes.ok) {
+      spriteLayout = await spritesRes.json();
+      spriteLayout.pages = new Set(spriteLayout.pages);
     }
 
     setupControls();
+    setupInfiniteScroll();
     updateDateRangeLabels();
-    updateVideoCount();
-    sortAndRenderFiles();
+    await reloadFiles();
   } catch (error) {
     console.error('Failed to load videos:', error);
     document.getElementById('file-list').innerHTML = '<p>Failed to load videos</p>';
@@ -39,29 +44,109 @@ async function init() {
 }
 
 
+function buildVideosUrl(cursor) {
+  // Mirror the current filter controls as server-side query parameters
+  const params = new URLSearchParams({ sort: currentSort, limit: PAGE_SIZE });
+  if (cursor) params.set('cursor', cursor);
+  if (hideEmpty) params.set('hide_empty', 'true');
+  if (filterPerson) params.set('exclude_person', 'true');
+  if (timeFilter) params.set('time', timeFilter);
+  if (objectFilter) params.set('object', objectFilter);
+
+  if (minDate !== null && maxDate !== null) {
+    const dateRange = maxDate - minDate;
+    if (dateRangeMin > 0) params.set('min_modified', minDate + (dateRange * dateRangeMin / 100));
+    if (dateRangeMax < 100) params.set('max_modified', minDate + (dateRange * dateRangeMax / 100));
+  }
+  return `/api/videos?${params}`;
+}
+
+async function reloadFiles() {
+  // Discard any in-flight page requests for the previous filters
+  const generation = ++listGeneration;
+  loadingPage = true;
+  try {
+    const res = await fetch(buildVideosUrl(null));
+    const page = await res.json();
+    if (generation !== listGeneration) return;
+    filteredFiles = page.items;
+    nextCursor = page.next_cursor;
+    totalCount = page.total;
+  } finally {
+    if (generation === listGeneration) loadingPage = false;
+  }
+  updateVideoCount();
+  renderView();
+  loadMoreIfVisible();
+}
+
+async function loadNextPage() {
+  if (loadingPage || !nextCursor) return;
+  const generation = listGeneration;
+  loadingPage = true;
+  try {
+    const res = await fetch(buildVideosUrl(nextCursor));
+    const page = await res.json();
+    if (generation !== listGeneration) return;
+    filteredFiles = filteredFiles.concat(page.items);
+    nextCursor = page.next_cursor;
+    totalCount = page.total;
+  } catch (error) {
+    console.error('Failed to load more videos:', error);
+    return;
+  } finally {
+    if (generation === listGeneration) loadingPage = false;
+  }
+  renderView();
+  loadMoreIfVisible();
+}
+
+function scheduleReload() {
+  // Debounce rapid control changes (e.g. dragging the date sliders) into a single request
+  clearTimeout(reloadTimer);
+  reloadTimer = setTimeout(() => reloadFiles().catch(console.error), 150);
+}
+
+function setupInfiniteScroll() {
+  const sentinel = document.getElementById('load-more');
+  const observer = new IntersectionObserver((entries) => {
+    if (entries.some(entry => entry.isIntersecting)) loadNextPage();
+  }, { rootMargin: '600px' });
+  observer.observe(sentinel);
+}
+
+function loadMoreIfVisible() {
+  // The observer only fires on changes, so keep filling the screen if the sentinel is still in view
+  const sentinel = document.getElementById('load-more');
+  if (nextCursor && sentinel.getBoundingClientRect().top < window.innerHeight + 600) {
+    loadNextPage();
+  }
+}
+
+
 function setupControls() {
   // Hide empty videos toggle
   document.getElementById('hide-empty').addEventListener('change', (e) => {
     hideEmpty = e.target.checked;
-    filterFiles();
+    scheduleReload();
   });
 
   // Time filter dropdown
   document.getElementById('time-filter').addEventListener('change', (e) => {
     timeFilter = e.target.value;
-    filterFiles();
+    scheduleReload();
   });
 
   // Filter person checkbox
   document.getElementById('filter-person').addEventListener('change', (e) => {
     filterPerson = e.target.checked;
-    filterFiles();
+    scheduleReload();
   });
 
   // Sort by dropdown
   document.getElementById('sort-by').addEventListener('change', (e) => {
     currentSort = e.target.value;
-    sortAndRenderFiles();
+    scheduleReload();
   });
 
   // Date range sliders
@@ -76,7 +161,7 @@ function setupControls() {
       minSlider.value = value;
       updateDateRangeUI();
       updateDateRangeLabels();
-      filterFiles();
+      scheduleReload();
     } else {
       minSlider.value = dateRangeMin;
     }
@@ -89,7 +174,7 @@ function setupControls() {
       maxSlider.value = value;
       updateDateRangeUI();
       updateDateRangeLabels();
-      filterFiles();
+      scheduleReload();
     } else {
       maxSlider.value = dateRangeMax;
     }
@@ -112,7 +197,7 @@ function setupControls() {
         minSlider.value = clickValue;
         updateDateRangeUI();
         updateDateRangeLabels();
-        filterFiles();
+        scheduleReload();
       }
     } else {
       // Move max slider
@@ -121,7 +206,7 @@ function setupControls() {
         maxSlider.value = clickValue;
         updateDateRangeUI();
         updateDateRangeLabels();
-        filterFiles();
+        scheduleReload();
       }
     }
   });
@@ -131,57 +216,8 @@ function setupControls() {
 }
 
 
-function filterFiles() {
-  filteredFiles = [...allFiles];
-
-  // Filter out videos with person if requested
-  if (filterPerson) {
-    filteredFiles = filteredFiles.filter(file => {
-      if (!file.objects || file.objects.length === 0) {
-        return true; // Keep empty videos
-      }
-      // Keep videos that don't have "person"
-      return !file.objects.includes('person');
-    });
-  }
-
-  // Filter by empty videos if requested
-  if (hideEmpty) {
-    filteredFiles = filteredFiles.filter(file =>
-      file.objects && file.objects.length > 0
-    );
-  }
-
-  // Filter by day/night if specified
-  if (timeFilter) {
-    filteredFiles = filteredFiles.filter(file => {
-      if (timeFilter === 'day') {
-        return !file.is_night;
-      } else if (timeFilter === 'night') {
-        return file.is_night;
-      }
-      return true; // 'day + night' or empty shows all
-    });
-  }
-
-  // Filter by date range
-  if (minDate !== null && maxDate !== null) {
-    const dateRange = maxDate - minDate;
-    const minTimestamp = minDate + (dateRange * dateRangeMin / 100);
-    const maxTimestamp = minDate + (dateRange * dateRangeMax / 100);
-
-    filteredFiles = filteredFiles.filter(file => {
-      if (file.modified == null) return true;
-      return file.modified >= minTimestamp && file.modified <= maxTimestamp;
-    });
-  }
-
-  updateVideoCount();
-  sortAndRenderFiles();
-}
-
 function updateVideoCount() {
-  const count = filteredFiles.length;
+  const count = totalCount;
   const videoCountElement = document.getElementById('video-count');
   videoCountElement.textContent = `${count} video${count !== 1 ? 's' : ''}`;
 }
@@ -318,13 +354,39 @@ function createPlaceholderCard(file) {
   return card;
 }
 
+function getSpriteTile(vid) {
+  // Resolve a video's tile in the shared sprite sheets, fetching each page's offset map at most once
+  if (!spriteLayout) return Promise.resolve(null);
+  const page = Math.floor(vid / (spriteLayout.columns * spriteLayout.rows));
+  if (!spriteLayout.pages.has(page)) return Promise.resolve(null);
+  if (!spriteMaps.has(page)) {
+    const request = fetch(`/api/sprites/${page}/map`)
+      .then(res => (res.ok ? res.json() : null))
+      .catch(() => null);
+    spriteMaps.set(page, request);
+  }
+  return spriteMaps.get(page).then(map => {
+    const offset = map && map.tiles[vid];
+    return offset ? { url: map.url, x: offset[0], y: offset[1] } : null;
+  });
+}
+
+function applySpriteTile(element, tile) {
+  // Percentages keep the tile aligned whatever size the card is rendered at
+  const { columns, rows, tile_width: tileWidth, tile_height: tileHeight } = spriteLayout;
+  const x = columns > 1 ? (tile.x / tileWidth) / (columns - 1) * 100 : 0;
+  const y = rows > 1 ? (tile.y / tileHeight) / (rows - 1) * 100 : 0;
+  element.style.backgroundImage = `url(${tile.url})`;
+  element.style.backgroundSize = `${columns * 100}% ${rows * 100}%`;
+  element.style.backgroundPosition = `${x}% ${y}%`;
+}
+
 function createCollapsedCard(file, card) {
   // Thumbnail with image
   const thumbnail = document.createElement('div');
   thumbnail.className = 'card-thumbnail';
   
   const img = document.createElement('img');
-  img.src = file.thumbnail_url;
   img.alt = `Thumbnail for ${file.name}`;
   img.className = 'thumbnail-image';
   
@@ -334,7 +396,20 @@ function createCollapsedCard(file, card) {
     thumbnail.classList.add('thumbnail-fallback');
   };
   
-  thumbnail.appendChild(img);
+  // Prefer a tile of a shared sprite sheet, falling back to the video's own thumbnail
+  getSpriteTile(file.vid).then(tile => {
+    if (tile) {
+      const sprite = document.createElement('div');
+      sprite.className = 'thumbnail-image thumbnail-sprite';
+      sprite.setAttribute('role', 'img');
+      sprite.setAttribute('aria-label', img.alt);
+      applySpriteTile(sprite, tile);
+      thumbnail.appendChild(sprite);
+    } else {
+      img.src = file.thumbnail_url;
+      thumbnail.appendChild(img);
+    }
+  });
   
   const content = document.createElement('div');
   content.className = 'card-content';
@@ -478,6 +553,18 @@ function createExpandedCard(file) {
   controls.appendChild(closeButton);
   controls.appendChild(annotationToggle);
   
+  // Activity timeline under the player, with detections per time bin; click to seek
+  const timeline = document.createElement('canvas');
+  timeline.className = 'activity-timeline';
+  timeline.addEventListener('click', (e) => {
+    e.stopPropagation();
+    if (!isFinite(video.duration)) return;
+    const rect = timeline.getBoundingClientRect();
+    video.currentTime = ((e.clientX - rect.left) / rect.width) * video.duration;
+  });
+  loadTimeline(file.vid, timeline);
+  
+  content.appendChild(timeline);
   content.appendChild(info);
   content.appendChild(controls);
   
@@ -490,25 +577,6 @@ function createExpandedCard(file) {
   return card;
 }
 
-function sortAndRenderFiles() {
-  filteredFiles.sort((a, b) => {
-    switch (currentSort) {
-      case 'latest':
-        return (b.modified || 0) - (a.modified || 0);
-      case 'oldest':
-        return (a.modified || 0) - (b.modified || 0);
-      case 'most_activity':
-        return (b.wildlife_prop || 0) - (a.wildlife_prop || 0);
-      case 'least_activity':
-        return (a.wildlife_prop || 0) - (b.wildlife_prop || 0);
-      default:
-        return (a.modified || 0) - (b.modified || 0);
-    }
-  });
-  
-  renderView();
-}
-
 async function selectVideo(vid) {
   // Store current scroll position before any DOM changes
   const currentScrollY = window.scrollY;
@@ -643,12 +711,95 @@ async function collapseVideoWithoutScroll() {
 
 async function loadAnnotations(vid) {
   try {
-    const res = await fetch(`/api/annotations/${vid}`);
-    annotations = await res.json();
+    const res = await fetch(`/api/annotations/${vid}/packed`);
+    annotations = parsePackedAnnotations(await res.arrayBuffer());
+    // Videos ingested with a frame stride only have detections on every Nth frame
+    const video = filteredFiles.find(file => file.vid === vid);
+    annotations.frameStride = (video && video.frame_stride) || 1;
+    // Frame rate and length read from the container at ingest; null for videos not yet probed
+    annotations.fps = (video && video.fps) || null;
+    annotations.frameCount = (video && video.frame_count) || null;
   } catch (error) {
     console.error('Failed to load annotations:', error);
-    annotations = [];
+    annotations = null;
+  }
+}
+
+function parsePackedAnnotations(buffer) {
+  // Layout is documented in garden_eye/detections.py: magic, header length, JSON header, then typed arrays
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== 'GEA1') throw new Error('Unexpected annotation payload');
+  const headerLength = view.getUint32(4, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+
+  let offset = 8 + headerLength;
+  const take = (ArrayType, length) => {
+    const array = new ArrayType(buffer, offset, length);
+    offset += array.byteLength;
+    return array;
+  };
+  return {
+    count: header.count,
+    names: header.names,
+    frameOffsets: take(Int32Array, header.frame_count + 1),
+    classId: take(Int32Array, header.count),
+    confidence: take(Float32Array, header.count),
+    boxes: take(Float32Array, header.count * 4),
+  };
+}
+
+async function loadTimeline(vid, canvas) {
+  try {
+    const res = await fetch(`/api/videos/${vid}/timeline`);
+    drawTimeline(canvas, await res.json());
+  } catch (error) {
+    console.error('Failed to load timeline:', error);
+  }
+}
+
+function drawTimeline(canvas, timeline) {
+  // Match the canvas resolution to its displayed size so bars stay sharp
+  const scale = window.devicePixelRatio || 1;
+  canvas.width = canvas.offsetWidth * scale;
+  canvas.height = canvas.offsetHeight * scale;
+  const ctx = canvas.getContext('2d');
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  if (timeline.counts.length === 0) return;
+  
+  // Total detections per bin across classes, scaled so the busiest bin fills the strip
+  const totals = new Array(timeline.bins).fill(0);
+  timeline.counts.forEach(row => row.forEach((count, bin) => { totals[bin] += count; }));
+  const max = Math.max(...totals);
+  if (max === 0) return;
+  const binWidth = canvas.width / timeline.bins;
+  ctx.fillStyle = '#238636';
+  totals.forEach((total, bin) => {
+    if (total === 0) return;
+    const height = Math.max(2 * scale, (total / max) * canvas.height);
+    ctx.fillRect(bin * binWidth, canvas.height - height, Math.max(binWidth - scale, scale), height);
+  });
+  canvas.title = `Detections over time: ${timeline.names.join(', ')}`;
+}
+
+function getFrameAnnotations(frame) {
+  // O(1) lookup of the frame's slice via the offset table
+  if (!annotations) return [];
+  // Show the most recent sampled frame's boxes until the next sampled frame
+  frame -= frame % annotations.frameStride;
+  if (frame < 0 || frame + 1 >= annotations.frameOffsets.length) return [];
+  const frameAnnotations = [];
+  for (let i = annotations.frameOffsets[frame]; i < annotations.frameOffsets[frame + 1]; i++) {
+    frameAnnotations.push({
+      name: annotations.names[annotations.classId[i]],
+      confidence: annotations.confidence[i],
+      x1: annotations.boxes[i * 4],
+      y1: annotations.boxes[i * 4 + 1],
+      x2: annotations.boxes[i * 4 + 2],
+      y2: annotations.boxes[i * 4 + 3],
+    });
   }
+  return frameAnnotations;
 }
 
 
@@ -755,6 +906,25 @@ function resizeCanvas() {
   drawAnnotations();
 }
 
+function timeToFrame(player, time) {
+  if (annotations.fps) {
+    // Exact lookup with the recorded frame rate; the small offset stops a frame's own presentation time rounding
+    // down to the previous frame
+    const frame = Math.floor(time * annotations.fps + 1e-3);
+    return annotations.frameCount ? Math.min(frame, annotations.frameCount - 1) : frame;
+  }
+  // Videos not yet probed: use the stream's reported frame rate if available, otherwise assume 30fps
+  let fps = 30;
+  const tracks = player.captureStream ? player.captureStream().getVideoTracks() : [];
+  if (tracks.length > 0 && tracks[0].getSettings) {
+    const settings = tracks[0].getSettings();
+    if (settings.frameRate) {
+      fps = settings.frameRate;
+    }
+  }
+  return Math.floor(time * fps);
+}
+
 function drawAnnotations(time) {
   const player = document.getElementById('player');
   const canvas = document.getElementById('annotation-overlay');
@@ -769,26 +939,14 @@ function drawAnnotations(time) {
   // Clear canvas
   ctx.clearRect(0, 0, canvas.width, canvas.height);
   
-  if (!showAnnotations || annotations.length === 0 || player.paused || !player.videoWidth || !player.videoHeight) {
+  if (!showAnnotations || !annotations || annotations.count === 0 || player.paused || !player.videoWidth || !player.videoHeight) {
     return;
   }
 
-  // Get FPS from video metadata if available, otherwise assume 30fps
-  let fps = 30;
-  if (player.videoWidth && player.videoHeight) {
-    // Try to get framerate from video element (if available)
-    const tracks = player.captureStream ? player.captureStream().getVideoTracks() : [];
-    if (tracks.length > 0 && tracks[0].getSettings) {
-      const settings = tracks[0].getSettings();
-      if (settings.frameRate) {
-        fps = settings.frameRate;
-      }
-    }
-  }
-  const currentFrame = Math.floor((time || player.currentTime) * fps);
+  const currentFrame = timeToFrame(player, time || player.currentTime);
   
   // Get annotations for current frame
-  let frameAnnotations = annotations.filter(ann => ann.frame_idx === currentFrame);
+  const frameAnnotations = getFrameAnnotations(currentFrame);
   
   if (frameAnnotations.length === 0) return;
   